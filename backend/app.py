@@ -1,28 +1,47 @@
 import os
 import click
+from sqlalchemy import inspect
 from flask import Flask, jsonify
-from flask_migrate import Migrate
+from flask_migrate import Migrate, stamp
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from flask_caching import Cache
 
 # Import configurations and models
 from backend.config import Config
+from backend.extensions import cache  # Global cache object, shared with the blueprints
 from backend.models.users import db, bcrypt, User
-from backend.models.parking import ParkingLot, ParkingSpot, Booking
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, check_lot_counters
+import backend.models.analytics  # registers the usage rollup tables
+from backend.services import dashboard, lot_list
+from backend.services.dashboard import invalidate_dashboard_summary
+from backend.services.engine import engine_options, configure_sqlite
+from backend.services.events import occupancy_events
+from backend.services.metrics import request_metrics
+from backend.services.allocator import spot_allocator
+from backend.services.active_bookings import active_bookings
+from backend.services.lot_search import lot_prefix_index
+from backend.services.reservations import reservation_index
+from backend.services.auth import principal_cache
+from backend.services.passwords import password_hasher
+from backend.services.rate_limit import rate_limiter
+from backend.services.query_plans import check_query_plans
+from backend.services.query_budgets import check_query_budgets
+from backend.services.serialization import FastJSONProvider
 
 # Import blueprints
 from backend.routes.auth_routes import auth_bp
 from backend.routes.admin_routes import admin_bp
 from backend.routes.user_routes import user_bp
 
-# Global cache object
-cache = Cache()
-
-def create_app():
+def create_app(test_config=None):
     """Application factory function."""
     app = Flask(__name__, instance_relative_config=True)
+    # orjson-backed when installed; datetimes are always written as ISO 8601
+    app.json = FastJSONProvider(app)
     app.config.from_object(Config)
+    if test_config:
+        # Lets scripts and benchmarks point the app at their own database
+        app.config.update(test_config)
 
     # Create instance folder if not exists
     try:
@@ -31,15 +50,41 @@ def create_app():
         pass
 
     # --- Initialize Extensions ---
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config)
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine, app.config.get('SQLITE_PRAGMAS'))
+    # Per-endpoint latency, SQL counts and SQL time, served at /metrics
+    request_metrics.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     jwt = JWTManager(app)
-    migrate = Migrate(app, db)
-    CORS(app)  # Enable CORS for frontend integration
+    # Verified tokens, so repeat requests skip the signature check and claim decoding
+    principal_cache.init_app(app)
+    migrate = Migrate(app, db, directory=os.path.join(os.path.dirname(__file__), 'migrations'), render_as_batch=True)
+    CORS(app, expose_headers=['X-Next-Cursor'])  # Enable CORS for frontend integration
 
     # Initialize Cache (Redis by default from Config)
     cache.init_app(app)
 
+    # Token-bucket admission control for login, register and booking
+    rate_limiter.init_app(app)
+
+    # Free-spot lists used by the booking route
+    spot_allocator.init_app(app)
+
+    # Open bookings by user and by spot, so active-booking lookups skip SQL
+    active_bookings.init_app(app)
+
+    # Occupancy deltas for the live event stream; they also expire the dashboard and lot list
+    # caches, the lot search index and the reservation schedules
+    occupancy_events.init_app(app)
+    occupancy_events.add_listener(dashboard.on_occupancy_event)
+    occupancy_events.add_listener(lot_list.on_occupancy_event)
+    occupancy_events.add_listener(active_bookings.on_occupancy_event)
+    occupancy_events.add_listener(lot_prefix_index.on_occupancy_event)
+    occupancy_events.add_listener(reservation_index.on_occupancy_event)
+
     # --- Register Blueprints ---
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
@@ -55,7 +100,11 @@ def create_app():
     def init_db_command():
         """Creates the database tables and the initial admin user."""
         with app.app_context():
+            fresh_database = not inspect(db.engine).has_table('users')
             db.create_all()
+            if fresh_database:
+                # Brand-new tables match the latest migration; record that for 'flask db upgrade'
+                stamp()
             
             # Check if admin already exists
             if User.query.filter_by(role='admin').first():
@@ -75,6 +124,120 @@ def create_app():
             click.echo(f'Admin Email: {admin_email}')
             click.echo(f'Admin Password: {admin_password}')
 
+    # --- CLI command to verify the denormalized lot counters ---
+    @app.cli.command("check-lot-counters")
+    @click.option('--repair', is_flag=True, help="Overwrite drifted counters with the actual spot counts.")
+    def check_lot_counters_command(repair):
+        """Compares each lot's available/occupied counters with its spots."""
+        with app.app_context():
+            mismatches = check_lot_counters(repair=repair)
+
+            if not mismatches:
+                click.echo('All lot counters are consistent.')
+                return
+
+            for lot_id, stored, actual in mismatches:
+                click.echo(f'Lot {lot_id}: stored (available, occupied)={stored}, actual={actual}')
+            if repair:
+                invalidate_dashboard_summary()
+                lot_list.invalidate_lot_list()
+                click.echo(f'Repaired {len(mismatches)} lot(s).')
+            else:
+                click.echo('Run with --repair to fix them.')
+                raise SystemExit(1)
+
+    # --- CLI command to reload the active-booking index after a cold start ---
+    @app.cli.command("rebuild-active-bookings")
+    def rebuild_active_bookings_command():
+        """Reloads the active-booking index (ACTIVE_BOOKINGS_BACKEND) from the open bookings."""
+        with app.app_context():
+            count = active_bookings.rebuild()
+            if count is None:
+                click.echo('Bookings changed while the index was being read; run the command again.')
+                raise SystemExit(1)
+            click.echo(f'Indexed {count} open booking(s).')
+
+    # --- CLI command to run the daily reminder job in the foreground ---
+    @app.cli.command("send-reminders")
+    @click.option('--dry-run', is_flag=True, help="Only count the inactive users; send nothing.")
+    def send_reminders_command(dry_run):
+        """Runs the daily inactivity reminders and prints counts and timing."""
+        from backend.tasks.reminders import send_daily_reminders
+        with app.app_context():
+            result = send_daily_reminders(dry_run=dry_run)
+            for key, value in result.items():
+                click.echo(f'{key}: {value}')
+
+    # --- CLI command to run the booking archival job in the foreground ---
+    @app.cli.command("archive-bookings")
+    @click.option('--older-than-days', type=int, default=None, help="Override ARCHIVE_AFTER_DAYS.")
+    @click.option('--dry-run', is_flag=True, help="Only count the bookings that would be archived.")
+    def archive_bookings_command(older_than_days, dry_run):
+        """Moves completed bookings older than ARCHIVE_AFTER_DAYS to bookings_archive."""
+        from backend.tasks.archive import archive_bookings, ARCHIVE_AFTER_DAYS
+        with app.app_context():
+            days = older_than_days if older_than_days is not None else ARCHIVE_AFTER_DAYS
+            result = archive_bookings(older_than_days=days, dry_run=dry_run)
+            for key, value in result.items():
+                click.echo(f'{key}: {value}')
+
+    # --- CLI command to build the usage rollups from the existing history ---
+    @app.cli.command("backfill-rollups")
+    @click.option('--rebuild', is_flag=True, help="Delete the rollups and rebuild them from the first booking.")
+    def backfill_rollups_command(rebuild):
+        """Rolls every completed hour of booking history into the lot usage tables."""
+        from backend.tasks.rollups import update_usage_rollups, reset_usage_rollups
+        with app.app_context():
+            if rebuild:
+                reset_usage_rollups()
+            result = update_usage_rollups(
+                progress=lambda watermark, until: click.echo(f'Rolled up to {watermark.isoformat()} of {until.isoformat()}')
+            )
+            for key, value in result.items():
+                click.echo(f'{key}: {value}')
+
+    # --- CLI command to hold routes to their declared query budgets ---
+    @app.cli.command("check-query-budgets")
+    def check_query_budgets_command():
+        """Runs every budgeted GET route on sample data and fails if one runs too many queries."""
+        sandbox = create_app({
+            "SQLALCHEMY_DATABASE_URI": "sqlite://",
+            "TESTING": True,
+            "CACHE_TYPE": "SimpleCache",
+            "RATE_LIMIT_ENABLED": False,
+            "SPOT_ALLOCATOR_BACKEND": "local",
+            "EVENTS_BACKEND": "local",
+        })
+        failed = False
+        for rule, queries, budget, error in check_query_budgets(sandbox):
+            status = 'FAIL' if error else 'ok'
+            failed = failed or bool(error)
+            click.echo(f'{status:<4} {rule:<28} {queries if queries is not None else "?":>3} / {budget} queries'
+                       + (f'  {error}' if error else ''))
+        if failed:
+            raise SystemExit(1)
+
+    # --- CLI command to verify the hot queries are served by indexes ---
+    @app.cli.command("check-query-plans")
+    def check_query_plans_command():
+        """Fails if the main query of a hot route scans a whole table."""
+        with app.app_context():
+            failed = skipped = False
+            for name, (plan, full_scans) in check_query_plans().items():
+                click.echo(f'{"FAIL" if full_scans else "skip" if plan is None else "ok":>4}  {name}')
+                for line in plan or ():
+                    click.echo(f'        {line}')
+                failed = failed or bool(full_scans)
+                skipped = skipped or plan is None
+
+            if skipped:
+                click.echo(f'Query plans cannot be checked on {db.engine.dialect.name}; '
+                           'run the check against SQLite or PostgreSQL.')
+
+            if failed:
+                click.echo('Some hot queries scan a table without an index.')
+                raise SystemExit(1)
+
     return app
 
 # Example for setting FLASK_APP before running:
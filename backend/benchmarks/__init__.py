@@ -0,0 +1,20 @@
+# backend/benchmarks
+#
+# Stand-alone performance scripts. Each module runs against its own throwaway
+# SQLite database, e.g.:
+#   python -m backend.benchmarks.lot_listing
+#
+# load_test drives the hot routes concurrently over a generated data set
+# (dataset.py) and can compare a run against a saved baseline.
+#
+# Scripts that can also run against a server database only read it from
+# BENCHMARK_DATABASE_URL, never from DATABASE_URL (which backend/.env sets
+# for the real app): they drop and refill every table.
+
+import os
+import tempfile
+
+
+def database_url(name):
+    """BENCHMARK_DATABASE_URL if set, otherwise a new temporary SQLite file called name."""
+    return os.environ.get('BENCHMARK_DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
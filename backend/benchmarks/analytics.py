@@ -0,0 +1,74 @@
+# backend/benchmarks/analytics.py
+#
+# Measures the usage rollups: the backfill of a generated history, an
+# incremental run with nothing new, and a year of daily revenue served from
+# lot_usage_daily against the same series aggregated live from bookings.
+#   python -m backend.benchmarks.analytics [--users 2000] [--years 1]
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.benchmarks.dataset import seed_dataset
+from backend.models.users import db
+from backend.models.parking import ParkingSpot, Booking
+from backend.tasks.rollups import update_usage_rollups
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lot usage rollups.")
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=100, help="Spots per lot.")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--years', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_TYPE": "SimpleCache"})
+    with app.app_context():
+        db.create_all()
+        dataset = seed_dataset(args.lots, args.spots, args.users, years=args.years)
+        admin = {"Authorization": "Bearer " + create_access_token(
+            identity="1", additional_claims={"role": "admin"})}
+        print(f"{dataset['bookings']} bookings over {args.years:g} year(s), {args.lots} lots")
+
+        start = time.perf_counter()
+        result = update_usage_rollups()
+        print(f"backfill            {(time.perf_counter() - start) * 1000:10.1f} ms "
+              f"({result['hours']} hours in {result['windows']} windows)")
+        print(f"incremental, idle   {best_of(args.repeat, update_usage_rollups):10.2f} ms")
+
+        since = datetime.utcnow() - timedelta(days=365)
+
+        def live_series():
+            # What answering the question without rollups costs: a grouped scan of bookings
+            day = db.func.date(Booking.park_out_time)
+            db.session.query(day, db.func.sum(Booking.cost)).join(
+                ParkingSpot, ParkingSpot.id == Booking.spot_id
+            ).filter(Booking.park_out_time >= since).group_by(day).all()
+
+        print(f"live GROUP BY       {best_of(args.repeat, live_series):10.2f} ms")
+
+    client = app.test_client()
+
+    def rollup_series():
+        response = client.get(f'/admin/analytics/revenue?start={since.date().isoformat()}', headers=admin)
+        assert response.status_code == 200, response.status_code
+
+    print(f"/admin/analytics    {best_of(args.repeat, rollup_series):10.2f} ms (a year of daily revenue)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# backend/benchmarks/archive_id_reuse.py
+#
+# Regression check for booking ids: archives old bookings, purges the lot
+# holding the newest ones, books again and archives again. The script fails
+# (exit code 1) if a new booking reuses an id that is already archived, which
+# used to make every later archive run fail on bookings_archive's primary key.
+#   python -m backend.benchmarks.archive_id_reuse [--bookings 50]
+#
+# Always runs against a temporary SQLite file, the backend that reuses ids.
+
+import argparse
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+
+from backend.app import create_app
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, ArchivedBooking
+from backend.tasks.archive import archive_bookings
+from backend.tasks.lots import close_lot, purge_lot
+
+
+def add_lot(name, spots):
+    lot = ParkingLot(name=name, address='1 Archive Road', pin_code='600001',
+                     price_per_hour=10.0, capacity=spots, available_spots=spots)
+    db.session.add(lot)
+    db.session.flush()
+    ParkingSpot.provision(lot.id, 1, spots)
+    return lot.id
+
+
+def add_bookings(user_id, lot_id, count, days_ago):
+    """count completed bookings on the lot's first spot, days_ago days old."""
+    spot_id = db.session.query(ParkingSpot.id).filter_by(lot_id=lot_id).order_by(ParkingSpot.spot_number).first()[0]
+    park_in = datetime.utcnow() - timedelta(days=days_ago)
+    db.session.execute(db.insert(Booking), [
+        {"user_id": user_id, "spot_id": spot_id, "park_in_time": park_in + timedelta(hours=i),
+         "park_out_time": park_in + timedelta(hours=i, minutes=30), "cost": 10.0}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive after purging the newest bookings.")
+    parser.add_argument('--bookings', type=int, default=50, help="Bookings per step.")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'archive.db')
+    app = create_app({"SQLALCHEMY_DATABASE_URI": f'sqlite:///{db_path}'})
+    problems = []
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='archivist', email='archivist@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        kept, purged = add_lot('Kept', 2), add_lot('Purged', 2)
+        add_bookings(user.id, kept, args.bookings, days_ago=200)
+        add_bookings(user.id, purged, args.bookings, days_ago=150)
+        first = archive_bookings(older_than_days=90)
+
+        # The purged lot held the newest bookings, so its ids are the highest ever used
+        highest_id = db.session.query(db.func.max(ArchivedBooking.id)).scalar()
+        close_lot(purged)
+        purge_lot(purged)
+
+        add_bookings(user.id, kept, args.bookings, days_ago=120)
+        new_ids = [booking_id for booking_id, in db.session.query(Booking.id)]
+        if min(new_ids) <= highest_id:
+            problems.append(f"new bookings reuse ids from {min(new_ids)} (highest used was {highest_id})")
+        try:
+            second = archive_bookings(older_than_days=90)
+        except IntegrityError as e:
+            db.session.rollback()
+            problems.append(f"archive run after the purge failed: {e.orig}")
+            second = {"archived": 0}
+
+        archived = db.session.query(db.func.count(ArchivedBooking.id)).scalar()
+        print(f"Archived {first['archived']} bookings, purged a lot, archived {second['archived']} more; "
+              f"{archived} in the archive")
+
+    if problems:
+        print("FAILED:", "; ".join(problems))
+        sys.exit(1)
+    print("OK: booking ids were never reused.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# backend/benchmarks/auth_overhead.py
+#
+# Per-request authorization cost of a protected admin handler: the old
+# jwt_required() + get_jwt() role check against auth_required(role='admin'),
+# whose repeat tokens are answered from the principal cache.
+#   python -m backend.benchmarks.auth_overhead [--requests 20000]
+
+import argparse
+import time
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
+
+from backend.app import create_app
+from backend.services.auth import auth_required, current_user_id, principal_cache
+
+
+def old_admin_required():
+    """admin_required as it was before the principal cache."""
+    def wrapper(fn):
+        @wraps(fn)
+        @jwt_required()
+        def decorator(*args, **kwargs):
+            claims = get_jwt()
+            if claims.get('role') != 'admin':
+                return jsonify(msg="Admins only! Access forbidden."), 403
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+
+@old_admin_required()
+def old_handler():
+    return get_jwt_identity()
+
+
+@auth_required(role='admin')
+def new_handler():
+    return current_user_id()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request authorization.")
+    parser.add_argument('--requests', type=int, default=20000)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        token = create_access_token(identity="1", additional_claims={"role": "admin", "username": "admin"})
+    headers = {"Authorization": f"Bearer {token}"}
+
+    results = {}
+    for label, handler in (("jwt_required + get_jwt", old_handler), ("auth_required (cached)", new_handler)):
+        principal_cache.clear()
+        with app.test_request_context('/admin/lots', headers=headers):
+            handler()  # warm up, and fill the cache for the new path
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                handler()
+            results[label] = (time.perf_counter() - start) / args.requests * 1e6
+        print(f"{label:<24} {results[label]:8.1f} us/request")
+
+    baseline, cached = results.values()
+    print(f"speed-up: {baseline / cached:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
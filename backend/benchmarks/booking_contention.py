@@ -0,0 +1,99 @@
+# backend/benchmarks/booking_contention.py
+#
+# Stress test for the spot allocator: many threads book the same lot at once
+# and the script fails (exit code 1) if any spot ends up allocated twice.
+#   python -m backend.benchmarks.booking_contention [--threads 32] [--spots 20]
+#
+# Set BENCHMARK_DATABASE_URL to a scratch PostgreSQL database (its tables are
+# dropped) to run it against a real server; by default a temporary SQLite file
+# is used.
+
+import argparse
+import sys
+import threading
+import time
+from collections import Counter
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.benchmarks import database_url
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, check_lot_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test.")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--spots', type=int, default=20)
+    parser.add_argument('--rounds', type=int, default=3, help="Book/release rounds per thread.")
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url('contention.db'), "RATE_LIMIT_ENABLED": False})
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        lot = ParkingLot(name='Contended', address='1 Race Street', pin_code='600001',
+                         price_per_hour=10.0, capacity=args.spots, available_spots=args.spots)
+        db.session.add(lot)
+        db.session.flush()
+        db.session.execute(db.insert(ParkingSpot), [
+            {"lot_id": lot.id, "spot_number": n} for n in range(1, args.spots + 1)
+        ])
+        users = [User(username=f'racer{i}', email=f'racer{i}@example.com', password_hash='x')
+                 for i in range(args.threads)]
+        db.session.add_all(users)
+        db.session.commit()
+        lot_id = lot.id
+        tokens = [create_access_token(identity=str(u.id), additional_claims={"role": "user"}) for u in users]
+
+    outcomes = Counter()
+    held = {}  # spot_id -> user currently holding it, as seen by the clients
+    double_allocations = []
+    guard = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+
+    def racer(token):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+        barrier.wait()
+        for _ in range(args.rounds):
+            response = client.post(f'/api/book/{lot_id}', headers=headers)
+            outcomes[response.status_code] += 1
+            if response.status_code != 201:
+                continue
+            spot_id = response.get_json()['booking_details']['spot_id']
+            with guard:
+                if spot_id in held:
+                    double_allocations.append(spot_id)
+                held[spot_id] = token
+            time.sleep(0.001)
+            with guard:
+                held.pop(spot_id, None)
+            outcomes['release %d' % client.post('/api/booking/release', headers=headers).status_code] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=racer, args=(token,)) for token in tokens]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        # No spot may ever have two open bookings, and the counters must match.
+        overlapping = db.session.query(Booking.spot_id).filter(
+            Booking.park_out_time.is_(None)
+        ).group_by(Booking.spot_id).having(db.func.count() > 1).all()
+        drift = check_lot_counters()
+
+    print(f"{args.threads} threads x {args.rounds} rounds on {args.spots} spots in {elapsed:.2f}s")
+    print("Outcomes:", dict(outcomes))
+    if double_allocations or overlapping or drift:
+        print(f"FAILED: double allocations={double_allocations}, overlapping={overlapping}, counter drift={drift}")
+        sys.exit(1)
+    print("OK: no spot was allocated twice.")
+
+
+if __name__ == '__main__':
+    main()
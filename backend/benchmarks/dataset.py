@@ -0,0 +1,115 @@
+# backend/benchmarks/dataset.py
+#
+# Deterministic synthetic data set for the load test: lots with their spots,
+# users, and years of closed bookings, plus a share of drivers currently
+# parked (spots occupied and lot counters matching).
+
+import math
+import random
+from datetime import datetime, timedelta
+
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, check_lot_counters
+
+
+def seed_dataset(lots=50, spots_per_lot=100, users=2000, years=1.0, bookings_per_user_per_year=24,
+                 active_share=0.1, seed=42, batch_size=20000):
+    """
+    Bulk-inserts the data set through the models' tables into an empty
+    database. Users are user<n>@example.com (id n + 1); the admin is
+    admin@parking.com (id 1). Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    history_start = now - timedelta(days=365 * years)
+
+    db.session.add(User(id=1, username='admin', email='admin@parking.com', role='admin',
+                        password_hash=User.hash_password('adminpassword')))
+    password_hash = User.hash_password('password123')
+    _insert_batches(User, (
+        {"id": n + 1, "username": f"user{n}", "email": f"user{n}@example.com",
+         "password_hash": password_hash, "role": "user"}
+        for n in range(1, users + 1)
+    ), batch_size)
+
+    prices = {}
+    for lot_id in range(1, lots + 1):
+        prices[lot_id] = rng.choice((10.0, 20.0, 30.0, 40.0))
+    _insert_batches(ParkingLot, (
+        {"id": lot_id, "name": f"Lot {lot_id}", "address": f"{lot_id} Benchmark Road",
+         "pin_code": f"{600000 + lot_id % 100}", "price_per_hour": prices[lot_id],
+         "capacity": spots_per_lot, "available_spots": spots_per_lot, "occupied_spots": 0}
+        for lot_id in range(1, lots + 1)
+    ), batch_size)
+    for lot_id in range(1, lots + 1):
+        ParkingSpot.provision(lot_id, 1, spots_per_lot)
+
+    # Spot ids follow insertion order: lot 1's spots, then lot 2's, ...
+    def spot_of(lot_id, number):
+        return (lot_id - 1) * spots_per_lot + number
+
+    span = (now - history_start).total_seconds() - 86400
+    per_user = max(0, round(bookings_per_user_per_year * years))
+
+    def closed_bookings():
+        for n in range(1, users + 1):
+            for _ in range(per_user):
+                lot_id = rng.randint(1, lots)
+                park_in = history_start + timedelta(seconds=rng.uniform(0, span))
+                duration = timedelta(minutes=rng.randint(20, 600))
+                yield {
+                    "user_id": n + 1,
+                    "spot_id": spot_of(lot_id, rng.randint(1, spots_per_lot)),
+                    "park_in_time": park_in,
+                    "park_out_time": park_in + duration,
+                    "cost": math.ceil(duration.total_seconds() / 3600) * prices[lot_id],
+                }
+
+    history = _insert_batches(Booking, closed_bookings(), batch_size)
+
+    # Currently parked drivers: the first active users, each on the next free spot
+    active = min(int(users * active_share), lots * spots_per_lot)
+    occupied = []
+    for n in range(1, active + 1):
+        lot_id = (n - 1) % lots + 1
+        number = (n - 1) // lots + 1
+        occupied.append((n + 1, lot_id, spot_of(lot_id, number)))
+    _insert_batches(Booking, (
+        {"user_id": user_id, "spot_id": spot_id,
+         "park_in_time": now - timedelta(minutes=rng.randint(5, 240))}
+        for user_id, _, spot_id in occupied
+    ), batch_size)
+    spot_ids = [spot_id for _, _, spot_id in occupied]
+    for i in range(0, len(spot_ids), 500):
+        db.session.execute(
+            db.update(ParkingSpot).where(ParkingSpot.id.in_(spot_ids[i:i + 500])).values(status='Occupied')
+        )
+    db.session.commit()
+
+    check_lot_counters(repair=True)
+    return {
+        "lots": lots,
+        "spots": lots * spots_per_lot,
+        "users": users,
+        "bookings": history + active,
+        "active_bookings": active,
+        # Users with ids from here up to users + 1 have no open booking
+        "first_free_user_id": active + 2,
+    }
+
+
+def _insert_batches(model, rows, batch_size):
+    """Executemany-inserts an iterable of dicts batch by batch; returns the row count."""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(db.insert(model), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(db.insert(model), batch)
+        total += len(batch)
+    db.session.commit()
+    return total
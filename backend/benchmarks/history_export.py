@@ -0,0 +1,59 @@
+# backend/benchmarks/history_export.py
+#
+# Exports growing booking histories and reports time and peak Python memory;
+# the peak should stay flat as the history grows.
+#   python -m backend.benchmarks.history_export [--sizes 10000 100000]
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from backend.app import create_app
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking
+from backend.tasks.exports import export_parking_history_csv
+
+
+def seed(user_id, count, batch=50000):
+    start = datetime(2024, 1, 1)
+    for first in range(0, count, batch):
+        db.session.execute(db.insert(Booking), [
+            {"user_id": user_id, "spot_id": 1, "park_in_time": start + timedelta(hours=i),
+             "park_out_time": start + timedelta(hours=i, minutes=90), "cost": 20.0}
+            for i in range(first, min(first + batch, count))
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the streaming CSV export.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "EXPORT_DIR": tempfile.mkdtemp()})
+    with app.app_context():
+        db.create_all()
+        db.session.add(ParkingLot(id=1, name='Bench', address='1 Bench Street', pin_code='600001',
+                                  price_per_hour=10.0, capacity=1))
+        db.session.add(ParkingSpot(id=1, lot_id=1, spot_number=1))
+        for user_id, size in enumerate(args.sizes, start=1):
+            db.session.add(User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com",
+                                password_hash="x", role="user"))
+            db.session.flush()
+            seed(user_id, size)
+
+        for user_id, size in enumerate(args.sizes, start=1):
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = export_parking_history_csv.run(user_id, args.gzip)
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{result['rows']:>9} rows in {elapsed:6.2f}s, peak {peak / 1024:,.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
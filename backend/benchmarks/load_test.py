@@ -0,0 +1,278 @@
+# backend/benchmarks/load_test.py
+#
+# Seeds a synthetic data set and drives the hot routes with concurrent
+# clients, reporting p50/p95/p99 latency and throughput per route as JSON.
+# Save a run as the baseline and later runs are compared against it:
+#   python -m backend.benchmarks.load_test --save-baseline baseline.json
+#   python -m backend.benchmarks.load_test --compare baseline.json [--max-regression 20]
+#
+# --server runs the app behind a local threaded WSGI server and talks HTTP to
+# it instead of using Flask's test client. BENCHMARK_DATABASE_URL may point
+# at an empty scratch PostgreSQL database (it is filled with the data set); by
+# default a temporary SQLite file is used. DATABASE_URL is never read.
+
+import argparse
+import http.client
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import sqlalchemy
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from backend.app import create_app
+from backend.benchmarks import database_url
+from backend.benchmarks.dataset import seed_dataset
+from backend.models.users import db
+
+# name -> (method, path, role); 'book_release' is handled separately
+READ_SCENARIOS = {
+    "lots": ("GET", "/api/lots", "user"),
+    "spots_status": ("GET", "/admin/spots/status", "admin"),
+    "dashboard_summary": ("GET", "/admin/dashboard/summary", "admin"),
+    "admin_bookings": ("GET", "/admin/bookings", "admin"),
+}
+SCENARIOS = list(READ_SCENARIOS) + ["book_release"]
+
+
+class TestClientTransport:
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, headers):
+        response = self.client.open(path, method=method, headers=headers)
+        response.get_data()  # include streamed bodies in the timing
+        return response.status_code
+
+
+class HTTPTransport:
+    def __init__(self, port):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+
+    def request(self, method, path, headers):
+        self.connection.request(method, path, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        if response.will_close:
+            self.connection.close()
+        return response.status
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+        "mean_ms": ms(statistics.fmean(latencies)) if latencies else None,
+        "p50_ms": ms(percentile(latencies, 0.50)),
+        "p95_ms": ms(percentile(latencies, 0.95)),
+        "p99_ms": ms(percentile(latencies, 0.99)),
+    }
+
+
+def run_scenario(name, make_transport, tokens, free_user_tokens, lots, concurrency, requests_per_client):
+    """Runs one scenario with `concurrency` clients; returns {operation: summary}."""
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    barrier = threading.Barrier(concurrency + 1)
+
+    def client(n):
+        transport = make_transport()
+        rng = random.Random(n)
+        samples = defaultdict(list)
+        failures = defaultdict(int)
+
+        def timed(operation, method, path, token, ok=(200,)):
+            start = time.perf_counter()
+            status = transport.request(method, path, {"Authorization": f"Bearer {token}"})
+            samples[operation].append(time.perf_counter() - start)
+            if status not in ok:
+                failures[operation] += 1
+            return status
+
+        barrier.wait()
+        for _ in range(requests_per_client):
+            if name == "book_release":
+                token = free_user_tokens[n % len(free_user_tokens)]
+                status = timed("book", "POST", f"/api/book/{rng.randint(1, lots)}", token, ok=(201, 404))
+                if status == 201:
+                    timed("release", "POST", "/api/booking/release", token)
+            else:
+                method, path, role = READ_SCENARIOS[name]
+                timed(name, method, path, tokens[role])
+        with lock:
+            for operation, values in samples.items():
+                latencies[operation] += values
+            for operation, count in failures.items():
+                errors[operation] += count
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return {operation: summarize(values, errors[operation], elapsed) for operation, values in latencies.items()}
+
+
+def compare(results, baseline, max_regression):
+    """Prints p95 and throughput against the baseline; returns the regressed operations."""
+    regressions = []
+    print(f"\n{'operation':<20}{'p95 ms':>10}{'base':>10}{'change':>9}{'rps':>10}{'base':>10}{'change':>9}")
+    for operation, current in sorted(results.items()):
+        base = baseline.get(operation)
+        if not base:
+            print(f"{operation:<20}{current['p95_ms']:>10}{'-':>10}")
+            continue
+        p95_change = _change(current['p95_ms'], base['p95_ms'])
+        rps_change = _change(current['throughput_rps'], base['throughput_rps'])
+        print(f"{operation:<20}{current['p95_ms']:>10}{base['p95_ms']:>10}{p95_change:>+8.1f}%"
+              f"{current['throughput_rps']:>10}{base['throughput_rps']:>10}{rps_change:>+8.1f}%")
+        if p95_change > max_regression or rps_change < -max_regression:
+            regressions.append(operation)
+    return regressions
+
+
+def _change(current, base):
+    return (current - base) / base * 100 if base else 0.0
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the hot API routes.")
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=100, help="Spots per lot.")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--years', type=float, default=1.0, help="Years of booking history.")
+    parser.add_argument('--bookings-per-year', type=int, default=24, help="Per user.")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=50, help="Per client and scenario.")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument('--server', action='store_true', help="Go through a local WSGI server.")
+    parser.add_argument('--output', help="Write the JSON report here (default: stdout).")
+    parser.add_argument('--save-baseline', metavar='PATH', help="Also store the report as a baseline.")
+    parser.add_argument('--compare', metavar='PATH', help="Compare against a stored baseline.")
+    parser.add_argument('--max-regression', type=float, default=20.0,
+                        help="Percent p95/throughput change that fails --compare.")
+    args = parser.parse_args()
+
+    database_uri = database_url('load_test.db')
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "CACHE_TYPE": "SimpleCache",
+        "RATE_LIMIT_ENABLED": False,
+    })
+
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        dataset = seed_dataset(args.lots, args.spots, args.users, args.years, args.bookings_per_year)
+        seed_seconds = time.perf_counter() - start
+        print(f"Seeded {dataset['bookings']} bookings for {dataset['users']} users on "
+              f"{dataset['spots']} spots in {seed_seconds:.1f}s", file=sys.stderr)
+        tokens = {
+            "admin": create_access_token(identity="1", additional_claims={"role": "admin", "username": "admin"}),
+            "user": create_access_token(identity="2", additional_claims={"role": "user", "username": "user1"}),
+        }
+        free_ids = range(dataset['first_free_user_id'], dataset['users'] + 2)
+        free_user_tokens = [
+            create_access_token(identity=str(user_id), additional_claims={"role": "user"})
+            for user_id in list(free_ids)[:args.concurrency]
+        ]
+
+    server = None
+    if args.server:
+        server = make_server('127.0.0.1', 0, app, threaded=True,
+                             request_handler=QuietRequestHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        make_transport = lambda: HTTPTransport(server.server_port)
+    else:
+        make_transport = lambda: TestClientTransport(app)
+
+    results = {}
+    try:
+        for name in args.scenarios:
+            outcome = run_scenario(name, make_transport, tokens, free_user_tokens, args.lots,
+                                   args.concurrency, args.requests)
+            for operation, summary in outcome.items():
+                results[operation] = summary
+                print(f"{operation:<20} p50 {summary['p50_ms']:>8} ms  p95 {summary['p95_ms']:>8} ms  "
+                      f"p99 {summary['p99_ms']:>8} ms  {summary['throughput_rps']:>8} req/s  "
+                      f"errors {summary['errors']}", file=sys.stderr)
+    finally:
+        if server:
+            server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "platform": platform.platform(),
+            "database": sqlalchemy.engine.make_url(database_uri).get_backend_name(),
+            "transport": "wsgi-server" if args.server else "test-client",
+            "concurrency": args.concurrency,
+            "requests_per_client": args.requests,
+            "dataset": dataset,
+            "seed_seconds": round(seed_seconds, 2),
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            f.write(text + '\n')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('transport', 'database', 'concurrency', 'requests_per_client', 'dataset'):
+            if baseline['meta'].get(key) != report['meta'][key]:
+                print(f"Warning: baseline was run with a different {key}; figures may not be comparable.")
+        regressions = compare(results, baseline['results'], args.max_regression)
+        if regressions:
+            print(f"\nREGRESSED beyond {args.max_regression}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regression beyond the threshold.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+# backend/benchmarks/login_load.py
+#
+# Fires concurrent logins at /auth/login from many client threads (like a
+# threaded gunicorn worker at a shift change) and reports throughput,
+# latency percentiles and how many requests were shed with a 503.
+#   python -m backend.benchmarks.login_load [--rounds 12] [--clients 32] [--hash-workers 1 4]
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from backend.app import create_app
+from backend.models.users import db, User
+
+
+def run(app, emails, clients, logins_per_client):
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def client(offset):
+        test_client = app.test_client()
+        for i in range(logins_per_client):
+            email = emails[(offset + i) % len(emails)]
+            start = time.perf_counter()
+            r = test_client.post('/auth/login', json={"email": email, "password": "password123"})
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                statuses.append(r.status_code)
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark concurrent logins.")
+    parser.add_argument('--rounds', type=int, default=12)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--logins-per-client', type=int, default=4)
+    parser.add_argument('--hash-workers', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--max-pending', type=int, default=0, help="0 = hash workers x 8")
+    args = parser.parse_args()
+
+    for workers in args.hash_workers:
+        app = create_app({
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'login_load.db')}",
+            "BCRYPT_LOG_ROUNDS": args.rounds,
+            "PASSWORD_HASH_WORKERS": workers,
+            "PASSWORD_HASH_MAX_PENDING": args.max_pending or None,
+            "RATE_LIMIT_ENABLED": False,
+        })
+        with app.app_context():
+            db.create_all()
+            password_hash = User.hash_password("password123")
+            db.session.add_all(
+                User(username=f"user{i}", email=f"user{i}@example.com", password_hash=password_hash)
+                for i in range(args.users)
+            )
+            db.session.commit()
+            emails = [f"user{i}@example.com" for i in range(args.users)]
+
+        elapsed, latencies, statuses = run(app, emails, args.clients, args.logins_per_client)
+        latencies.sort()
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(f"hash workers {workers:>2}: {len(statuses) / elapsed:6.1f} logins/s, "
+              f"p50 {quantiles[49] * 1000:6.0f} ms, p95 {quantiles[94] * 1000:6.0f} ms, "
+              f"ok {statuses.count(200)}, shed {statuses.count(503)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/lot_listing.py
+#
+# Measures GET /admin/lots on a large deployment (500 lots x 200 spots by
+# default) and compares the stored counters with the old per-lot COUNT.
+#   python -m backend.benchmarks.lot_listing [--lots 500] [--spots 200]
+
+import argparse
+import time
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.models.users import db
+from backend.models.parking import ParkingLot, ParkingSpot
+
+
+def seed(lot_count, spots_per_lot):
+    """Bulk-inserts lots and spots, marking every fourth spot as occupied."""
+    db.session.execute(db.insert(ParkingLot), [
+        {
+            "id": lot_id,
+            "name": f"Lot {lot_id}",
+            "address": f"{lot_id} Benchmark Road",
+            "pin_code": f"{600000 + lot_id}",
+            "price_per_hour": 20.0,
+            "capacity": spots_per_lot,
+            "available_spots": spots_per_lot - spots_per_lot // 4,
+            "occupied_spots": spots_per_lot // 4
+        } for lot_id in range(1, lot_count + 1)
+    ])
+    db.session.execute(db.insert(ParkingSpot), [
+        {
+            "lot_id": lot_id,
+            "spot_number": number,
+            "status": 'Occupied' if number % 4 == 0 else 'Available'
+        } for lot_id in range(1, lot_count + 1) for number in range(1, spots_per_lot + 1)
+    ])
+    db.session.commit()
+
+
+def count_queries(fn):
+    """Runs fn and returns (elapsed seconds, number of SQL statements issued)."""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", on_execute)
+    try:
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(db.engine, "before_cursor_execute", on_execute)
+    return elapsed, len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lot listing endpoint.")
+    parser.add_argument('--lots', type=int, default=500)
+    parser.add_argument('--spots', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_TYPE": "SimpleCache"})
+    with app.app_context():
+        db.create_all()
+        seed(args.lots, args.spots)
+        token = create_access_token(identity="1", additional_claims={"role": "admin"})
+
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"}
+
+        def legacy_listing():
+            # The old ParkingLot.to_dict: one COUNT over parking_spots per lot.
+            return [
+                lot.spots.filter_by(status='Available').count()
+                for lot in ParkingLot.query.all()
+            ]
+
+        def counter_listing():
+            response = client.get('/admin/lots', headers=headers)
+            assert response.status_code == 200, response.status_code
+            return response
+
+        for label, fn in (("per-lot COUNT", legacy_listing), ("stored counters", counter_listing)):
+            timings = []
+            for _ in range(args.repeat):
+                db.session.expire_all()
+                elapsed, queries = count_queries(fn)
+                timings.append(elapsed)
+            print(f"{label:>16}: best {min(timings) * 1000:8.1f} ms, {queries} queries "
+                  f"({args.lots} lots x {args.spots} spots)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+# backend/benchmarks/lot_provisioning.py
+#
+# Compares creating a large lot spot-by-spot through the ORM (the old
+# create_parking_lot loop) with the set-based ParkingSpot.provision, and times
+# the bulk import endpoint.
+#   python -m backend.benchmarks.lot_provisioning [--capacity 5000] [--import-lots 50]
+
+import argparse
+import time
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.models.users import db
+from backend.models.parking import ParkingLot, ParkingSpot
+
+
+def orm_loop(lot_id, capacity):
+    for i in range(1, capacity + 1):
+        db.session.add(ParkingSpot(spot_number=i, lot_id=lot_id))
+    db.session.commit()
+
+
+def bulk(lot_id, capacity):
+    ParkingSpot.provision(lot_id, 1, capacity)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark spot provisioning.")
+    parser.add_argument('--capacity', type=int, default=5000)
+    parser.add_argument('--import-lots', type=int, default=50)
+    parser.add_argument('--import-capacity', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+
+        for label, fn in (("ORM loop", orm_loop), ("bulk insert", bulk)):
+            lot = ParkingLot(name=label, address='1 Bench Street', pin_code='600001',
+                             price_per_hour=10.0, capacity=args.capacity, available_spots=args.capacity)
+            db.session.add(lot)
+            db.session.commit()
+            start = time.perf_counter()
+            fn(lot.id, args.capacity)
+            elapsed = time.perf_counter() - start
+            print(f"{label:>12}: {args.capacity} spots in {elapsed * 1000:8.1f} ms")
+
+        token = create_access_token(identity="1", additional_claims={"role": "admin"})
+        payload = [
+            {"name": f"Imported {i}", "address": f"{i} Import Road", "pin_code": "600002",
+             "price_per_hour": 15, "capacity": args.import_capacity}
+            for i in range(args.import_lots)
+        ]
+        start = time.perf_counter()
+        response = app.test_client().post('/admin/lots/import', json=payload,
+                                          headers={"Authorization": f"Bearer {token}"})
+        elapsed = time.perf_counter() - start
+        assert response.status_code == 201, response.get_json()
+        print(f"{'bulk import':>12}: {args.import_lots} lots x {args.import_capacity} spots "
+              f"in {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
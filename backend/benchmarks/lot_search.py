@@ -0,0 +1,83 @@
+# backend/benchmarks/lot_search.py
+#
+# Measures GET /api/lots/search over 10k lots: a selective and a broad name
+# prefix, a pin code, a free-spot threshold and no filter at all, next to the
+# full GET /api/lots it replaces on the client.
+#   python -m backend.benchmarks.lot_search [--lots 10000]
+
+import argparse
+import random
+import time
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+
+WORDS = ('City', 'Center', 'Mall', 'Park', 'Station', 'Airport', 'Market', 'Plaza', 'Tower', 'Gate',
+         'North', 'South', 'East', 'West', 'Lake', 'Hill', 'River', 'Garden', 'Metro', 'Harbour')
+
+
+def seed(lot_count, seed=42):
+    """Bulk-inserts lots with two-word names, street addresses and random counters (no spots)."""
+    rng = random.Random(seed)
+    rows = []
+    for lot_id in range(1, lot_count + 1):
+        capacity = rng.randint(20, 200)
+        available = rng.randint(0, capacity)
+        rows.append({
+            "id": lot_id,
+            "name": f"{rng.choice(WORDS)} {rng.choice(WORDS)} {lot_id}",
+            "address": f"{rng.randint(1, 999)} {rng.choice(WORDS)} Road",
+            "pin_code": f"{600000 + rng.randint(0, 499)}",
+            "price_per_hour": float(rng.choice((10, 20, 30, 40))),
+            "capacity": capacity,
+            "available_spots": available,
+            "occupied_spots": capacity - available
+        })
+    db.session.execute(db.insert(ParkingLot), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the lot search endpoint.")
+    parser.add_argument('--lots', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_TYPE": "SimpleCache"})
+    with app.app_context():
+        db.create_all()
+        seed(args.lots)
+        token = create_access_token(identity="1", additional_claims={"role": "user"})
+
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {token}"}
+
+    def timed(path):
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            response = client.get(path, headers=headers)
+            body = response.get_data()
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, (path, response.status_code)
+        return min(timings) * 1000, len(body)
+
+    start = time.perf_counter()
+    client.get('/api/lots/search?q=lake', headers=headers)
+    print(f"{'prefix index build + first search':<40}{(time.perf_counter() - start) * 1000:8.2f} ms")
+    for label, path in (
+        ("selective prefix (q=lake hill)", '/api/lots/search?q=lake%20hill'),
+        ("broad prefix (q=c)", '/api/lots/search?q=c'),
+        ("pin code", '/api/lots/search?pin_code=600123'),
+        ("min_available=150", '/api/lots/search?min_available=150'),
+        ("no filter", '/api/lots/search'),
+        ("full list (GET /api/lots)", '/api/lots'),
+    ):
+        best, size = timed(path)
+        print(f"{label:<40}{best:8.2f} ms {size:>10} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# backend/benchmarks/release_contention.py
+#
+# Stress test for releasing: every user has an open booking and fires several
+# release requests for it at once. The script fails (exit code 1) unless each
+# booking is released exactly once, priced by the started hour, and the spot
+# statuses and lot counters still match.
+#   python -m backend.benchmarks.release_contention [--users 40] [--duplicates 4]
+#
+# Set BENCHMARK_DATABASE_URL to a scratch PostgreSQL database (its tables are
+# dropped) to run it against a real server; by default a temporary SQLite file
+# is used.
+
+import argparse
+import math
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.benchmarks import database_url
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, check_lot_counters
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent release stress test.")
+    parser.add_argument('--users', type=int, default=40)
+    parser.add_argument('--duplicates', type=int, default=4, help="Concurrent releases per booking.")
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url('release.db'), "RATE_LIMIT_ENABLED": False})
+    price = 15.0
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        lot = ParkingLot(name='Release', address='1 Exit Street', pin_code='600001', price_per_hour=price,
+                         capacity=args.users, available_spots=0, occupied_spots=args.users)
+        db.session.add(lot)
+        db.session.flush()
+        db.session.execute(db.insert(ParkingSpot), [
+            {"lot_id": lot.id, "spot_number": n, "status": 'Occupied'} for n in range(1, args.users + 1)
+        ])
+        users = [User(username=f'leaver{i}', email=f'leaver{i}@example.com', password_hash='x')
+                 for i in range(args.users)]
+        db.session.add_all(users)
+        db.session.flush()
+        spot_ids = [spot_id for spot_id, in db.session.query(ParkingSpot.id).order_by(ParkingSpot.id)]
+        # Parked for i hours and 90 seconds, so user i owes i + 1 started hours
+        now = datetime.utcnow()
+        db.session.add_all([
+            Booking(user_id=user.id, spot_id=spot_id, park_in_time=now - timedelta(hours=i, seconds=90))
+            for i, (user, spot_id) in enumerate(zip(users, spot_ids))
+        ])
+        db.session.commit()
+        expected_cost = {user.id: (i + 1) * price for i, user in enumerate(users)}
+        tokens = {user.id: create_access_token(identity=str(user.id), additional_claims={"role": "user"})
+                  for user in users}
+
+    outcomes = Counter()
+    released = Counter()
+    latencies = []
+    guard = threading.Lock()
+    barrier = threading.Barrier(args.users * args.duplicates)
+
+    def leaver(user_id):
+        client = app.test_client()
+        headers = {"Authorization": f"Bearer {tokens[user_id]}"}
+        barrier.wait()
+        start = time.perf_counter()
+        response = client.post('/api/booking/release', headers=headers)
+        elapsed = time.perf_counter() - start
+        with guard:
+            outcomes[response.status_code] += 1
+            latencies.append(elapsed)
+            if response.status_code == 200:
+                released[user_id] += 1
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=leaver, args=(user_id,))
+               for user_id in tokens for _ in range(args.duplicates)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        costs = dict(db.session.query(Booking.user_id, Booking.cost))
+        still_open = Booking.query.filter(Booking.park_out_time.is_(None)).count()
+        occupied = ParkingSpot.query.filter_by(status='Occupied').count()
+        drift = check_lot_counters()
+
+    problems = []
+    if any(count != 1 for count in released.values()) or len(released) != args.users:
+        problems.append(f"releases per booking: {dict(Counter(released.values()))}")
+    wrong_costs = {user_id: (costs[user_id], cost) for user_id, cost in expected_cost.items()
+                   if not math.isclose(costs[user_id] or 0, cost)}
+    if wrong_costs:
+        problems.append(f"wrong costs (got, expected): {wrong_costs}")
+    if still_open or occupied:
+        problems.append(f"{still_open} open bookings, {occupied} occupied spots left")
+    if drift:
+        problems.append(f"counter drift: {drift}")
+
+    print(f"{args.users} bookings x {args.duplicates} concurrent releases in {elapsed:.2f}s; "
+          f"median release {statistics.median(latencies) * 1000:.1f} ms")
+    print("Outcomes:", dict(outcomes))
+    if problems:
+        print("FAILED:", "; ".join(problems))
+        sys.exit(1)
+    print("OK: every booking was released and priced exactly once.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# backend/benchmarks/reminders.py
+#
+# Seeds many users (a quarter of them active in the last week) and times a
+# dry run of the daily reminder job.
+#   python -m backend.benchmarks.reminders [--users 1000000]
+
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from backend.app import create_app
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking
+from backend.tasks.reminders import send_daily_reminders
+
+
+def seed(user_count, batch=50000):
+    db.session.add(ParkingLot(id=1, name='Bench', address='1 Bench Street', pin_code='600001',
+                              price_per_hour=10.0, capacity=1))
+    db.session.add(ParkingSpot(id=1, lot_id=1, spot_number=1))
+    db.session.commit()
+
+    now = datetime.utcnow()
+    for first in range(1, user_count + 1, batch):
+        ids = range(first, min(first + batch, user_count + 1))
+        db.session.execute(db.insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com",
+             "password_hash": "x", "role": "user"} for i in ids
+        ])
+        # Closed bookings: every user parked 30 days ago, every fourth one yesterday too
+        db.session.execute(db.insert(Booking), [
+            {"user_id": i, "spot_id": 1, "park_in_time": now - timedelta(days=30 if i % 4 else 1),
+             "park_out_time": now, "cost": 10.0} for i in ids
+        ])
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the daily reminder job.")
+    parser.add_argument('--users', type=int, default=1000000)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://"})
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(args.users)
+        print(f"Seeded {args.users} users in {time.perf_counter() - start:.1f}s")
+
+        result = send_daily_reminders(dry_run=True)
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
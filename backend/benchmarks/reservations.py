@@ -0,0 +1,201 @@
+# backend/benchmarks/reservations.py
+#
+# Measures advance reservations on one lot holding tens of thousands of
+# windows: loading the lot's schedule, finding the first spot free for a
+# window from the schedule against the equivalent overlap query, and
+# POST /api/reserve/<lot_id> (a 409 there is a window with no spot left).
+# The schedule scans spots in order, so its worst case is a window no spot
+# is free for; that lookup is timed on its own against --target-ms.
+# Then many users reserve the same window at once, and the script fails
+# (exit code 1) if any two live reservations of a spot overlap, the
+# schedule and the query ever disagree, or the worst-case lookup misses
+# its target at p99.
+#   python -m backend.benchmarks.reservations [--spots 200] [--reservations 40000] [--target-ms 1]
+#
+# Set BENCHMARK_DATABASE_URL to a scratch PostgreSQL database (its tables are
+# dropped) to run it against a real server; by default a temporary SQLite file
+# is used.
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+from sqlalchemy.orm import aliased
+
+from backend.app import create_app
+from backend.benchmarks import database_url
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Reservation
+from backend.services.reservations import reservation_index
+
+
+def seed(spot_ids, count, user_id, days, rng):
+    """Bulk-inserts count reservations of up to 4 hours, evenly spread with random gaps on every spot."""
+    per_spot = count // len(spot_ids)
+    start = datetime.utcnow().replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    step = (days * 24 * 60) // per_spot
+    rows = []
+    for spot_id in spot_ids:
+        cursor = start + timedelta(minutes=rng.randint(0, step))
+        for _ in range(per_spot):
+            length = timedelta(minutes=rng.randint(1, min(4 * 60, step) // 15) * 15)
+            rows.append({"user_id": user_id, "spot_id": spot_id,
+                         "start_time": cursor, "end_time": cursor + length, "status": Reservation.RESERVED})
+            cursor += timedelta(minutes=step)
+    for i in range(0, len(rows), 5000):
+        db.session.execute(db.insert(Reservation), rows[i:i + 5000])
+    db.session.commit()
+    return len(rows), start
+
+
+def first_free_query(lot_id, start, end):
+    """The overlap query the schedule replaces."""
+    return db.session.query(ParkingSpot.id).filter(
+        ParkingSpot.lot_id == lot_id,
+        ~Reservation.holding(ParkingSpot.id, start, end)
+    ).order_by(ParkingSpot.spot_number).limit(1).scalar()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark advance reservations.")
+    parser.add_argument('--spots', type=int, default=200)
+    parser.add_argument('--reservations', type=int, default=40000, help="Reservations seeded on the lot.")
+    parser.add_argument('--days', type=int, default=30, help="Days ahead the seeded reservations span.")
+    parser.add_argument('--lookups', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=200, help="Sequential POST /api/reserve requests.")
+    parser.add_argument('--threads', type=int, default=32, help="Users reserving the same window at once.")
+    parser.add_argument('--target-ms', type=float, default=1.0,
+                        help="p99 latency target of a lookup that has to check every spot.")
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": database_url('reservations.db'), "RATE_LIMIT_ENABLED": False,
+                      "RESERVATION_MAX_DAYS_AHEAD": args.days + 2})
+    rng = random.Random(42)
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        lot = ParkingLot(name='Reserved', address='1 Ahead Street', pin_code='600001',
+                         price_per_hour=10.0, capacity=args.spots, available_spots=args.spots)
+        spare = ParkingLot(name='Contended', address='2 Ahead Street', pin_code='600001',
+                           price_per_hour=10.0, capacity=5, available_spots=5)
+        db.session.add_all([lot, spare])
+        db.session.flush()
+        db.session.execute(db.insert(ParkingSpot), [
+            {"lot_id": lot.id, "spot_number": n} for n in range(1, args.spots + 1)
+        ] + [{"lot_id": spare.id, "spot_number": n} for n in range(1, 6)])
+        fleet = User(username='fleet', email='fleet@example.com', password_hash='x')
+        users = [User(username=f'planner{i}', email=f'planner{i}@example.com', password_hash='x')
+                 for i in range(max(args.threads, args.requests))]
+        db.session.add_all([fleet] + users)
+        db.session.flush()
+        lot_id, spare_id = lot.id, spare.id
+        spot_ids = [spot_id for spot_id, in db.session.query(ParkingSpot.id).filter_by(lot_id=lot_id)]
+        start = time.perf_counter()
+        seeded, horizon = seed(spot_ids, args.reservations, fleet.id, args.days, rng)
+        print(f"Seeded {seeded} reservations on {args.spots} spots in {time.perf_counter() - start:.1f}s")
+        tokens = [create_access_token(identity=str(u.id), additional_claims={"role": "user"}) for u in users]
+
+        reservation_index.invalidate(lot_id)
+        _, load_ms = timed(reservation_index.first_free, lot_id, horizon, horizon + timedelta(hours=1))
+        print(f"Schedule load (first lookup)    {load_ms:8.1f} ms")
+
+        windows = []
+        for _ in range(args.lookups):
+            start = horizon + timedelta(minutes=15 * rng.randint(0, args.days * 24 * 4))
+            windows.append((start, start + timedelta(minutes=15 * rng.randint(1, 16))))
+        index_ms, query_ms, mismatches = [], [], 0
+        for start, end in windows:
+            from_index, elapsed = timed(reservation_index.first_free, lot_id, start, end)
+            index_ms.append(elapsed)
+            from_query, elapsed = timed(first_free_query, lot_id, start, end)
+            query_ms.append(elapsed)
+            mismatches += from_index != from_query
+        print(f"First free spot, schedule       {statistics.median(index_ms):8.3f} ms median  "
+              f"{max(index_ms):8.3f} ms max")
+        print(f"First free spot, overlap query  {statistics.median(query_ms):8.3f} ms median  "
+              f"{max(query_ms):8.3f} ms max")
+
+        # Worst case for the scan: every spot has a window inside the seeded span, so none is free for all of it
+        span = (horizon, horizon + timedelta(days=args.days))
+        full_scan = first_free_query(lot_id, *span)
+        scan_ms = sorted(timed(reservation_index.first_free, lot_id, *span)[1] for _ in range(args.lookups))
+        scan_p99 = scan_ms[max(0, round(len(scan_ms) * 0.99) - 1)]
+        print(f"First free spot, every spot     {statistics.median(scan_ms):8.3f} ms median  "
+              f"{scan_p99:8.3f} ms p99")
+
+    client = app.test_client()
+    latencies, outcomes = [], Counter()
+    for i in range(args.requests):
+        start, end = windows[i % len(windows)]
+        response, elapsed = timed(lambda: client.post(
+            f'/api/reserve/{lot_id}', json={"start_time": start.isoformat(), "end_time": end.isoformat()},
+            headers={"Authorization": f"Bearer {tokens[i]}"}
+        ))
+        latencies.append(elapsed)
+        outcomes[response.status_code] += 1
+    print(f"POST /api/reserve               {statistics.median(latencies):8.2f} ms median  "
+          f"{args.requests * 1000 / sum(latencies):8.1f} requests/s  {dict(outcomes)}")
+
+    # Everybody wants the same two hours of a five-spot lot
+    contended = Counter()
+    guard = threading.Lock()
+    barrier = threading.Barrier(args.threads)
+    window = {"start_time": (horizon + timedelta(days=1)).isoformat(),
+              "end_time": (horizon + timedelta(days=1, hours=2)).isoformat()}
+
+    def planner(token):
+        client = app.test_client()
+        barrier.wait()
+        response = client.post(f'/api/reserve/{spare_id}', json=window,
+                               headers={"Authorization": f"Bearer {token}"})
+        with guard:
+            contended[response.status_code] += 1
+
+    threads = [threading.Thread(target=planner, args=(token,)) for token in tokens[:args.threads]]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"{args.threads} users reserving one window of 5 spots: {dict(contended)}")
+
+    with app.app_context():
+        other = aliased(Reservation)
+        overlaps = db.session.query(db.func.count()).select_from(Reservation).join(
+            other, db.and_(other.spot_id == Reservation.spot_id, other.id > Reservation.id)
+        ).filter(
+            Reservation.live(), other.live(),
+            other.start_time < Reservation.end_time, other.end_time > Reservation.start_time
+        ).scalar()
+
+    problems = []
+    if overlaps:
+        problems.append(f"{overlaps} overlapping reservation pairs")
+    if mismatches:
+        problems.append(f"schedule and query disagreed on {mismatches} windows")
+    if full_scan is not None:
+        problems.append(f"spot {full_scan} is free for the whole span, so the worst case was not measured")
+    if scan_p99 > args.target_ms:
+        problems.append(f"a lookup checking every spot took {scan_p99:.3f} ms at p99; the target is {args.target_ms} ms")
+    if contended[201] > 5 or contended[201] == 0:
+        problems.append(f"{contended[201]} reservations of a 5-spot window")
+    if problems:
+        print("FAILED:", "; ".join(problems))
+        sys.exit(1)
+    print(f"OK: no spot was reserved twice for overlapping windows, and a lookup checking every spot "
+          f"stayed under {args.target_ms} ms at p99.")
+
+
+if __name__ == '__main__':
+    main()
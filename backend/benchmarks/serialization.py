@@ -0,0 +1,80 @@
+# backend/benchmarks/serialization.py
+#
+# Measures the JSON layer: the 10k-row spot status and booking history lists
+# encoded with orjson and with the standard library fallback, and the lot list
+# cold, from the pre-encoded cache, and as a 304 revalidation.
+#   python -m backend.benchmarks.serialization [--lots 50] [--spots 200]
+
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token
+
+from backend.app import create_app
+from backend.benchmarks.dataset import seed_dataset
+from backend.models.users import db
+from backend.services import lot_list, serialization
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JSON encoding of the list routes.")
+    parser.add_argument('--lots', type=int, default=50)
+    parser.add_argument('--spots', type=int, default=200, help="Spots per lot.")
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app({"SQLALCHEMY_DATABASE_URI": "sqlite://", "CACHE_TYPE": "SimpleCache"})
+    with app.app_context():
+        db.create_all()
+        dataset = seed_dataset(args.lots, args.spots, args.users, years=1.0, bookings_per_user_per_year=20)
+        admin = {"Authorization": "Bearer " + create_access_token(
+            identity="1", additional_claims={"role": "admin"})}
+    client = app.test_client()
+    print(f"{dataset['spots']} spots, {dataset['bookings']} bookings, {args.lots} lots")
+
+    def get(path, headers=admin, status=200):
+        response = client.get(path, headers=headers)
+        response.get_data()
+        assert response.status_code == status, (path, response.status_code)
+        return response
+
+    installed = serialization.orjson
+    for path in ('/admin/spots/status', '/admin/bookings?limit=500'):
+        results = []
+        for label, backend in (("json", None), ("orjson", installed)):
+            if label == "orjson" and installed is None:
+                continue
+            serialization.orjson = backend
+            results.append(f"{label} {best_of(args.repeat, lambda: get(path)):8.1f} ms")
+        serialization.orjson = installed
+        print(f"{path:<28}" + "   ".join(results))
+
+    def cold():
+        with app.app_context():
+            lot_list.invalidate_lot_list(catalog=True)
+        get('/admin/lots')
+
+    def counters_only():
+        with app.app_context():
+            lot_list.invalidate_lot_list()
+        get('/admin/lots')
+
+    etag = get('/admin/lots').headers['ETag']
+    print(f"{'/admin/lots':<28}cold {best_of(args.repeat, cold):8.2f} ms   "
+          f"after booking {best_of(args.repeat, counters_only):8.2f} ms   "
+          f"cached {best_of(args.repeat, lambda: get('/admin/lots')):8.2f} ms   "
+          f"304 {best_of(args.repeat, lambda: get('/admin/lots', {**admin, 'If-None-Match': etag}, 304)):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+# backend/benchmarks/smtp_delivery.py
+#
+# Compares opening an SMTP connection per message (the old send_email) with
+# the pooled delivery used by the monthly reports. Runs against a local
+# stand-in server in the spirit of aiosmtpd's debugging server; --handshake-ms
+# adds a delay to the greeting to stand in for TLS setup and login on a real relay.
+#   python -m backend.benchmarks.smtp_delivery [--messages 500] [--workers 4]
+
+import argparse
+import smtplib
+import socketserver
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.tasks.email_utils import SMTPConnectionPool, build_message
+
+
+class StandInSMTPHandler(socketserver.StreamRequestHandler):
+    """Accepts every message and discards it."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        time.sleep(self.server.handshake_delay)
+        self.reply("220 stand-in ESMTP")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command in (b"EHLO", b"HELO"):
+                self.reply("250 stand-in")
+            elif command == b"DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                self.server.received += 1
+                self.reply("250 OK")
+            elif command == b"QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("250 OK")
+
+
+class StandInSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay):
+        super().__init__(("127.0.0.1", 0), StandInSMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.received = 0
+
+
+def per_message(port):
+    def send(msg):
+        with smtplib.SMTP("127.0.0.1", port) as smtp:
+            smtp.send_message(msg)
+    return send
+
+
+def pooled(pool):
+    def send(batch):
+        pool.send_messages(batch)
+    return send
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SMTP delivery.")
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=50)
+    parser.add_argument('--handshake-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    server = StandInSMTPServer(args.handshake_ms / 1000)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    messages = [
+        build_message(f"user{i}@example.com", "Your Monthly Parking Report", "<p>Report</p>")
+        for i in range(args.messages)
+    ]
+    batches = [messages[i:i + args.batch_size] for i in range(0, len(messages), args.batch_size)]
+    pool = SMTPConnectionPool("127.0.0.1", port, use_tls=False, size=args.workers)
+
+    for label, fn, items in (
+        ("connection per message", per_message(port), messages),
+        ("pooled connections", pooled(pool), batches),
+    ):
+        server.received = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            list(executor.map(fn, items))
+        elapsed = time.perf_counter() - start
+        print(f"{label:<24} {server.received:>6} messages in {elapsed:6.2f}s "
+              f"({server.received / elapsed:,.0f} msg/s)")
+
+    pool.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,11 @@
 from backend.app import create_app
 from backend.celery_app import celery # Import the instance from our new file
 from celery.schedules import crontab
+# Register the scheduled tasks with the worker
+import backend.tasks.reminders
+import backend.tasks.reports
+import backend.tasks.archive
+import backend.tasks.rollups
 
 # Create the Flask app to get its config
 flask_app = create_app()
@@ -23,6 +28,16 @@ celery.conf.beat_schedule = {
         'task': 'tasks.reports.send_monthly_reports',
         'schedule': crontab(day_of_month=1, hour=0, minute=0),
     },
+    # Executes daily at 3 AM, outside peak booking hours
+    'archive-completed-bookings': {
+        'task': 'tasks.archive.archive_completed_bookings',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    # Executes every 15 minutes; each run only adds the hours completed since the last
+    'update-usage-rollups': {
+        'task': 'tasks.rollups.update_usage_rollups',
+        'schedule': crontab(minute='*/15'),
+    },
 }
 
 # Add the application context to the tasks
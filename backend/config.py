@@ -16,10 +16,77 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///../instance/parking.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False  
 
+    # Connection pool for server databases (PostgreSQL); SQLite keeps SQLAlchemy's defaults
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 10))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 20))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))  # seconds; below server/proxy idle timeouts
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+    # Run on every SQLite connection: WAL lets readers and the writer proceed together,
+    # busy_timeout (ms) waits for a lock instead of raising "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': os.environ.get('SQLITE_JOURNAL_MODE', 'WAL'),
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    }
+
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
     
+    # bcrypt work factor; existing hashes are upgraded on the next successful login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    # Password hashing admission control: pool threads per process and hashes allowed in flight
+    # before 503s (the request still waits for its own hash)
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 0)) or None
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 10))
+
+    # /metrics is open unless METRICS_TOKEN is set (then it needs 'Authorization: Bearer <token>')
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Honour the X-Profile request header (queries / cprofile); leave off in production
+    REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING', 'false').lower() in ('1', 'true', 'yes')
+    # Raise instead of only counting when a route exceeds its query_budget (always on when TESTING)
+    QUERY_BUDGET_STRICT = os.environ.get('QUERY_BUDGET_STRICT', 'false').lower() in ('1', 'true', 'yes')
+
     # Cache configuration
-    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache') # Use 'RedisCache' for production
+    # Use 'RedisCache' for production: with several workers the cached responses and the
+    # version tokens that retire them (and the in-memory indexes) must be shared
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
     CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/1')
     CACHE_DEFAULT_TIMEOUT = 300 # Default cache expiry in seconds (5 minutes)
+
+    # Rate limiting: 'local' buckets per process, 'redis' to share them via CACHE_REDIS_URL.
+    # Budgets are 'N/second|minute|hour|day': bursts of up to N, refilled at N per period.
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'local')
+    RATE_LIMIT_ENABLED = os.environ.get('RATE_LIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    RATE_LIMITS = {
+        'login': os.environ.get('RATE_LIMIT_LOGIN', '20/minute'),                  # per client IP
+        'login_account': os.environ.get('RATE_LIMIT_LOGIN_ACCOUNT', '10/minute'),  # per email tried
+        'register': os.environ.get('RATE_LIMIT_REGISTER', '5/minute'),             # per client IP
+        'book': os.environ.get('RATE_LIMIT_BOOK', '30/minute'),                    # per user
+    }
+
+    # Spot allocation: 'local' keeps free lists per process, 'redis' shares them via CACHE_REDIS_URL
+    SPOT_ALLOCATOR_BACKEND = os.environ.get('SPOT_ALLOCATOR_BACKEND', 'local')
+    # Active-booking index: 'local' per process (follows other workers via a shared CACHE_TYPE), 'redis' shared via CACHE_REDIS_URL
+    ACTIVE_BOOKINGS_BACKEND = os.environ.get('ACTIVE_BOOKINGS_BACKEND', 'local')
+    # A stale active-booking map is reloaded in the background at most this often; lookups query meanwhile
+    ACTIVE_BOOKINGS_REBUILD_SECONDS = float(os.environ.get('ACTIVE_BOOKINGS_REBUILD_SECONDS', 5))
+    # Advance reservations: walk-ins skip a spot this long before its reservation starts,
+    # which is also how early the reservation can be checked in to
+    RESERVATION_HOLD_MINUTES = int(os.environ.get('RESERVATION_HOLD_MINUTES', 15))
+    RESERVATION_MAX_HOURS = int(os.environ.get('RESERVATION_MAX_HOURS', 24))  # longest window
+    RESERVATION_MAX_DAYS_AHEAD = int(os.environ.get('RESERVATION_MAX_DAYS_AHEAD', 30))  # latest start
+
+    # Live occupancy events: 'local' for a single process, 'redis' to fan out across workers
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND', 'local')
+    # Tokens come from the Authorization header only; the event stream alone also
+    # accepts ?jwt=, since EventSource cannot send headers
+    JWT_TOKEN_LOCATION = ['headers']
+    # Verified tokens remembered per process (LRU, entries expire with the token)
+    JWT_PRINCIPAL_CACHE_SIZE = int(os.environ.get('JWT_PRINCIPAL_CACHE_SIZE', 10000))
+
+    # CSV exports are written here (default: instance/exports); workers and web must share it
+    EXPORT_DIR = os.environ.get('EXPORT_DIR')
+    EXPORT_GZIP = os.environ.get('EXPORT_GZIP', 'false').lower() in ('1', 'true', 'yes')
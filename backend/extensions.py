@@ -0,0 +1,6 @@
+# backend/extensions.py
+
+from flask_caching import Cache
+
+# Global cache object, initialized in create_app (Redis or in-process, see Config.CACHE_TYPE)
+cache = Cache()
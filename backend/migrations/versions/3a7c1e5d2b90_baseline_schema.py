@@ -0,0 +1,65 @@
+"""baseline schema
+
+Revision ID: 3a7c1e5d2b90
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c1e5d2b90'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=80), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password_hash', sa.String(length=128), nullable=False),
+    sa.Column('role', sa.String(length=20), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    op.create_table('parking_lots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('address', sa.Text(), nullable=False),
+    sa.Column('pin_code', sa.String(length=10), nullable=False),
+    sa.Column('price_per_hour', sa.Float(), nullable=False),
+    sa.Column('capacity', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('parking_spots',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('spot_number', sa.Integer(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('lot_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['lot_id'], ['parking_lots.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('bookings',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('spot_id', sa.Integer(), nullable=False),
+    sa.Column('park_in_time', sa.DateTime(), nullable=False),
+    sa.Column('park_out_time', sa.DateTime(), nullable=True),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['spot_id'], ['parking_spots.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('bookings')
+    op.drop_table('parking_spots')
+    op.drop_table('parking_lots')
+    op.drop_table('users')
@@ -0,0 +1,39 @@
+"""denormalized available/occupied spot counters on parking_lots
+
+Revision ID: 8d2f4b6a1c37
+Revises: 3a7c1e5d2b90
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4b6a1c37'
+down_revision = '3a7c1e5d2b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('available_spots', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('occupied_spots', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill from the spots that already exist
+    op.execute("""
+        UPDATE parking_lots SET
+            available_spots = (SELECT COUNT(*) FROM parking_spots
+                               WHERE parking_spots.lot_id = parking_lots.id
+                               AND parking_spots.status = 'Available'),
+            occupied_spots = (SELECT COUNT(*) FROM parking_spots
+                              WHERE parking_spots.lot_id = parking_lots.id
+                              AND parking_spots.status = 'Occupied')
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.drop_column('occupied_spots')
+        batch_op.drop_column('available_spots')
@@ -0,0 +1,28 @@
+"""indexes for lot search by pin code and availability
+
+Revision ID: a9d3e7c1f5b4
+Revises: f4c2a8e6b173
+Create Date: 2026-10-18 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9d3e7c1f5b4'
+down_revision = 'f4c2a8e6b173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.create_index('ix_parking_lots_pin_code_available_spots', ['pin_code', 'available_spots'], unique=False)
+        batch_op.create_index('ix_parking_lots_available_spots_price_per_hour', ['available_spots', 'price_per_hour'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('parking_lots', schema=None) as batch_op:
+        batch_op.drop_index('ix_parking_lots_available_spots_price_per_hour')
+        batch_op.drop_index('ix_parking_lots_pin_code_available_spots')
@@ -0,0 +1,75 @@
+"""advance reservations with non-overlapping windows per spot
+
+Revision ID: b7e2c9d4a1f6
+Revises: a9d3e7c1f5b4
+Create Date: 2026-10-18 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e2c9d4a1f6'
+down_revision = 'a9d3e7c1f5b4'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with Reservation and RESERVATION_OVERLAP_TRIGGERS in backend/models/parking.py
+SQLITE_TRIGGER = """
+CREATE TRIGGER reservations_no_overlap_{name}
+BEFORE {operation} ON reservations
+WHEN NEW.status <> 'Cancelled' AND EXISTS (
+    SELECT 1 FROM reservations
+    WHERE spot_id = NEW.spot_id AND id IS NOT NEW.id AND status <> 'Cancelled'
+      AND start_time < NEW.end_time AND end_time > NEW.start_time
+)
+BEGIN
+    SELECT RAISE(ABORT, 'reservation overlaps another reservation of the spot');
+END
+"""
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+
+    op.create_table('reservations',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('spot_id', sa.Integer(), nullable=False),
+    sa.Column('start_time', sa.DateTime(), nullable=False),
+    sa.Column('end_time', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.CheckConstraint('end_time > start_time', name='ck_reservations_window'),
+    sa.ForeignKeyConstraint(['spot_id'], ['parking_spots.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_reservations_spot_id_end_time', ['spot_id', 'end_time'], unique=False)
+        batch_op.create_index('ix_reservations_user_id_start_time', ['user_id', 'start_time'], unique=False)
+
+    if dialect == 'postgresql':
+        op.execute(
+            "ALTER TABLE reservations ADD CONSTRAINT ex_reservations_spot_window "
+            "EXCLUDE USING gist (spot_id WITH =, tsrange(start_time, end_time) WITH &&) "
+            "WHERE (status <> 'Cancelled')"
+        )
+    elif dialect == 'sqlite':
+        for operation in ('INSERT', 'UPDATE'):
+            op.execute(SQLITE_TRIGGER.format(name=operation.lower(), operation=operation))
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS reservations_no_overlap_update")
+        op.execute("DROP TRIGGER IF EXISTS reservations_no_overlap_insert")
+
+    with op.batch_alter_table('reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_reservations_user_id_start_time')
+        batch_op.drop_index('ix_reservations_spot_id_end_time')
+
+    op.drop_table('reservations')
@@ -0,0 +1,59 @@
+"""indexes for the hot booking and spot predicates
+
+Creating the two unique partial indexes fails if a user or a spot already has
+more than one open booking; close the duplicates before upgrading.
+
+Revision ID: c5e9a0f3d846
+Revises: 8d2f4b6a1c37
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5e9a0f3d846'
+down_revision = '8d2f4b6a1c37'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text('park_out_time IS NULL')
+
+
+def _supports_partial_indexes():
+    return op.get_bind().dialect.name in ('sqlite', 'postgresql')
+
+
+def upgrade():
+    with op.batch_alter_table('parking_spots', schema=None) as batch_op:
+        batch_op.create_index('ix_parking_spots_lot_id_status_spot_number', ['lot_id', 'status', 'spot_number'], unique=False)
+        batch_op.create_index('ix_parking_spots_lot_id_spot_number', ['lot_id', 'spot_number'], unique=False)
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_park_in_time_id', ['park_in_time', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_user_id_park_in_time_id', ['user_id', 'park_in_time', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_user_id_park_out_time', ['user_id', 'park_out_time'], unique=False)
+        batch_op.create_index('ix_bookings_park_out_time', ['park_out_time'], unique=False)
+
+    if _supports_partial_indexes():
+        op.create_index('uq_bookings_active_user_id', 'bookings', ['user_id'], unique=True,
+                        sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+        op.create_index('uq_bookings_active_spot_id', 'bookings', ['spot_id'], unique=True,
+                        sqlite_where=ACTIVE, postgresql_where=ACTIVE)
+
+
+def downgrade():
+    if _supports_partial_indexes():
+        op.drop_index('uq_bookings_active_spot_id', table_name='bookings')
+        op.drop_index('uq_bookings_active_user_id', table_name='bookings')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_park_out_time')
+        batch_op.drop_index('ix_bookings_user_id_park_out_time')
+        batch_op.drop_index('ix_bookings_user_id_park_in_time_id')
+        batch_op.drop_index('ix_bookings_park_in_time_id')
+
+    with op.batch_alter_table('parking_spots', schema=None) as batch_op:
+        batch_op.drop_index('ix_parking_spots_lot_id_spot_number')
+        batch_op.drop_index('ix_parking_spots_lot_id_status_spot_number')
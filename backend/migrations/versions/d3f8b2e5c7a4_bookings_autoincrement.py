@@ -0,0 +1,49 @@
+"""never reuse booking ids once they are archived or deleted
+
+Revision ID: d3f8b2e5c7a4
+Revises: b7e2c9d4a1f6
+Create Date: 2026-10-18 21:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8b2e5c7a4'
+down_revision = 'b7e2c9d4a1f6'
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text('park_out_time IS NULL')
+
+
+def _recreate_bookings(autoincrement):
+    # Only SQLite reuses ids (max(id) + 1 without AUTOINCREMENT); server sequences never do.
+    # The partial unique indexes are rebuilt explicitly so the copy keeps their WHERE clause.
+    op.drop_index('uq_bookings_active_spot_id', table_name='bookings')
+    op.drop_index('uq_bookings_active_user_id', table_name='bookings')
+    with op.batch_alter_table('bookings', schema=None, recreate='always',
+                              table_kwargs={'sqlite_autoincrement': autoincrement}):
+        pass
+    op.create_index('uq_bookings_active_user_id', 'bookings', ['user_id'], unique=True, sqlite_where=ACTIVE)
+    op.create_index('uq_bookings_active_spot_id', 'bookings', ['spot_id'], unique=True, sqlite_where=ACTIVE)
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recreate_bookings(True)
+    # Start after every id ever used, archived ones included
+    op.execute("DELETE FROM sqlite_sequence WHERE name = 'bookings'")
+    op.execute("""
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'bookings', MAX(COALESCE((SELECT MAX(id) FROM bookings), 0),
+                               COALESCE((SELECT MAX(id) FROM bookings_archive), 0))
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    _recreate_bookings(False)
@@ -0,0 +1,45 @@
+"""archive table for completed bookings
+
+Revision ID: e1b7d4a9f062
+Revises: c5e9a0f3d846
+Create Date: 2026-10-18 14:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b7d4a9f062'
+down_revision = 'c5e9a0f3d846'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('bookings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('spot_id', sa.Integer(), nullable=False),
+    sa.Column('park_in_time', sa.DateTime(), nullable=False),
+    sa.Column('park_out_time', sa.DateTime(), nullable=False),
+    sa.Column('cost', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['spot_id'], ['parking_spots.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.create_index('ix_bookings_archive_park_in_time_id', ['park_in_time', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_archive_user_id_park_in_time_id', ['user_id', 'park_in_time', 'id'], unique=False)
+        batch_op.create_index('ix_bookings_archive_park_out_time', ['park_out_time'], unique=False)
+        batch_op.create_index('ix_bookings_archive_spot_id', ['spot_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.drop_index('ix_bookings_archive_spot_id')
+        batch_op.drop_index('ix_bookings_archive_park_out_time')
+        batch_op.drop_index('ix_bookings_archive_user_id_park_in_time_id')
+        batch_op.drop_index('ix_bookings_archive_park_in_time_id')
+
+    op.drop_table('bookings_archive')
@@ -0,0 +1,48 @@
+"""hourly and daily lot usage rollups
+
+Revision ID: f4c2a8e6b173
+Revises: e1b7d4a9f062
+Create Date: 2026-10-18 16:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c2a8e6b173'
+down_revision = 'e1b7d4a9f062'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('lot_usage_hourly', 'lot_usage_daily'):
+        op.create_table(table,
+        sa.Column('lot_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('bookings_started', sa.Integer(), nullable=False),
+        sa.Column('bookings_completed', sa.Integer(), nullable=False),
+        sa.Column('occupied_minutes', sa.Float(), nullable=False),
+        sa.Column('revenue', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['lot_id'], ['parking_lots.id'], ),
+        sa.PrimaryKeyConstraint('lot_id', 'bucket')
+        )
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(f'ix_{table}_bucket', ['bucket'], unique=False)
+
+    op.create_table('rollup_watermarks',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('watermark', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermarks')
+
+    for table in ('lot_usage_daily', 'lot_usage_hourly'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_bucket')
+
+        op.drop_table(table)
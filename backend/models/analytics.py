@@ -0,0 +1,53 @@
+# backend/models/analytics.py
+
+from backend.models.users import db
+
+
+class LotUsageHourly(db.Model):
+    """
+    One lot's usage in one UTC hour: bookings started and completed, minutes
+    its spots were occupied, and revenue of the bookings completed. Appended
+    by the rollup job (backend/tasks/rollups.py), never recomputed.
+    """
+    __tablename__ = 'lot_usage_hourly'
+    __table_args__ = (
+        # Time series across all lots; per-lot series use the primary key.
+        db.Index('ix_lot_usage_hourly_bucket', 'bucket'),
+    )
+
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # start of the hour
+    bookings_started = db.Column(db.Integer, nullable=False, default=0)
+    bookings_completed = db.Column(db.Integer, nullable=False, default=0)
+    occupied_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class LotUsageDaily(db.Model):
+    """The same figures per UTC day, kept as the running sum of the day's hours."""
+    __tablename__ = 'lot_usage_daily'
+    __table_args__ = (
+        db.Index('ix_lot_usage_daily_bucket', 'bucket'),
+    )
+
+    lot_id = db.Column(db.Integer, db.ForeignKey('parking_lots.id'), primary_key=True)
+    bucket = db.Column(db.DateTime, primary_key=True)  # midnight starting the day
+    bookings_started = db.Column(db.Integer, nullable=False, default=0)
+    bookings_completed = db.Column(db.Integer, nullable=False, default=0)
+    occupied_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class RollupWatermark(db.Model):
+    """How far (exclusive, a whole hour) a rollup has consumed the bookings."""
+    __tablename__ = 'rollup_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    watermark = db.Column(db.DateTime, nullable=False)
+
+
+# Watermark name of the lot usage rollups.
+LOT_USAGE_ROLLUP = 'lot_usage'
+
+# Figures stored per bucket, in order.
+USAGE_COLUMNS = ('bookings_started', 'bookings_completed', 'occupied_minutes', 'revenue')
@@ -2,10 +2,45 @@
 
 from backend.models.users import db
 from datetime import datetime
+from sqlalchemy import Column, event, func, case, text, literal
+from sqlalchemy.dialects.postgresql import ExcludeConstraint
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.sql.visitors import replacement_traverse
+
+
+class billed_hours(FunctionElement):
+    """
+    billed_hours(start, end): the hours between two timestamps, rounded up to
+    the next whole hour, so a booking can be priced inside an UPDATE.
+    """
+    type = db.Integer()
+    name = 'billed_hours'
+    inherit_cache = True
+
+
+@compiles(billed_hours)
+def _billed_hours_postgresql(element, compiler, **kw):
+    start, end = (compiler.process(arg, **kw) for arg in element.clauses)
+    return f"CAST(CEIL(EXTRACT(EPOCH FROM ({end} - {start})) / 3600.0) AS INTEGER)"
+
+
+@compiles(billed_hours, 'sqlite')
+def _billed_hours_sqlite(element, compiler, **kw):
+    # SQLite has no CEIL unless built with its math functions: round the
+    # duration to whole milliseconds and round up with integer division.
+    start, end = (compiler.process(arg, **kw) for arg in element.clauses)
+    millis = f"CAST(ROUND((julianday({end}) - julianday({start})) * 86400000.0) AS INTEGER)"
+    return f"(({millis} + 3599999) / 3600000)"
 
 class ParkingLot(db.Model):
     """Represents a parking lot with multiple spots."""
     __tablename__ = 'parking_lots'
+    __table_args__ = (
+        # Lot search: by pin code, and in availability then price order.
+        db.Index('ix_parking_lots_pin_code_available_spots', 'pin_code', 'available_spots'),
+        db.Index('ix_parking_lots_available_spots_price_per_hour', 'available_spots', 'price_per_hour'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
@@ -13,9 +48,54 @@ class ParkingLot(db.Model):
     pin_code = db.Column(db.String(10), nullable=False)
     price_per_hour = db.Column(db.Float, nullable=False)
     capacity = db.Column(db.Integer, nullable=False)
+    # Denormalized spot counters, kept in step with parking_spots by the
+    # booking/release and lot management routes so listing lots needs no COUNT.
+    available_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    occupied_spots = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     spots = db.relationship('ParkingSpot', back_populates='lot', lazy='dynamic', cascade="all, delete-orphan")
 
+    @staticmethod
+    def adjust_counters(lot_id, available=0, occupied=0):
+        """Atomically shifts a lot's spot counters inside the current transaction."""
+        db.session.execute(
+            db.update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(
+                available_spots=ParkingLot.available_spots + available,
+                occupied_spots=ParkingLot.occupied_spots + occupied
+            )
+        )
+
+    @staticmethod
+    def list_query():
+        """Projects the columns row_to_dict needs, in id order, without loading ORM objects."""
+        return db.session.query(
+            ParkingLot.id,
+            ParkingLot.name,
+            ParkingLot.address,
+            ParkingLot.pin_code,
+            ParkingLot.price_per_hour,
+            ParkingLot.capacity,
+            ParkingLot.available_spots,
+            ParkingLot.occupied_spots
+        ).order_by(ParkingLot.id)
+
+    @staticmethod
+    def row_to_dict(row):
+        """Shapes a list_query row exactly like to_dict()."""
+        lot_id, name, address, pin_code, price_per_hour, capacity, available, occupied = row
+        return {
+            "id": lot_id,
+            "name": name,
+            "address": address,
+            "pin_code": pin_code,
+            "price_per_hour": price_per_hour,
+            "capacity": capacity,
+            "available_spots": available,
+            "occupied_spots": occupied
+        }
+
     def to_dict(self):
         """Serializes the object to a dictionary."""
         return {
@@ -25,12 +105,19 @@ class ParkingLot(db.Model):
             "pin_code": self.pin_code,
             "price_per_hour": self.price_per_hour,
             "capacity": self.capacity,
-            "available_spots": self.spots.filter_by(status='Available').count()
+            "available_spots": self.available_spots,
+            "occupied_spots": self.occupied_spots
         }
 
 class ParkingSpot(db.Model):
     """Represents a single parking spot within a lot."""
     __tablename__ = 'parking_spots'
+    __table_args__ = (
+        # Free-spot lookups (allocator, dashboard) filter on lot and status.
+        db.Index('ix_parking_spots_lot_id_status_spot_number', 'lot_id', 'status', 'spot_number'),
+        # The spot status listing is ordered and paged by lot, then spot number.
+        db.Index('ix_parking_spots_lot_id_spot_number', 'lot_id', 'spot_number'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     spot_number = db.Column(db.Integer, nullable=False)
@@ -40,23 +127,32 @@ class ParkingSpot(db.Model):
     lot = db.relationship('ParkingLot', back_populates='spots')
     bookings = db.relationship('Booking', back_populates='spot', lazy='dynamic', cascade="all, delete-orphan")
 
+    @staticmethod
+    def provision(lot_id, first_number, count):
+        """Inserts `count` available spots numbered from first_number with one executemany."""
+        if count > 0:
+            db.session.execute(db.insert(ParkingSpot), [
+                {"lot_id": lot_id, "spot_number": number, "status": 'Available'}
+                for number in range(first_number, first_number + count)
+            ])
+
     def to_dict(self):
         """Serializes the object to a dictionary."""
         current_booking_info = {}
         occupant_username = None  # Initialize occupant username
 
         if self.status == 'Occupied':
-            # Find the active booking for this spot
-            booking = self.bookings.filter_by(park_out_time=None).first()
-            if booking:
+            # The active booking and its user come from the active-booking
+            # index rather than two queries (imported here: services import models)
+            from backend.services.active_bookings import active_bookings
+            occupant = active_bookings.occupant(self.id)
+            if occupant:
                 current_booking_info = {
-                    "booking_id": booking.id,
-                    "user_id": booking.user_id,
-                    "park_in_time": booking.park_in_time.isoformat()
+                    "booking_id": occupant["booking_id"],
+                    "user_id": occupant["user_id"],
+                    "park_in_time": occupant["park_in_time"]
                 }
-                # If a booking exists, get the user's username
-                if booking.user:
-                    occupant_username = booking.user.username
+                occupant_username = occupant["username"]
 
         return {
             "id": self.id,
@@ -73,6 +169,33 @@ class ParkingSpot(db.Model):
 class Booking(db.Model):
     """Represents a reservation of a parking spot by a user."""
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # Keyset pagination of the history, overall and per user.
+        db.Index('ix_bookings_park_in_time_id', 'park_in_time', 'id'),
+        db.Index('ix_bookings_user_id_park_in_time_id', 'user_id', 'park_in_time', 'id'),
+        # Active-booking lookups (book, active, release) and month-range reports.
+        db.Index('ix_bookings_user_id_park_out_time', 'user_id', 'park_out_time'),
+        db.Index('ix_bookings_park_out_time', 'park_out_time'),
+        # Partial indexes over open bookings only, which also guarantee that a
+        # user or a spot never has more than one of them. Backends without
+        # partial index support skip these.
+        db.Index(
+            'uq_bookings_active_user_id', 'user_id', unique=True,
+            sqlite_where=text('park_out_time IS NULL'),
+            postgresql_where=text('park_out_time IS NULL')
+        ).ddl_if(dialect=('sqlite', 'postgresql')),
+        db.Index(
+            'uq_bookings_active_spot_id', 'spot_id', unique=True,
+            sqlite_where=text('park_out_time IS NULL'),
+            postgresql_where=text('park_out_time IS NULL')
+        ).ddl_if(dialect=('sqlite', 'postgresql')),
+        # Ids are never handed out twice, even after the newest bookings were
+        # archived or deleted; bookings_archive keeps the original ids.
+        {'sqlite_autoincrement': True},
+    )
+
+    # Default number of rows per history page.
+    HISTORY_PAGE_SIZE = 50
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -106,4 +229,296 @@ class Booking(db.Model):
             "start_time": self.park_in_time.isoformat() if self.park_in_time else None,
             "end_time": self.park_out_time.isoformat() if self.park_out_time else None,
             "cost": self.cost
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def close_active(user_id, now=None):
+        """
+        Ends the user's open booking in the current transaction, without
+        loading anything first. Three guarded UPDATE ... RETURNING statements:
+        close the booking and price it in SQL (started hours x the lot's
+        hourly price), free its spot, and shift the lot counters. Returns
+        (receipt, lot_id, counters), the receipt shaped like to_dict(), or
+        None if the user has no open booking, e.g. because a concurrent
+        release has just closed it.
+        """
+        now = now or datetime.utcnow()
+        price_per_hour = db.select(ParkingLot.price_per_hour).join(
+            ParkingSpot, ParkingSpot.lot_id == ParkingLot.id
+        ).where(ParkingSpot.id == Booking.spot_id).scalar_subquery()
+
+        booking = db.session.execute(
+            db.update(Booking)
+            .where(Booking.user_id == user_id, Booking.park_out_time.is_(None))
+            .values(
+                park_out_time=now,
+                cost=billed_hours(Booking.park_in_time, literal(now, db.DateTime)) * price_per_hour
+            )
+            .returning(Booking.id, Booking.spot_id, Booking.park_in_time, Booking.cost)
+        ).first()
+        if booking is None:
+            return None
+
+        # Only a spot still marked Occupied is freed and counted back
+        spot = db.session.execute(
+            db.update(ParkingSpot)
+            .where(ParkingSpot.id == booking.spot_id, ParkingSpot.status == 'Occupied')
+            .values(status='Available')
+            .returning(ParkingSpot.lot_id, ParkingSpot.spot_number)
+        ).first()
+        freed = 1
+        if spot is None:
+            freed = 0
+            spot = db.session.query(ParkingSpot.lot_id, ParkingSpot.spot_number).filter(
+                ParkingSpot.id == booking.spot_id
+            ).one()
+
+        lot = db.session.execute(
+            db.update(ParkingLot)
+            .where(ParkingLot.id == spot.lot_id)
+            .values(
+                available_spots=ParkingLot.available_spots + freed,
+                occupied_spots=ParkingLot.occupied_spots - freed
+            )
+            .returning(ParkingLot.name, ParkingLot.address,
+                       ParkingLot.available_spots, ParkingLot.occupied_spots)
+        ).one()
+
+        receipt = {
+            "id": booking.id,
+            "user_id": user_id,
+            "spot_id": booking.spot_id,
+            "lot_name": lot.name,
+            "spot_number": spot.spot_number,
+            "lot_address": lot.address,
+            "start_time": booking.park_in_time,
+            "end_time": now,
+            # SQLite's RETURNING hands back 10.0 as 10, before the REAL column affinity
+            "cost": float(booking.cost) if booking.cost is not None else None
+        }
+        counters = {"available_spots": lot.available_spots, "occupied_spots": lot.occupied_spots}
+        return receipt, spot.lot_id, counters
+
+    @staticmethod
+    def history_query(source=None):
+        """
+        Projects exactly the columns history_row_to_dict needs, joining spot and
+        lot in the same query instead of loading them lazily per booking. The
+        rows come from the live table, or from source, e.g. a history_source().
+        """
+        b = source.c if source is not None else Booking
+        return db.session.query(
+            b.id,
+            b.user_id,
+            b.spot_id,
+            ParkingLot.name,
+            ParkingSpot.spot_number,
+            ParkingLot.address,
+            b.park_in_time,
+            b.park_out_time,
+            b.cost
+        ).outerjoin(
+            ParkingSpot, ParkingSpot.id == b.spot_id
+        ).outerjoin(
+            ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+        )
+
+    @staticmethod
+    def history_source(*criteria, limit=None):
+        """
+        Live and archived bookings as one subquery with the bookings columns
+        (UNION ALL of both tables). criteria are written against Booking and
+        applied to each table on its own indexes. With a limit, each table
+        gives only its newest `limit` rows, enough for one history page.
+        """
+        branches = []
+        for table in (Booking.__table__, ArchivedBooking.__table__):
+            branch = db.select(*(table.c[name] for name in BOOKING_COLUMNS)).where(
+                *(_retarget(criterion, table) for criterion in criteria)
+            )
+            if limit is not None:
+                branch = branch.order_by(
+                    table.c.park_in_time.desc(), table.c.id.desc()
+                ).limit(limit).subquery().select()
+            branches.append(branch)
+        return db.union_all(*branches).subquery('all_bookings')
+
+    @staticmethod
+    def history_row_to_dict(row):
+        """Shapes a history_query row exactly like Booking.to_dict()."""
+        (booking_id, user_id, spot_id, lot_name, spot_number,
+         lot_address, park_in_time, park_out_time, cost) = row
+        return {
+            "id": booking_id,
+            "user_id": user_id,
+            "spot_id": spot_id,
+            "lot_name": lot_name if lot_name is not None else "N/A",
+            "spot_number": spot_number if spot_number is not None else "N/A",
+            "lot_address": lot_address if lot_address is not None else "N/A",
+            # Datetimes are left to the app's JSON provider, which writes ISO 8601
+            "start_time": park_in_time,
+            "end_time": park_out_time,
+            "cost": cost
+        }
+
+    @staticmethod
+    def history_cursor(row):
+        """The (park_in_time, id) sort key of a history_query row."""
+        return row[6], row[0]
+
+
+class ArchivedBooking(db.Model):
+    """
+    A completed booking moved out of 'bookings' by the archival job
+    (backend/tasks/archive.py). Same columns and ids; read together with the
+    live table through Booking.history_source().
+    """
+    __tablename__ = 'bookings_archive'
+    __table_args__ = (
+        # The same history, per-user and month-range reads as the live table,
+        # plus the spot lookup used when a lot is deleted.
+        db.Index('ix_bookings_archive_park_in_time_id', 'park_in_time', 'id'),
+        db.Index('ix_bookings_archive_user_id_park_in_time_id', 'user_id', 'park_in_time', 'id'),
+        db.Index('ix_bookings_archive_park_out_time', 'park_out_time'),
+        db.Index('ix_bookings_archive_spot_id', 'spot_id'),
+    )
+
+    # Ids are copied from 'bookings', never generated here.
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    spot_id = db.Column(db.Integer, db.ForeignKey('parking_spots.id'), nullable=False)
+    park_in_time = db.Column(db.DateTime, nullable=False)
+    park_out_time = db.Column(db.DateTime, nullable=False)
+    cost = db.Column(db.Float, nullable=True)
+
+
+# Columns shared by 'bookings' and 'bookings_archive', in order.
+BOOKING_COLUMNS = ('id', 'user_id', 'spot_id', 'park_in_time', 'park_out_time', 'cost')
+
+
+def _retarget(clause, table):
+    """Rewrites an expression over the bookings columns to the same columns of table."""
+    if table is Booking.__table__:
+        return clause
+    return replacement_traverse(clause, {}, lambda element: (
+        table.c[element.key] if isinstance(element, Column) and element.table is Booking.__table__ else None
+    ))
+
+
+class Reservation(db.Model):
+    """
+    A spot booked ahead for the time window [start_time, end_time). The
+    database keeps the live (not cancelled) windows of a spot from
+    overlapping: an exclusion constraint on PostgreSQL, triggers on SQLite.
+    At check-in a reservation becomes an ordinary Booking of its spot.
+    """
+    __tablename__ = 'reservations'
+
+    RESERVED = 'Reserved'
+    CHECKED_IN = 'CheckedIn'
+    CANCELLED = 'Cancelled'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    spot_id = db.Column(db.Integer, db.ForeignKey('parking_spots.id'), nullable=False)
+    start_time = db.Column(db.DateTime, nullable=False)
+    end_time = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=RESERVED)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.CheckConstraint('end_time > start_time', name='ck_reservations_window'),
+        # Overlap checks and loading a spot's upcoming windows; a user's reservations.
+        db.Index('ix_reservations_spot_id_end_time', 'spot_id', 'end_time'),
+        db.Index('ix_reservations_user_id_start_time', 'user_id', 'start_time'),
+        ExcludeConstraint(
+            (spot_id, '='), (func.tsrange(start_time, end_time), '&&'),
+            name='ex_reservations_spot_window', using='gist',
+            where=text(f"status <> '{CANCELLED}'")
+        ).ddl_if(dialect='postgresql'),
+    )
+
+    spot = db.relationship('ParkingSpot')
+
+    @staticmethod
+    def live():
+        """Reservations that still hold their window."""
+        return Reservation.status != Reservation.CANCELLED
+
+    @staticmethod
+    def holding(spot_id, start, end):
+        """Whether a live reservation of the spot overlaps [start, end), as a SQL expression."""
+        return db.exists().where(
+            Reservation.spot_id == spot_id,
+            Reservation.live(),
+            Reservation.start_time < end,
+            Reservation.end_time > start
+        )
+
+    def to_dict(self):
+        """Serializes the reservation; lot and spot come from the spot relationship."""
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "spot_id": self.spot_id,
+            "lot_id": self.spot.lot_id if self.spot else None,
+            "spot_number": self.spot.spot_number if self.spot else None,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "status": self.status
+        }
+
+
+# The exclusion constraint compares spot ids with '=' inside a GiST index
+event.listen(Reservation.__table__, 'before_create', db.DDL(
+    "CREATE EXTENSION IF NOT EXISTS btree_gist"
+).execute_if(dialect='postgresql'))
+
+# SQLite has no exclusion constraints; these triggers reject the same overlaps
+RESERVATION_OVERLAP_TRIGGERS = [
+    f"""
+    CREATE TRIGGER reservations_no_overlap_{operation.lower()}
+    BEFORE {operation} ON reservations
+    WHEN NEW.status <> '{Reservation.CANCELLED}' AND EXISTS (
+        SELECT 1 FROM reservations
+        WHERE spot_id = NEW.spot_id AND id IS NOT NEW.id AND status <> '{Reservation.CANCELLED}'
+          AND start_time < NEW.end_time AND end_time > NEW.start_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'reservation overlaps another reservation of the spot');
+    END
+    """
+    for operation in ('INSERT', 'UPDATE')
+]
+for trigger in RESERVATION_OVERLAP_TRIGGERS:
+    event.listen(Reservation.__table__, 'after_create', db.DDL(trigger).execute_if(dialect='sqlite'))
+
+
+def check_lot_counters(repair=False):
+    """
+    Compares every lot's counters against a single grouped count of its spots.
+    Returns a list of (lot_id, stored, actual) tuples for the lots that drifted;
+    with repair=True the stored counters are overwritten with the actual values.
+    """
+    actual_counts = db.session.query(
+        ParkingLot.id,
+        ParkingLot.available_spots,
+        ParkingLot.occupied_spots,
+        func.coalesce(func.sum(case((ParkingSpot.status == 'Available', 1), else_=0)), 0),
+        func.coalesce(func.sum(case((ParkingSpot.status == 'Occupied', 1), else_=0)), 0)
+    ).outerjoin(ParkingSpot, ParkingSpot.lot_id == ParkingLot.id).group_by(ParkingLot.id).all()
+
+    mismatches = []
+    for lot_id, stored_available, stored_occupied, available, occupied in actual_counts:
+        if (stored_available, stored_occupied) != (available, occupied):
+            mismatches.append((lot_id, (stored_available, stored_occupied), (available, occupied)))
+            if repair:
+                db.session.execute(
+                    db.update(ParkingLot)
+                    .where(ParkingLot.id == lot_id)
+                    .values(available_spots=available, occupied_spots=occupied)
+                )
+
+    if repair and mismatches:
+        db.session.commit()
+    return mismatches
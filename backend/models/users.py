@@ -1,5 +1,6 @@
 # backend/models/user.py
 
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from email_validator import validate_email, EmailNotValidError
@@ -21,14 +22,27 @@ class User(db.Model):
 
     bookings = db.relationship('Booking', back_populates='user', lazy='dynamic')
 
+    @staticmethod
+    def hash_password(password):
+        """Returns a bcrypt hash of the password at the configured BCRYPT_LOG_ROUNDS."""
+        return bcrypt.generate_password_hash(password).decode('utf-8')
+
     def set_password(self, password):
         """Hashes the password and stores it."""
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+        self.password_hash = User.hash_password(password)
 
     def check_password(self, password):
         """Checks if the provided password matches the stored hash."""
         return bcrypt.check_password_hash(self.password_hash, password)
 
+    def password_needs_rehash(self):
+        """True if the stored hash was made with a different work factor than BCRYPT_LOG_ROUNDS."""
+        try:
+            rounds = int(self.password_hash.split('$')[2])
+        except (IndexError, ValueError):
+            return True
+        return rounds != current_app.config.get('BCRYPT_LOG_ROUNDS', 12)
+
     @staticmethod
     def validate_username(username):
         """Validates the username format."""
@@ -1,29 +1,34 @@
 # backend/routes/admin_routes.py
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt
-from functools import wraps
+from flask import Blueprint, current_app, request, jsonify
+import csv
+import io
 from backend.models.users import db, User
-from backend.models.parking import ParkingLot, ParkingSpot, Booking
-from sqlalchemy import func, case
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, ArchivedBooking, Reservation
+from backend.services.allocator import spot_allocator
+from backend.services.analytics import (
+    AnalyticsQueryError, GRANULARITIES, get_series_args, usage_series, total_capacity
+)
+from backend.services.auth import auth_required
+from backend.services.dashboard import get_dashboard_summary
+from backend.services.events import occupancy_events
+from backend.services.lot_list import lot_list_response
+from backend.services.metrics import query_budget
+from backend.tasks.exports import export_parking_history_csv
+from backend.tasks.lots import CLOSING, close_lot, purge_lot, delete_parking_lot as delete_lot_task
+from backend.routes.pagination import (
+    PaginationError, get_page_args, decode_cursor, keyset_filter, paged_json_response
+)
+from sqlalchemy import func, and_
 from sqlalchemy.exc import IntegrityError
+from datetime import datetime
 
 admin_bp = Blueprint('admin_bp', __name__)
 
 # --- Custom Decorator for Admin Access ---
 def admin_required():
     """A decorator to protect routes that should only be accessible by admins."""
-    def wrapper(fn):
-        @wraps(fn)
-        @jwt_required()
-        def decorator(*args, **kwargs):
-            claims = get_jwt()
-            if claims.get('role') != 'admin':
-                return jsonify(msg="Admins only! Access forbidden."), 403
-            else:
-                return fn(*args, **kwargs)
-        return decorator
-    return wrapper
+    return auth_required(role='admin')
 
 
 # --- Parking Lot Management ---
@@ -53,17 +58,105 @@ def create_parking_lot():
         address=address, 
         pin_code=pin_code,
         price_per_hour=price,
-        capacity=capacity
+        capacity=capacity,
+        available_spots=capacity
     )
     db.session.add(new_lot)
     db.session.flush()
 
-    for i in range(1, capacity + 1):
-        spot = ParkingSpot(spot_number=i, lot_id=new_lot.id)
-        db.session.add(spot)
+    ParkingSpot.provision(new_lot.id, 1, capacity)
     
     db.session.commit()
-    return jsonify(msg="Parking lot and spots created successfully", lot=new_lot.to_dict()), 201
+    lot_data = new_lot.to_dict()
+    occupancy_events.publish('lot_created', lot_id=new_lot.id, lot=lot_data)
+    return jsonify(msg="Parking lot and spots created successfully", lot=lot_data), 201
+
+
+@admin_bp.route('/lots/import', methods=['POST'])
+@admin_required()
+def import_parking_lots():
+    """
+    Admin: Create many parking lots in one transaction. Accepts a JSON array of
+    lot objects, or CSV (a 'file' upload or a text/csv body) with the columns
+    name, address, pin_code, price_per_hour, capacity. Nothing is created
+    unless every row is valid.
+    """
+    if 'file' in request.files or request.mimetype == 'text/csv':
+        raw = request.files['file'].read() if 'file' in request.files else request.get_data()
+        try:
+            rows = list(csv.DictReader(io.StringIO(raw.decode('utf-8-sig'))))
+        except (UnicodeDecodeError, csv.Error):
+            return jsonify(msg="Could not read the CSV file."), 400
+    else:
+        rows = request.get_json(silent=True)
+
+    if not isinstance(rows, list) or not rows:
+        return jsonify(msg="Expected a non-empty list of parking lots."), 400
+
+    lots, errors = [], []
+    for row_number, row in enumerate(rows, start=1):
+        lot, error = _parse_lot_row(row)
+        if error:
+            errors.append({"row": row_number, "msg": error})
+        else:
+            lots.append(lot)
+    if errors:
+        return jsonify(msg="Some rows are invalid; nothing was imported.", errors=errors), 400
+
+    names = [lot["name"] for lot in lots]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    duplicates += [name for (name,) in db.session.query(ParkingLot.name).filter(ParkingLot.name.in_(names))]
+    if duplicates:
+        return jsonify(msg="Parking lots with these names already exist", names=duplicates), 409
+
+    try:
+        created = db.session.execute(
+            db.insert(ParkingLot).returning(ParkingLot.id, ParkingLot.capacity),
+            [dict(lot, available_spots=lot["capacity"]) for lot in lots]
+        ).all()
+        db.session.execute(db.insert(ParkingSpot), [
+            {"lot_id": lot_id, "spot_number": number, "status": 'Available'}
+            for lot_id, capacity in created for number in range(1, capacity + 1)
+        ])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(msg="Import failed. A parking lot with one of these names already exists."), 409
+
+    lot_ids = [lot_id for lot_id, _ in created]
+    occupancy_events.publish('lots_imported', lot_ids=lot_ids)
+    return jsonify(
+        msg=f"Imported {len(lot_ids)} parking lots with {sum(c for _, c in created)} spots.",
+        lot_ids=lot_ids
+    ), 201
+
+
+def _parse_lot_row(row):
+    """Validates one imported lot. Returns (lot fields, None) or (None, error message)."""
+    if not isinstance(row, dict):
+        return None, "Each lot must be an object."
+
+    name, address, pin_code = (str(row.get(key) or '').strip() for key in ('name', 'address', 'pin_code'))
+    price, capacity = row.get('price_per_hour'), row.get('capacity')
+    if not all([name, address, pin_code, price, capacity]):
+        return None, "Missing required fields"
+
+    try:
+        price = float(price)
+        # CSV cells arrive as text; JSON capacities must already be integers
+        capacity = int(capacity) if isinstance(capacity, str) and capacity.strip().isdigit() else capacity
+    except (TypeError, ValueError):
+        return None, "price_per_hour must be a number"
+    if not isinstance(capacity, int) or isinstance(capacity, bool) or capacity <= 0:
+        return None, "Capacity must be a positive integer"
+
+    return {
+        "name": name,
+        "address": address,
+        "pin_code": pin_code,
+        "price_per_hour": price,
+        "capacity": capacity
+    }, None
 
 
 @admin_bp.route('/lots/<int:lot_id>', methods=['PUT'])
@@ -73,6 +166,13 @@ def edit_parking_lot(lot_id):
     lot = ParkingLot.query.get_or_404(lot_id)
     data = request.get_json()
 
+    # New spots would be bookable, and removed ones race the purge
+    closing = db.session.query(ParkingSpot.id).filter(
+        ParkingSpot.lot_id == lot.id, ParkingSpot.status == CLOSING
+    ).first()
+    if closing:
+        return jsonify(msg="Cannot edit lot. It is being deleted."), 409
+
     lot.name = data.get('name', lot.name)
     lot.address = data.get('address', lot.address)
     lot.pin_code = data.get('pin_code', lot.pin_code)
@@ -84,23 +184,59 @@ def edit_parking_lot(lot_id):
         if not isinstance(new_capacity, int) or new_capacity <= 0:
             return jsonify(msg="Capacity must be a positive integer"), 400
         
-        current_spots_count = lot.spots.count()
+        current_spots_count, highest_spot_number = db.session.query(
+            func.count(ParkingSpot.id), func.coalesce(func.max(ParkingSpot.spot_number), 0)
+        ).filter(ParkingSpot.lot_id == lot.id).one()
         
         if new_capacity > current_spots_count:
-            for i in range(current_spots_count + 1, new_capacity + 1):
-                spot = ParkingSpot(spot_number=i, lot_id=lot.id)
-                db.session.add(spot)
+            ParkingSpot.provision(lot.id, highest_spot_number + 1, new_capacity - current_spots_count)
         elif new_capacity < current_spots_count:
             spots_to_remove_count = current_spots_count - new_capacity
-            available_spots_to_remove = lot.spots.filter_by(status='Available').order_by(ParkingSpot.spot_number.desc()).limit(spots_to_remove_count).all()
-
-            if len(available_spots_to_remove) < spots_to_remove_count:
-                return jsonify(msg="Cannot reduce capacity. Not enough available spots to remove."), 409
-            
-            for spot in available_spots_to_remove:
-                db.session.delete(spot)
+            # The highest-numbered spots are removed as one range, which must be entirely free
+            lowest_removed_number = db.session.query(ParkingSpot.spot_number).filter(
+                ParkingSpot.lot_id == lot.id
+            ).order_by(ParkingSpot.spot_number.desc()).offset(spots_to_remove_count - 1).limit(1).scalar()
+            spots_to_remove = db.session.query(ParkingSpot.id).filter(
+                ParkingSpot.lot_id == lot.id,
+                ParkingSpot.spot_number >= lowest_removed_number
+            )
+
+            if spots_to_remove.filter(ParkingSpot.status == 'Occupied').first():
+                db.session.rollback()
+                return jsonify(msg="Cannot reduce capacity. The highest-numbered spots that would be removed are not all available."), 409
+            upcoming = db.session.query(Reservation.id).filter(
+                Reservation.spot_id.in_(spots_to_remove.scalar_subquery()),
+                Reservation.end_time > datetime.utcnow(),
+                Reservation.live()
+            ).first()
+            if upcoming:
+                db.session.rollback()
+                return jsonify(msg="Cannot reduce capacity. Spots that would be removed have upcoming reservations."), 409
+
+            # Past bookings of the removed spots go with them, as the ORM cascade used to do
+            Booking.query.filter(
+                Booking.spot_id.in_(spots_to_remove.scalar_subquery())
+            ).delete(synchronize_session=False)
+            ArchivedBooking.query.filter(
+                ArchivedBooking.spot_id.in_(spots_to_remove.scalar_subquery())
+            ).delete(synchronize_session=False)
+            Reservation.query.filter(
+                Reservation.spot_id.in_(spots_to_remove.scalar_subquery())
+            ).delete(synchronize_session=False)
+            removed = ParkingSpot.query.filter(
+                ParkingSpot.lot_id == lot.id,
+                ParkingSpot.spot_number >= lowest_removed_number,
+                ParkingSpot.status == 'Available'
+            ).delete(synchronize_session=False)
+
+            if removed < spots_to_remove_count:
+                # A spot in the range was booked meanwhile
+                db.session.rollback()
+                return jsonify(msg="Cannot reduce capacity. The highest-numbered spots that would be removed are not all available."), 409
         
         lot.capacity = new_capacity
+        # Spots are only ever added or removed while 'Available'.
+        lot.available_spots = ParkingLot.available_spots + (new_capacity - current_spots_count)
 
     try:
         db.session.commit()
@@ -108,107 +244,261 @@ def edit_parking_lot(lot_id):
     except IntegrityError:
         db.session.rollback()
         return jsonify(msg="Update failed. Cannot remove a parking spot that has a booking history."), 409
+
+    # Spots may have been added or removed; rebuild the free list on the next booking
+    spot_allocator.invalidate(lot.id)
+    lot_data = lot.to_dict()
+    occupancy_events.publish('lot_updated', lot_id=lot.id, lot=lot_data)
         
-    return jsonify(msg="Parking lot updated successfully", lot=lot.to_dict()), 200
+    return jsonify(msg="Parking lot updated successfully", lot=lot_data), 200
 
 
 @admin_bp.route('/lots', methods=['GET'])
 @admin_required()
+@query_budget(1)
 def get_all_parking_lots():
-    """Admin: View all parking lots."""
-    lots = ParkingLot.query.all()
-    return jsonify([lot.to_dict() for lot in lots]), 200
+    """Admin: View all parking lots (cached and pre-encoded, with ETag/304)."""
+    return lot_list_response()
 
 @admin_bp.route('/lots/<int:lot_id>', methods=['DELETE'])
 @admin_required()
 def delete_parking_lot(lot_id):
-    """Admin: Delete a parking lot and all its associated data if empty."""
+    """
+    Admin: Delete a parking lot and all its associated data if empty.
+    With ?background=true the history is purged by a Celery task instead;
+    the response carries its task_id for /api/task/status.
+    """
     lot = ParkingLot.query.get_or_404(lot_id)
+    name = lot.name
+
+    # Take the free spots out of service first, so no booking or reservation
+    # can start while the history is being removed; refused if any spot is
+    # still occupied or reserved ahead.
+    refused = close_lot(lot_id)
+    if refused:
+        return jsonify(msg=f"Cannot delete lot. {refused}"), 409
+    spot_allocator.invalidate(lot_id)
+
+    if request.args.get('background', '').lower() in ('1', 'true', 'yes'):
+        occupancy_events.publish('lot_updated', lot_id=lot_id, lot=lot.to_dict())
+        task = delete_lot_task.delay(lot_id)
+        return jsonify(
+            msg=f"Parking lot '{name}' is closed and is being deleted.",
+            task_id=task.id
+        ), 202
 
-    # First, check if any spots are currently occupied.
-    occupied_spots = lot.spots.filter_by(status='Occupied').count()
-    if occupied_spots > 0:
-        return jsonify(msg=f"Cannot delete lot. {occupied_spots} spot(s) are currently occupied."), 409
-    
     try:
-        spot_ids = [spot.id for spot in lot.spots]
-        if spot_ids:
-            # This is a bulk delete operation for efficiency.
-            Booking.query.filter(Booking.spot_id.in_(spot_ids)).delete(synchronize_session=False)
-
-        db.session.delete(lot)
-        db.session.commit()
+        purge_lot(lot_id)
     except Exception as e:
         db.session.rollback()
 
         print(f"An error occurred during deletion: {e}")
-        return jsonify(msg="An unexpected error occurred during deletion. Please try again."), 500
+        # The lot stays closed with part of its history gone; deleting it again resumes the purge
+        lot = db.session.get(ParkingLot, lot_id)
+        if lot is not None:
+            occupancy_events.publish('lot_updated', lot_id=lot_id, lot=lot.to_dict())
+        return jsonify(msg="An unexpected error occurred during deletion. The lot is closed; delete it again to finish."), 500
+
+    occupancy_events.publish('lot_deleted', lot_id=lot_id)
         
-    return jsonify(msg=f"Parking lot '{lot.name}' and all its history have been permanently deleted."), 200
+    return jsonify(msg=f"Parking lot '{name}' and all its history have been permanently deleted."), 200
 
 
 # --- User and Spot Monitoring ---
 
 @admin_bp.route('/users', methods=['GET'])
 @admin_required()
+@query_budget(1)
 def get_all_users():
     """Admin: View all registered users."""
-    users = User.query.filter_by(role='user').all()
-    return jsonify([user.to_dict() for user in users]), 200
+    users = db.session.query(User.id, User.username, User.email, User.role).filter_by(role='user')
+    return jsonify([user._asdict() for user in users]), 200
 
 @admin_bp.route('/spots/status', methods=['GET'])
 @admin_required()
+@query_budget(1)
 def get_all_spot_statuses():
-    """Admin: View the status of all parking spots."""
-    spots = ParkingSpot.query.order_by(ParkingSpot.lot_id, ParkingSpot.spot_number).all()
-    return jsonify([spot.to_dict() for spot in spots]), 200
+    """
+    Admin: View the status of all parking spots.
+    Optional query parameters: lot_id, and limit/cursor for keyset pagination
+    (the cursor for the next page is returned in the X-Next-Cursor header).
+    """
+    try:
+        limit, cursor = get_page_args()
+        lot_id = request.args.get('lot_id', type=int)
+        after = decode_cursor(cursor, int, int) if cursor else None
+    except PaginationError as e:
+        return jsonify(msg=str(e)), 400
+
+    # One query for spot, lot and the occupant of any open booking
+    query = db.session.query(
+        ParkingSpot.id,
+        ParkingSpot.spot_number,
+        ParkingSpot.status,
+        ParkingSpot.lot_id,
+        ParkingLot.name,
+        Booking.id,
+        Booking.user_id,
+        Booking.park_in_time,
+        User.username
+    ).join(
+        ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+    ).outerjoin(
+        Booking, and_(Booking.spot_id == ParkingSpot.id, Booking.park_out_time.is_(None))
+    ).outerjoin(
+        User, User.id == Booking.user_id
+    )
+
+    if lot_id is not None:
+        query = query.filter(ParkingSpot.lot_id == lot_id)
+    if after:
+        query = query.filter(keyset_filter((ParkingSpot.lot_id, ParkingSpot.spot_number), after))
+    query = query.order_by(ParkingSpot.lot_id, ParkingSpot.spot_number)
+
+    return paged_json_response(query, limit, _spot_status, lambda row: (row[3], row[1]))
+
+
+def _spot_status(row):
+    """Shapes a row of the spot status query like ParkingSpot.to_dict()."""
+    (spot_id, spot_number, status, lot_id, lot_name,
+     booking_id, booking_user_id, park_in_time, username) = row
+
+    current_booking_info = {}
+    if booking_id is not None:
+        current_booking_info = {
+            "booking_id": booking_id,
+            "user_id": booking_user_id,
+            "park_in_time": park_in_time
+        }
+
+    return {
+        "id": spot_id,
+        "spot_number": spot_number,
+        "status": status,
+        "lot_id": lot_id,
+        "lot_name": lot_name,
+        "occupant_username": username,
+        "current_booking_info": current_booking_info
+    }
 
 
 # --- Dashboard Data ---
 
 @admin_bp.route('/dashboard/summary', methods=['GET'])
 @admin_required()
+@query_budget(1)
 def get_admin_dashboard_summary():
-    """Admin: Get summary data for the dashboard."""
-    total_lots = ParkingLot.query.count()
-    total_spots = ParkingSpot.query.count()
-    occupied_spots = ParkingSpot.query.filter_by(status='Occupied').count()
-    available_spots = total_spots - occupied_spots
-    
-    lot_occupancy = db.session.query(
-        ParkingLot.name,
-        func.count(ParkingSpot.id).label('total'),
-        func.sum(case((ParkingSpot.status == 'Occupied', 1), else_=0)).label('occupied')
-    ).join(ParkingSpot).group_by(ParkingLot.name).all()
-
-    lot_occupancy_data = [
-        {
-            "lot_name": name,
-            "total_spots": total,
-            "occupied_spots": occupied or 0,
-            "available_spots": total - (occupied or 0)
-        } for name, total, occupied in lot_occupancy
-    ]
+    """Admin: Get summary data for the dashboard (cached until spots or lots change)."""
+    return jsonify(get_dashboard_summary()), 200
+
+
+# --- Analytics (served from the usage rollups) ---
+
+@admin_bp.route('/analytics/revenue', methods=['GET'])
+@admin_required()
+@query_budget(2)
+def get_revenue_series():
+    """
+    Admin: Revenue and completed bookings per hour or day, of all lots or one.
+    Query args: start, end (ISO 8601, UTC; default the last 30 days), granularity=hour|day, lot_id.
+    """
+    try:
+        start, end, granularity, lot_id = get_series_args(request.args)
+    except AnalyticsQueryError as e:
+        return jsonify(msg=str(e)), 400
+
+    points, up_to = usage_series(start, end, granularity, lot_id)
+    return jsonify({
+        "granularity": granularity,
+        "lot_id": lot_id,
+        "start": start,
+        "end": end,
+        "up_to": up_to,
+        "total_revenue": round(sum(point["revenue"] for point in points), 2),
+        "series": [
+            {"bucket": point["bucket"], "revenue": point["revenue"], "bookings_completed": point["bookings_completed"]}
+            for point in points
+        ]
+    }), 200
+
+@admin_bp.route('/analytics/utilization', methods=['GET'])
+@admin_required()
+@query_budget(3)
+def get_utilization_series():
+    """
+    Admin: Occupied spot-minutes and utilization (occupied share of the current
+    capacity) per hour or day. Same query args as /analytics/revenue.
+    """
+    try:
+        start, end, granularity, lot_id = get_series_args(request.args)
+    except AnalyticsQueryError as e:
+        return jsonify(msg=str(e)), 400
 
+    points, up_to = usage_series(start, end, granularity, lot_id)
+    capacity = total_capacity(lot_id)
+    bucket_minutes = GRANULARITIES[granularity][1].total_seconds() / 60
     return jsonify({
-        "total_lots": total_lots,
-        "total_spots": total_spots,
-        "occupied_spots": occupied_spots,
-        "available_spots": available_spots,
-        "lot_occupancy": lot_occupancy_data
+        "granularity": granularity,
+        "lot_id": lot_id,
+        "start": start,
+        "end": end,
+        "up_to": up_to,
+        "capacity": capacity,
+        "series": [
+            {
+                "bucket": point["bucket"],
+                "occupied_minutes": point["occupied_minutes"],
+                "bookings_started": point["bookings_started"],
+                "utilization": round(point["occupied_minutes"] / (capacity * bucket_minutes), 4) if capacity else None
+            }
+            for point in points
+        ]
     }), 200
 
 @admin_bp.route('/bookings', methods=['GET'])
 @admin_required()
+@query_budget(1)
 def get_all_bookings():
-    """Admin: Get all booking history, with an optional filter by user_id."""
-    query = Booking.query
+    """
+    Admin: Get booking history, newest first, with an optional filter by user_id.
+    Returns pages of ?limit= rows (default 50) with the next page's cursor in the
+    X-Next-Cursor header; ?stream=true streams the full history instead.
+    """
+    try:
+        limit, cursor = get_page_args(default_limit=Booking.HISTORY_PAGE_SIZE)
+        after = decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+    except PaginationError as e:
+        return jsonify(msg=str(e)), 400
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        limit = None
+
+    criteria = []
     
     # Check if a user_id is provided in the query string (e.g., /bookings?user_id=2)
-    user_id = request.args.get('user_id')
+    user_id = request.args.get('user_id', type=int)
     if user_id:
-        query = query.filter_by(user_id=user_id)
+        criteria.append(Booking.user_id == user_id)
+    if after:
+        criteria.append(keyset_filter((Booking.park_in_time, Booking.id), after, descending=True))
         
-    all_bookings = query.order_by(Booking.park_in_time.desc()).all()
+    # Live and archived bookings, each table read up to one page deep
+    history = Booking.history_source(*criteria, limit=limit + 1 if limit else None)
+    query = Booking.history_query(history).order_by(history.c.park_in_time.desc(), history.c.id.desc())
     
-    return jsonify([b.to_dict() for b in all_bookings]), 200
+    return paged_json_response(query, limit, Booking.history_row_to_dict, Booking.history_cursor)
+
+
+@admin_bp.route('/export/csv', methods=['POST'])
+@admin_required()
+def trigger_admin_csv_export():
+    """
+    Admin: Trigger an asynchronous CSV export of every booking.
+    Same options and status/download flow as the user export.
+    """
+    data = request.get_json(silent=True) or {}
+    compress = bool(data.get('gzip', current_app.config.get('EXPORT_GZIP', False)))
+    task = export_parking_history_csv.delay(None, compress)
+    return jsonify(
+        msg="The booking export has started. A download link will be available when it's ready.",
+        task_id=task.id
+    ), 202
@@ -4,11 +4,15 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token
 # **FIX:** Corrected the import to match the 'user.py' model file.
 from backend.models.users import User, db
+from backend.services.passwords import password_hasher, HasherBusy
+from backend.services.rate_limit import rate_limiter, by_json_field
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 # Create a Blueprint for authentication routes
 auth_bp = Blueprint('auth_bp', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limiter.limit('register')
 def register():
     """
     User registration endpoint.
@@ -34,19 +38,26 @@ def register():
     # if not is_valid_email:
         # return jsonify({"msg": email_msg}), 400
 
-    # --- Check for existing user ---
-    if User.query.filter_by(username=username).first():
-        return jsonify({"msg": "Username already exists"}), 409
-    if User.query.filter_by(email=email).first():
-        return jsonify({"msg": "Email already registered"}), 409
-
     # --- Create new user ---
-    new_user = User(username=username, email=email)
-    new_user.set_password(password)
+    try:
+        password_hash = password_hasher.run(User.hash_password, password)
+    except HasherBusy:
+        return _busy_response()
+    new_user = User(username=username, email=email, password_hash=password_hash)
     
+    # The unique constraints on username and email catch duplicates in the same
+    # round trip as the insert, and also when two registrations race.
     try:
         db.session.add(new_user)
         db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        # The error text differs between databases and drivers; ask which value is taken
+        if db.session.query(User.id).filter_by(username=username).first():
+            return jsonify({"msg": "Username already exists"}), 409
+        if db.session.query(User.id).filter_by(email=email).first():
+            return jsonify({"msg": "Email already registered"}), 409
+        return jsonify({"msg": "Username or email already registered"}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": "Failed to create user. Please try again."}), 500
@@ -54,6 +65,8 @@ def register():
     return jsonify({"msg": "User created successfully"}), 201
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limiter.limit('login')
+@rate_limiter.limit('login_account', key=by_json_field('email'))
 def login():
     """
     User and Admin login endpoint.
@@ -71,10 +84,34 @@ def login():
 
     user = User.query.filter_by(email=email).first()
 
-    if user and user.check_password(password):
-        # Use user.id as the identity and store the role in additional_claims.
-        additional_claims = {"role": user.role}
-        access_token = create_access_token(identity=str(user.id), additional_claims={"role": user.role})
+    try:
+        valid = user is not None and password_hasher.run(user.check_password, password)
+    except HasherBusy:
+        return _busy_response()
+
+    if valid:
+        if user.password_needs_rehash():
+            _rehash_password(user, password)
+
+        # Use user.id as the identity and store the role (and the username shown
+        # in live occupancy events) in additional_claims.
+        additional_claims = {"role": user.role, "username": user.username}
+        access_token = create_access_token(identity=str(user.id), additional_claims=additional_claims)
         return jsonify(access_token=access_token), 200
     
     return jsonify({"msg": "Bad email or password"}), 401
+
+
+def _rehash_password(user, password):
+    """Upgrades a hash made with an older BCRYPT_LOG_ROUNDS; login goes on if this fails."""
+    try:
+        user.password_hash = password_hasher.run(User.hash_password, password)
+        db.session.commit()
+    except (HasherBusy, SQLAlchemyError):
+        db.session.rollback()
+
+
+def _busy_response():
+    response = jsonify({"msg": "Too many sign-in attempts right now. Please try again shortly."})
+    response.headers['Retry-After'] = '1'
+    return response, 503
@@ -0,0 +1,120 @@
+# backend/routes/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from flask import Response, current_app, request, stream_with_context
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """Raised for malformed limit/cursor query parameters."""
+
+
+def encode_cursor(*values):
+    """Packs the sort key of the last row on a page into an opaque token."""
+    raw = json.dumps(values, default=_cursor_value, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _cursor_value(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def decode_cursor(token, *parsers):
+    """
+    Unpacks a token made by encode_cursor. It must hold one value per parser;
+    each value is passed through its parser (e.g. int, datetime.fromisoformat).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(parsers):
+            raise ValueError(token)
+        return [parse(value) for parse, value in zip(parsers, values)]
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor.")
+
+
+def get_page_args(default_limit=None, max_limit=500):
+    """
+    Reads ?limit= and ?cursor= from the query string. A missing limit falls
+    back to default_limit (None means "no paging").
+    """
+    limit = request.args.get('limit', default_limit)
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise PaginationError("limit must be an integer.")
+        if limit <= 0:
+            raise PaginationError("limit must be positive.")
+        limit = min(limit, max_limit)
+    return limit, request.args.get('cursor')
+
+
+def stream_json_array(items, headers=None):
+    """
+    Streams an iterable of dicts as a JSON array, one element at a time, so the
+    full result never has to be held in memory.
+    """
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield '['
+        first = True
+        for item in items:
+            if not first:
+                yield ','
+            first = False
+            yield dumps(item)
+        yield ']'
+
+    return Response(stream_with_context(generate()), mimetype='application/json', headers=headers)
+
+
+def keyset_filter(columns, values, descending=False):
+    """
+    Builds the WHERE clause for rows that come strictly after `values` in the
+    (columns) sort order, e.g. (a > x) OR (a = x AND b > y). descending is
+    one flag for every column or a sequence of flags, one per column.
+    """
+    if isinstance(descending, bool):
+        descending = [descending] * len(columns)
+    clauses = []
+    for i, column in enumerate(columns):
+        equal = [c == v for c, v in zip(columns[:i], values[:i])]
+        beyond = column < values[i] if descending[i] else column > values[i]
+        clauses.append(and_(*equal, beyond))
+    return or_(*clauses)
+
+
+def paged_json_response(query, limit, to_dict, cursor_of):
+    """
+    Runs an ordered query and streams it as a JSON array. With a limit, one
+    extra row is fetched to tell whether another page exists, and its cursor
+    (built by cursor_of from the last row) is sent in X-Next-Cursor. Without a
+    limit the whole result is streamed in chunks.
+    """
+    if limit is None:
+        return stream_json_array(to_dict(row) for row in _stream_rows(query))
+
+    rows = query.limit(limit + 1).all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers['X-Next-Cursor'] = encode_cursor(*cursor_of(rows[-1]))
+    return stream_json_array((to_dict(row) for row in rows), headers=headers)
+
+
+def _stream_rows(query, chunk_size=1000):
+    """
+    Yields the query's rows in chunks while the body is sent. By then the
+    request teardown has already removed the view's session from the scoped
+    registry, so the query's own session is closed here to check its
+    connection back into the pool.
+    """
+    try:
+        yield from query.yield_per(chunk_size)
+    finally:
+        query.session.close()
@@ -1,160 +1,581 @@
 # backend/routes/user_routes.py
 
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, Response, current_app, request, jsonify, send_from_directory, url_for
 from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from datetime import datetime
-import math
 
 from backend.models.users import db, User
-from backend.models.parking import ParkingLot, ParkingSpot, Booking
-from backend.tasks.reports import export_parking_history_csv  # Adjust path if moved to tasks/exports.py
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, Reservation
+from backend.services.active_bookings import active_bookings
+from backend.services.allocator import spot_allocator
+from backend.services.auth import auth_required, current_principal, current_user_id
+from backend.services.events import occupancy_events, OCCUPANT_FIELDS
+from backend.services.lot_list import lot_list_response
+from backend.services.lot_search import search_query, search_cursor
+from backend.services.metrics import query_budget
+from backend.services.rate_limit import rate_limiter, by_user
+from backend.services.reservations import (
+    reservation_index, get_window, ReservationWindowError, MAX_RESERVE_ATTEMPTS
+)
+from backend.routes.pagination import (
+    PaginationError, get_page_args, decode_cursor, keyset_filter, paged_json_response
+)
+from backend.tasks.exports import export_parking_history_csv, export_dir, artifact_owner
+from backend.tasks.lots import CLOSING
 from backend.celery_app import celery
 from celery.result import AsyncResult
 
 user_bp = Blueprint('user_bp', __name__)
 
+# Default number of lots per search page
+LOT_SEARCH_PAGE_SIZE = 20
+
 # --- User Dashboard and Booking ---
 
 @user_bp.route('/lots', methods=['GET'])
-@jwt_required()
+@auth_required()
+@query_budget(1)
 def get_available_lots():
-    """User: View all parking lots and their availability."""
-    lots = ParkingLot.query.all()
-    return jsonify([lot.to_dict() for lot in lots]), 200
+    """User: View all parking lots and their availability (cached, with ETag/304)."""
+    return lot_list_response()
+
+
+@user_bp.route('/lots/search', methods=['GET'])
+@auth_required()
+@query_budget(3)
+def search_parking_lots():
+    """
+    User: Find lots by ?q= (start of a word in the name or address), ?pin_code=
+    and ?min_available= free spots; most free spots first, then cheapest.
+    Paged by ?limit= (default 20) and ?cursor= (see X-Next-Cursor).
+    """
+    try:
+        limit, cursor = get_page_args(default_limit=LOT_SEARCH_PAGE_SIZE)
+        after = decode_cursor(cursor, int, float, int) if cursor else None
+    except PaginationError as e:
+        return jsonify(msg=str(e)), 400
+    min_available = request.args.get('min_available', 0, type=int)
+    if min_available < 0:
+        return jsonify(msg="min_available must be a non-negative integer."), 400
+
+    query = search_query(
+        text=request.args.get('q', '').strip(),
+        pin_code=request.args.get('pin_code', '').strip(),
+        min_available=min_available,
+        after=after,
+        limit=limit
+    )
+    return paged_json_response(query, limit, ParkingLot.row_to_dict, search_cursor)
 
 
 @user_bp.route('/book/<int:lot_id>', methods=['POST'])
-@jwt_required()
+@auth_required()
+@rate_limiter.limit('book', key=by_user)
 def book_spot(lot_id):
     """User: Book the first available spot in a chosen lot."""
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
 
-    # Check if the user already has an active booking
-    active_booking = Booking.query.filter_by(user_id=user_id, park_out_time=None).first()
-    if active_booking:
+    if _has_active_booking(user_id):
         return jsonify(msg="You already have an active booking."), 409
 
-    # Find the first available spot in the specified lot
-    parking_spot = ParkingSpot.query.filter_by(lot_id=lot_id, status='Available').first()
-    if not parking_spot:
+    # Atomically claim a free spot; concurrent requests can never get the same one
+    spot_id = spot_allocator.claim(lot_id)
+    if spot_id is None:
+        db.session.rollback()
         return jsonify(msg="Sorry, no available spots in this parking lot."), 404
 
-    # Change spot status and create a new booking record
-    parking_spot.status = 'Occupied'
-    new_booking = Booking(user_id=user_id, spot_id=parking_spot.id)
-    db.session.add(new_booking)
-    db.session.commit()
+    booking_details = _open_booking(user_id, lot_id, spot_id)
+    if booking_details is None:
+        return jsonify(msg="You already have an active booking."), 409
 
     return jsonify(
         msg="Spot booked successfully!", 
-        booking_details=new_booking.to_dict()
+        booking_details=booking_details
     ), 201
 
 
+def _has_active_booking(user_id):
+    """
+    Whether the user already has an active booking. The index is confirmed
+    against the database before refusing, and repaired if it was stale.
+    """
+    if active_bookings.for_user(user_id):
+        still_open = db.session.query(Booking.id).filter_by(user_id=user_id, park_out_time=None).first()
+        if still_open:
+            return True
+        active_bookings.refresh_user(user_id)
+    return False
+
+
+def _open_booking(user_id, lot_id, spot_id):
+    """
+    Books a spot already claimed in the current transaction: updates the lot
+    counters, creates the booking and commits, then records it in the
+    active-booking index and publishes 'spot_booked'. Returns the booking's
+    to_dict(), or None (rolled back) when a concurrent request of the same
+    user won the one-active-booking index.
+    """
+    # Update the lot counters and create a new booking record
+    ParkingLot.adjust_counters(lot_id, available=-1, occupied=1)
+    new_booking = Booking(user_id=user_id, spot_id=spot_id)
+    db.session.add(new_booking)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # A concurrent request of the same user won the one-active-booking index
+        db.session.rollback()
+        spot_allocator.release(lot_id, spot_id)
+        active_bookings.refresh_user(user_id)
+        return None
+    except SQLAlchemyError:
+        db.session.rollback()
+        spot_allocator.release(lot_id, spot_id)
+        raise
+
+    booking_details = new_booking.to_dict()
+    active_bookings.booked(booking_details, current_principal().username)
+    occupancy_events.publish(
+        'spot_booked',
+        lot_id=lot_id,
+        spot_id=spot_id,
+        booking_id=new_booking.id,
+        user_id=new_booking.user_id,
+        username=current_principal().username,
+        park_in_time=new_booking.park_in_time.isoformat(),
+        **_lot_counters(lot_id)
+    )
+    return booking_details
+
+
 @user_bp.route('/booking/active', methods=['GET'])
-@jwt_required()
+@auth_required()
+@query_budget(1)
 def get_active_booking():
-    """User: View their current active booking details."""
-    user_id = get_jwt_identity()
-    active_booking = Booking.query.filter_by(user_id=user_id, park_out_time=None).first()
+    """User: View their current active booking details (from the active-booking index)."""
+    active_booking = active_bookings.for_user(current_user_id())
 
     if not active_booking:
         return jsonify(msg="No active booking found."), 404
         
-    return jsonify(active_booking.to_dict()), 200
+    return jsonify(active_booking), 200
 
 
 @user_bp.route('/booking/release', methods=['POST'])
-@jwt_required()
+@auth_required()
+@query_budget(4)
 def release_spot():
     """User: Release their spot, calculate cost, and end the booking."""
-    user_id = get_jwt_identity()
-    
-    # Find the active booking for the user
-    booking = Booking.query.filter_by(user_id=user_id, park_out_time=None).first()
-    if not booking:
+    # Closes, prices and frees in three guarded UPDATEs (a fourth query only if
+    # the spot was not marked Occupied); of two concurrent releases of the same
+    # booking only one can match it
+    released = Booking.close_active(current_user_id())
+    if released is None:
+        db.session.rollback()
         return jsonify(msg="No active booking to release."), 404
 
-    # Update booking details
-    booking.park_out_time = datetime.utcnow()
-    
-    # Calculate cost
-    duration_seconds = (booking.park_out_time - booking.park_in_time).total_seconds()
-    duration_hours = math.ceil(duration_seconds / 3600)  # Round up to the next hour
-    price_per_hour = booking.spot.lot.price_per_hour
-    booking.cost = duration_hours * price_per_hour
-
-    # Update the spot status back to 'Available'
-    booking.spot.status = 'Available'
-    
+    receipt, lot_id, counters = released
     db.session.commit()
+    active_bookings.released(receipt["user_id"])
+    spot_allocator.release(lot_id, receipt["spot_id"])
+    occupancy_events.publish(
+        'spot_released',
+        lot_id=lot_id,
+        spot_id=receipt["spot_id"],
+        booking_id=receipt["id"],
+        **counters
+    )
 
     return jsonify(
         msg="Parking spot released successfully.",
-        receipt=booking.to_dict()
+        receipt=receipt
     ), 200
 
 
+def _lot_counters(lot_id):
+    """
+    The lot's counters as committed, sent along with spot events so clients can
+    set them directly rather than apply +1/-1 deltas that might be counted twice.
+    """
+    available, occupied = db.session.query(
+        ParkingLot.available_spots, ParkingLot.occupied_spots
+    ).filter(ParkingLot.id == lot_id).one()
+    return {"available_spots": available, "occupied_spots": occupied}
+
+
+# --- Advance Reservations ---
+
+@user_bp.route('/reserve/<int:lot_id>', methods=['POST'])
+@auth_required()
+@rate_limiter.limit('book', key=by_user)
+def reserve_spot(lot_id):
+    """
+    User: Reserve a spot for {"start_time", "end_time"} (UTC). The lowest
+    numbered spot free for the whole window is taken from the lot's
+    reservation schedule; the database rejects any overlap it missed.
+    """
+    user_id = current_user_id()
+    try:
+        start, end = get_window(request.get_json(silent=True) or {})
+    except ReservationWindowError as e:
+        return jsonify(msg=str(e)), 400
+
+    closing = db.session.query(
+        db.exists().where(ParkingSpot.lot_id == ParkingLot.id, ParkingSpot.status == CLOSING)
+    ).filter(ParkingLot.id == lot_id).first()
+    if closing is None:
+        return jsonify(msg="Parking lot not found."), 404
+    if closing[0]:
+        return jsonify(msg="This parking lot is being deleted."), 409
+    overlapping = db.session.query(Reservation.id).filter(
+        Reservation.user_id == user_id,
+        Reservation.live(),
+        Reservation.start_time < end,
+        Reservation.end_time > start
+    ).first()
+    if overlapping:
+        return jsonify(msg="You already have a reservation during that time."), 409
+
+    # A window starting within the hold cannot wait for today's occupants to leave
+    skip = set()
+    if start < datetime.utcnow() + spot_allocator.hold:
+        skip = {spot_id for spot_id, in db.session.query(ParkingSpot.id).filter(
+            ParkingSpot.lot_id == lot_id, ParkingSpot.status != 'Available'
+        )}
+
+    for _ in range(MAX_RESERVE_ATTEMPTS):
+        spot_id = reservation_index.first_free(lot_id, start, end, skip)
+        if spot_id is None:
+            db.session.rollback()
+            return jsonify(msg="Sorry, no spot in this parking lot is free for that time."), 409
+
+        reservation = Reservation(user_id=user_id, spot_id=spot_id, start_time=start, end_time=end)
+        db.session.add(reservation)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Reserved meanwhile by a request this worker's schedule has not seen yet
+            db.session.rollback()
+            reservation_index.invalidate(lot_id)
+            continue
+
+        reservation_index.reserved(lot_id, spot_id, reservation.id, start, end)
+        return jsonify(msg="Spot reserved successfully!", reservation=reservation.to_dict()), 201
+
+    return jsonify(msg="The parking lot is busy, please try again."), 409
+
+
+@user_bp.route('/reservations', methods=['GET'])
+@auth_required()
+@query_budget(1)
+def get_reservations():
+    """User: Their reservations that have not ended yet, soonest first."""
+    reservations = Reservation.query.options(joinedload(Reservation.spot)).filter(
+        Reservation.user_id == current_user_id(),
+        Reservation.end_time > datetime.utcnow(),
+        Reservation.live()
+    ).order_by(Reservation.start_time)
+    return jsonify([reservation.to_dict() for reservation in reservations]), 200
+
+
+@user_bp.route('/reservations/<int:reservation_id>', methods=['DELETE'])
+@auth_required()
+@query_budget(3)
+def cancel_reservation(reservation_id):
+    """User: Cancel a reservation that has not been checked in to."""
+    reservation = _own_reservation(reservation_id)
+    if reservation is None:
+        return jsonify(msg="Reservation not found."), 404
+
+    # Guarded, so a concurrent check-in or cancel of the same reservation wins or loses as a whole
+    cancelled = db.session.execute(
+        db.update(Reservation)
+        .where(Reservation.id == reservation.id, Reservation.status == Reservation.RESERVED)
+        .values(status=Reservation.CANCELLED)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not cancelled:
+        db.session.rollback()
+        return jsonify(msg="Only reservations that have not been checked in to can be cancelled."), 409
+
+    lot_id, spot_id, start = reservation.spot.lot_id, reservation.spot_id, reservation.start_time
+    db.session.commit()
+    reservation_index.cancelled(lot_id, spot_id, reservation_id, start)
+    return jsonify(msg="Reservation cancelled."), 200
+
+
+@user_bp.route('/reservations/<int:reservation_id>/check-in', methods=['POST'])
+@auth_required()
+def check_in_reservation(reservation_id):
+    """
+    User: Start parking on the reserved spot, from RESERVATION_HOLD_MINUTES
+    before the reservation starts until it ends. This opens an ordinary
+    booking, released and priced like any other. If a walk-in is still on
+    the reserved spot, the reservation moves to another spot of the lot that
+    is free until it ends.
+    """
+    user_id = current_user_id()
+    reservation = _own_reservation(reservation_id)
+    if reservation is None:
+        return jsonify(msg="Reservation not found."), 404
+    if reservation.status != Reservation.RESERVED:
+        return jsonify(msg="This reservation has already been checked in to or cancelled."), 409
+
+    now = datetime.utcnow()
+    if now < reservation.start_time - spot_allocator.hold:
+        return jsonify(msg=f"Check-in opens at {(reservation.start_time - spot_allocator.hold).isoformat()}."), 409
+    if now >= reservation.end_time:
+        return jsonify(msg="This reservation has ended."), 409
+    if _has_active_booking(user_id):
+        return jsonify(msg="You already have an active booking."), 409
+
+    lot_id, reserved_spot_id = reservation.spot.lot_id, reservation.spot_id
+    start, end = reservation.start_time, reservation.end_time
+    spot_id = reserved_spot_id
+    claimed = db.session.execute(
+        db.update(ParkingSpot)
+        .where(ParkingSpot.id == spot_id, ParkingSpot.status == 'Available')
+        .values(status='Occupied')
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not claimed:
+        # Taken by a walk-in before the hold began, who has not left yet; the
+        # stay from now (early check-ins included) to the end needs a free spot
+        spot_id = _claim_reservable_spot(lot_id, min(now, start), end)
+        if spot_id is None:
+            db.session.rollback()
+            return jsonify(msg="Your reserved spot is still occupied and no other spot is free, please try again shortly."), 409
+    try:
+        checked_in = db.session.execute(
+            db.update(Reservation)
+            .where(Reservation.id == reservation_id, Reservation.status == Reservation.RESERVED)
+            .values(status=Reservation.CHECKED_IN, spot_id=spot_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+    except IntegrityError:
+        # The new spot was reserved for an overlapping window meanwhile
+        db.session.rollback()
+        reservation_index.invalidate(lot_id)
+        return jsonify(msg="Your reserved spot is still occupied, please try again shortly."), 409
+    if not checked_in:
+        db.session.rollback()
+        return jsonify(msg="This reservation has already been checked in to or cancelled."), 409
+
+    booking_details = _open_booking(user_id, lot_id, spot_id)
+    if booking_details is None:
+        return jsonify(msg="You already have an active booking."), 409
+
+    if spot_id != reserved_spot_id:
+        reservation_index.cancelled(lot_id, reserved_spot_id, reservation_id, start)
+        reservation_index.reserved(lot_id, spot_id, reservation_id, start, end)
+    return jsonify(msg="Checked in successfully!", booking_details=booking_details), 201
+
+
+def _claim_reservable_spot(lot_id, start, end):
+    """
+    Marks the lowest-numbered available spot of the lot with no live
+    reservation overlapping [start, end) as 'Occupied' in the current
+    transaction, picked from the reservation schedule and re-checked in SQL.
+    Returns its id, or None when there is none.
+    """
+    skip = {spot_id for spot_id, in db.session.query(ParkingSpot.id).filter(
+        ParkingSpot.lot_id == lot_id, ParkingSpot.status != 'Available'
+    )}
+    for _ in range(MAX_RESERVE_ATTEMPTS):
+        spot_id = reservation_index.first_free(lot_id, start, end, skip)
+        if spot_id is None:
+            return None
+        claimed = db.session.execute(
+            db.update(ParkingSpot)
+            .where(
+                ParkingSpot.id == spot_id,
+                ParkingSpot.status == 'Available',
+                ~Reservation.holding(spot_id, start, end)
+            )
+            .values(status='Occupied')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed:
+            return spot_id
+        # Booked or reserved meanwhile
+        skip.add(spot_id)
+    return None
+
+
+def _own_reservation(reservation_id):
+    """The current user's reservation with its spot loaded, or None."""
+    return Reservation.query.options(joinedload(Reservation.spot)).filter(
+        Reservation.id == reservation_id, Reservation.user_id == current_user_id()
+    ).first()
+
+
+@user_bp.route('/events', methods=['GET'])
+@auth_required(locations=['headers', 'query_string'])
+def occupancy_event_stream():
+    """
+    Server-sent events with occupancy deltas (spot_booked, spot_released,
+    lot_created, lots_imported, lot_updated, lot_deleted). Dashboards load a snapshot once and
+    then apply these, instead of re-fetching lots, spots and the summary.
+    Only admins receive who occupies a spot (OCCUPANT_FIELDS); users get the
+    spot and the lot counters. The token may be passed as ?jwt= since
+    EventSource cannot set headers.
+
+    Every open stream holds its worker thread for as long as the dashboard
+    stays open, so serve the app with a threaded or async worker class
+    (e.g. gunicorn --worker-class gthread --threads N, or gevent), not sync
+    workers.
+    """
+    admin = current_principal().role == 'admin'
+    subscription = occupancy_events.subscribe()
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT_SECONDS', 15)
+    dumps = current_app.json.dumps
+
+    def generate():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                message = subscription.get(timeout=heartbeat)
+                if message is None:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    continue
+                data = message['data']
+                if not admin:
+                    data = {key: value for key, value in data.items() if key not in OCCUPANT_FIELDS}
+                yield f"event: {message['type']}\ndata: {dumps(data)}\n\n"
+        except EOFError:
+            return
+        finally:
+            subscription.close()
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
 # --- User Dashboard Data ---
 
 @user_bp.route('/dashboard/summary', methods=['GET'])
-@jwt_required()
+@auth_required()
+@query_budget(2)
 def get_user_dashboard_summary():
     """User: Get summary data for their personal dashboard."""
-    user_id = get_jwt_identity()
+    user_id = current_user_id()
     
-    # Total bookings and total spent
+    # Total bookings and total spent, archived bookings included
+    bookings = Booking.history_source(Booking.user_id == user_id)
     user_stats = db.session.query(
-        func.count(Booking.id).label('total_bookings'),
-        func.sum(Booking.cost).label('total_spent')
-    ).filter(Booking.user_id == user_id).first()
+        func.count(bookings.c.id).label('total_bookings'),
+        func.sum(bookings.c.cost).label('total_spent')
+    ).first()
 
     # Most recent booking
-    recent_booking = Booking.query.filter_by(user_id=user_id).order_by(Booking.park_in_time.desc()).first()
+    recent = Booking.history_source(Booking.user_id == user_id, limit=1)
+    recent_booking = Booking.history_query(recent).order_by(
+        recent.c.park_in_time.desc(), recent.c.id.desc()
+    ).first()
 
     return jsonify({
         "total_bookings": user_stats.total_bookings or 0,
         "total_spent": user_stats.total_spent or 0.0,
-        "recent_booking": recent_booking.to_dict() if recent_booking else None
+        "recent_booking": Booking.history_row_to_dict(recent_booking) if recent_booking else None
     }), 200
 
 
 @user_bp.route('/history', methods=['GET'])
-@jwt_required()
+@auth_required()
+@query_budget(1)
 def get_booking_history():
-    """User: Get their own completed booking history."""
-    user_id = get_jwt_identity()
+    """
+    User: Get their own completed booking history, newest first.
+    Paged like /admin/bookings: ?limit= and ?cursor= (see X-Next-Cursor), or ?stream=true.
+    """
+    user_id = current_user_id()
+
+    try:
+        limit, cursor = get_page_args(default_limit=Booking.HISTORY_PAGE_SIZE)
+        after = decode_cursor(cursor, datetime.fromisoformat, int) if cursor else None
+    except PaginationError as e:
+        return jsonify(msg=str(e)), 400
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        limit = None
     
-    history = Booking.query.filter(
-        Booking.user_id == user_id,
-        Booking.park_out_time.isnot(None)
-    ).order_by(Booking.park_out_time.desc()).all()
+    criteria = [Booking.user_id == user_id, Booking.park_out_time.isnot(None)]
+    if after:
+        criteria.append(keyset_filter((Booking.park_in_time, Booking.id), after, descending=True))
+
+    # Live and archived bookings, each table read up to one page deep
+    history = Booking.history_source(*criteria, limit=limit + 1 if limit else None)
+    query = Booking.history_query(history).order_by(history.c.park_in_time.desc(), history.c.id.desc())
     
-    return jsonify([b.to_dict() for b in history]), 200
+    return paged_json_response(query, limit, Booking.history_row_to_dict, Booking.history_cursor)
 
 
 # --- CSV Export Trigger and Task Status ---
 
 @user_bp.route('/export/csv', methods=['POST'])
-@jwt_required()
+@auth_required()
 def trigger_csv_export():
-    """User: Trigger an asynchronous CSV export of their parking history."""
-    user_id = get_jwt_identity()
-    task = export_parking_history_csv.delay(user_id)
+    """
+    User: Trigger an asynchronous CSV export of their parking history.
+    Send {"gzip": true} for a compressed file; poll /task/status for the link.
+    """
+    user_id = current_user_id()
+    data = request.get_json(silent=True) or {}
+    compress = bool(data.get('gzip', current_app.config.get('EXPORT_GZIP', False)))
+    task = export_parking_history_csv.delay(user_id, compress)
     return jsonify(
-        msg="Your parking history export has started. You will receive an email when it's ready.",
+        msg="Your parking history export has started. A download link will be available when it's ready.",
         task_id=task.id
     ), 202
 
 
+def _can_access_export(owner):
+    """Users may fetch their own exports; admins may fetch any."""
+    return current_principal().role == 'admin' or owner == str(current_user_id())
+
+
 @user_bp.route('/task/status/<task_id>', methods=['GET'])
-@jwt_required()
+@auth_required()
 def get_task_status(task_id):
-    """Check the status of a Celery background task."""
+    """
+    Check the status of a Celery background task. A finished export reports
+    its row count and a download link rather than the file itself; a running
+    lot deletion reports its progress.
+    """
     result = AsyncResult(task_id, app=celery)
+    value = None
+    if result.successful():
+        value = result.result
+        if isinstance(value, dict) and 'filename' in value:
+            if not _can_access_export(value.get('owner')):
+                return jsonify(msg="Task not found."), 404
+            value = {
+                "rows": value.get('rows'),
+                "filename": value['filename'],
+                "download_url": url_for('user_bp.download_export', filename=value['filename'])
+            }
+    elif result.failed():
+        value = str(result.result)
+    elif result.status == 'PROGRESS':
+        value = result.info
+
     return jsonify({
         "task_id": task_id,
         "status": result.status,
-        "result": result.result if result.ready() else None
+        "result": value
     }), 200
+
+
+@user_bp.route('/exports/<filename>', methods=['GET'])
+@auth_required()
+def download_export(filename):
+    """Download a finished CSV export from the artifact store."""
+    owner = artifact_owner(filename)
+    if owner is None or not _can_access_export(owner):
+        return jsonify(msg="Export not found."), 404
+
+    mimetype = 'application/gzip' if filename.endswith('.gz') else 'text/csv'
+    return send_from_directory(export_dir(), filename, mimetype=mimetype, as_attachment=True)
@@ -0,0 +1,340 @@
+# backend/services/active_bookings.py
+
+import random
+import threading
+import time
+from flask import current_app
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.extensions import cache
+from backend.models.users import User
+from backend.models.parking import Booking
+
+VERSION_CACHE_KEY = 'active_bookings_version'
+# Cache types that live inside one process, so the version counter is not shared
+PER_PROCESS_CACHE_TYPES = ('simplecache', 'simple', 'nullcache', 'null')
+
+
+class LocalActiveBookings:
+    """
+    Open bookings by user and occupants by spot, kept in this process's
+    memory. Every write advances a counter in the shared cache; maps built
+    at an older value missed another worker's write, so they count as cold
+    and are reloaded on the next lookup.
+    """
+
+    def __init__(self):
+        self._version = None  # shared counter value the maps are current at, None when cold
+        self._generation = 0  # bumped by every write, so a load can tell it raced one
+        self._users = {}  # user_id -> booking summary
+        self._spots = {}  # spot_id -> occupant
+        self._lock = threading.Lock()
+
+    def is_loaded(self):
+        return self._version is not None and self._version == cache.get(VERSION_CACHE_KEY)
+
+    def generation(self):
+        return self._generation, _shared_version()
+
+    def load(self, entries, generation):
+        local, shared = generation
+        with self._lock:
+            # A write by this process or any other since generation() makes the entries suspect
+            if local != self._generation or shared is None or shared != cache.get(VERSION_CACHE_KEY):
+                return False
+            self._users = {summary["user_id"]: summary for summary, _ in entries}
+            self._spots = {summary["spot_id"]: occupant for summary, occupant in entries}
+            self._version = shared
+            return True
+
+    def get_user(self, user_id):
+        return self._users.get(user_id)
+
+    def get_spot(self, spot_id):
+        return self._spots.get(spot_id)
+
+    def put(self, summary, occupant):
+        def change():
+            self._users[summary["user_id"]] = summary
+            self._spots[summary["spot_id"]] = occupant
+        self._write(change)
+
+    def discard(self, user_id):
+        def change():
+            summary = self._users.pop(user_id, None)
+            if summary is not None:
+                self._spots.pop(summary["spot_id"], None)
+        self._write(change)
+
+    def _write(self, change):
+        with self._lock:
+            self._generation += 1
+            # Cold until the shared counter confirms it, in case the cache call fails
+            current, self._version = self._version, None
+        version = _advance_version()
+        with self._lock:
+            if current is not None and version == current + 1:
+                # Nobody else wrote since the maps were current, so they stay current
+                change()
+                self._version = version
+            else:
+                self._users, self._spots, self._version = {}, {}, None
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._users, self._spots, self._version = {}, {}, None
+        # Every other worker's maps go cold too
+        _advance_version()
+
+
+def _advance_version():
+    # Flask-Caching does not proxy inc(); the backend's is an atomic INCR on Redis
+    return cache.cache.inc(VERSION_CACHE_KEY)
+
+
+def _shared_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # First use, or the cache was flushed: start at a random value no old map can match
+        cache.add(VERSION_CACHE_KEY, random.getrandbits(48), timeout=0)
+        version = cache.get(VERSION_CACHE_KEY)
+    return version
+
+
+class RedisActiveBookings:
+    """The same two maps as Redis hashes of JSON values, shared by every worker."""
+
+    USERS_KEY = 'parking:active:users'
+    SPOTS_KEY = 'parking:active:spots'
+    LOADED_KEY = 'parking:active:loaded'
+    GENERATION_KEY = 'parking:active:generation'
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def is_loaded(self):
+        return bool(self._redis.exists(self.LOADED_KEY))
+
+    def generation(self):
+        return int(self._redis.get(self.GENERATION_KEY) or 0)
+
+    def load(self, entries, generation):
+        import redis
+        dumps = current_app.json.dumps
+        with self._redis.pipeline() as pipe:
+            try:
+                pipe.watch(self.GENERATION_KEY)
+                if int(pipe.get(self.GENERATION_KEY) or 0) != generation:
+                    return False
+                pipe.multi()
+                pipe.delete(self.USERS_KEY, self.SPOTS_KEY)
+                if entries:
+                    pipe.hset(self.USERS_KEY, mapping={
+                        summary["user_id"]: dumps(summary) for summary, _ in entries})
+                    pipe.hset(self.SPOTS_KEY, mapping={
+                        summary["spot_id"]: dumps(occupant) for summary, occupant in entries})
+                pipe.set(self.LOADED_KEY, 1)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def get_user(self, user_id):
+        value = self._redis.hget(self.USERS_KEY, user_id)
+        return current_app.json.loads(value) if value is not None else None
+
+    def get_spot(self, spot_id):
+        value = self._redis.hget(self.SPOTS_KEY, spot_id)
+        return current_app.json.loads(value) if value is not None else None
+
+    def put(self, summary, occupant):
+        dumps = current_app.json.dumps
+        pipe = self._redis.pipeline()
+        pipe.incr(self.GENERATION_KEY)
+        pipe.hset(self.USERS_KEY, summary["user_id"], dumps(summary))
+        pipe.hset(self.SPOTS_KEY, summary["spot_id"], dumps(occupant))
+        pipe.execute()
+
+    def discard(self, user_id):
+        summary = self.get_user(user_id)
+        pipe = self._redis.pipeline()
+        pipe.incr(self.GENERATION_KEY)
+        pipe.hdel(self.USERS_KEY, user_id)
+        if summary is not None:
+            pipe.hdel(self.SPOTS_KEY, summary["spot_id"])
+        pipe.execute()
+
+    def invalidate(self):
+        pipe = self._redis.pipeline()
+        pipe.incr(self.GENERATION_KEY)
+        pipe.delete(self.USERS_KEY, self.SPOTS_KEY, self.LOADED_KEY)
+        pipe.execute()
+
+
+class ActiveBookingIndex:
+    """
+    Write-through map of open bookings: user -> booking summary (shaped like
+    Booking.to_dict()) and spot -> occupant, so "current booking" and "who is
+    parked here" need no SQL. Booking and release update it after their
+    commit. A cold or stale map is reloaded on a background thread (at most
+    one per process, and no more often than ACTIVE_BOOKINGS_REBUILD_SECONDS)
+    or by 'flask rebuild-active-bookings'; until then lookups run the single
+    indexed query the map replaces, so a request never scans all open
+    bookings. The local map notices other workers' writes through a counter
+    in the shared cache, so several workers need a shared CACHE_TYPE
+    (RedisCache); ACTIVE_BOOKINGS_BACKEND=redis shares one map instead.
+
+    The database stays the authority: the one-open-booking-per-user unique
+    index still decides every booking, and errors from the map fall back to
+    a query.
+    """
+
+    def __init__(self, app=None):
+        self.store = LocalActiveBookings()
+        self.rebuild_interval = 5.0
+        self._rebuilding = False
+        self._last_rebuild = 0.0
+        self._rebuild_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('ACTIVE_BOOKINGS_BACKEND') == 'redis':
+            self.store = RedisActiveBookings(app.config['CACHE_REDIS_URL'])
+        else:
+            self.store = LocalActiveBookings()
+            cache_type = str(app.config.get('CACHE_TYPE', 'SimpleCache')).rsplit('.', 1)[-1].lower()
+            if cache_type in PER_PROCESS_CACHE_TYPES and not (app.debug or app.testing):
+                app.logger.warning(
+                    "ACTIVE_BOOKINGS_BACKEND=local with CACHE_TYPE=%s: other workers' bookings are "
+                    "never seen. Run a single worker, or set CACHE_TYPE=RedisCache or "
+                    "ACTIVE_BOOKINGS_BACKEND=redis.", app.config.get('CACHE_TYPE'))
+        self.rebuild_interval = app.config.get('ACTIVE_BOOKINGS_REBUILD_SECONDS', self.rebuild_interval)
+        app.extensions['active_bookings'] = self
+
+    # --- Lookups ---
+
+    def for_user(self, user_id):
+        """The user's open booking as a Booking.to_dict()-shaped dict, or None."""
+        try:
+            if self._ensure_loaded():
+                return self.store.get_user(user_id)
+        except SQLAlchemyError:
+            raise
+        except Exception as e:
+            print(f"Active booking index unavailable, using the database: {e}")
+        row = _open_bookings().filter(Booking.user_id == user_id).first()
+        return _entry(row)[0] if row else None
+
+    def occupant(self, spot_id):
+        """{"booking_id", "user_id", "park_in_time", "username"} for an occupied spot, or None."""
+        try:
+            if self._ensure_loaded():
+                return self.store.get_spot(spot_id)
+        except SQLAlchemyError:
+            raise
+        except Exception as e:
+            print(f"Active booking index unavailable, using the database: {e}")
+        row = _open_bookings().filter(Booking.spot_id == spot_id).first()
+        return _entry(row)[1] if row else None
+
+    def _ensure_loaded(self):
+        """Whether the map can answer; if not, a reload starts and the caller queries instead."""
+        if self.store.is_loaded():
+            return True
+        self._rebuild_in_background()
+        return False
+
+    def _rebuild_in_background(self):
+        with self._rebuild_lock:
+            now = time.monotonic()
+            if self._rebuilding or now - self._last_rebuild < self.rebuild_interval:
+                return
+            self._rebuilding, self._last_rebuild = True, now
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    self.rebuild()
+            except Exception as e:
+                print(f"Could not rebuild the active booking index: {e}")
+            finally:
+                self._rebuilding = False
+
+        threading.Thread(target=run, name='active-bookings-rebuild', daemon=True).start()
+
+    # --- Writes; call only after the change has been committed ---
+
+    def booked(self, summary, username):
+        """Records a new booking (its to_dict()) made by the user called username."""
+        if username is None:
+            self.refresh_user(summary["user_id"])
+        else:
+            self._write(self.store.put, summary, _occupant(summary, username))
+
+    def released(self, user_id):
+        self._write(self.store.discard, user_id)
+
+    def refresh_user(self, user_id):
+        """Re-reads one user's open booking, e.g. after the database disagreed with the map."""
+        row = _open_bookings().filter(Booking.user_id == user_id).first()
+        if row is None:
+            self._write(self.store.discard, user_id)
+        else:
+            self._write(self.store.put, *_entry(row))
+
+    def _write(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            # A map that may have missed a write is dropped and rebuilt on next use.
+            print(f"Could not update the active booking index: {e}")
+            self.invalidate()
+
+    def rebuild(self):
+        """
+        Reloads the whole map from the open bookings. Returns how many there
+        are, or None if a booking or release was recorded while they were
+        being read (the map then stays cold and a later lookup tries again).
+        """
+        generation = self.store.generation()
+        entries = [_entry(row) for row in _open_bookings()]
+        return len(entries) if self.store.load(entries, generation) else None
+
+    def on_occupancy_event(self, event_type, data):
+        """OccupancyEvents listener: a renamed lot changes its bookings' summaries."""
+        if event_type == 'lot_updated':
+            self.invalidate()
+
+    def invalidate(self):
+        try:
+            self.store.invalidate()
+        except Exception as e:
+            print(f"Could not invalidate the active booking index: {e}")
+
+
+def _open_bookings():
+    """Open bookings as history_query rows plus the occupant's username."""
+    return Booking.history_query().add_columns(User.username).outerjoin(
+        User, User.id == Booking.user_id
+    ).filter(Booking.park_out_time.is_(None))
+
+
+def _occupant(summary, username):
+    return {
+        "booking_id": summary["id"],
+        "user_id": summary["user_id"],
+        "park_in_time": summary["start_time"],
+        "username": username
+    }
+
+
+def _entry(row):
+    summary = Booking.history_row_to_dict(row[:-1])
+    return summary, _occupant(summary, row[-1])
+
+
+active_bookings = ActiveBookingIndex()
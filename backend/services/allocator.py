@@ -0,0 +1,200 @@
+# backend/services/allocator.py
+
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.models.users import db
+from backend.models.parking import ParkingSpot, Reservation
+from backend.services.reservations import reservation_index
+
+
+class LocalFreeList:
+    """Per-lot stacks of free spot ids kept in this process's memory."""
+
+    def __init__(self):
+        self._lots = {}
+        self._lock = threading.Lock()
+
+    def is_loaded(self, lot_id):
+        return lot_id in self._lots
+
+    def load(self, lot_id, spot_ids):
+        # Stored in reverse so that pop() hands out the lowest spot numbers first.
+        with self._lock:
+            self._lots[lot_id] = list(reversed(spot_ids))
+
+    def pop(self, lot_id):
+        with self._lock:
+            free = self._lots.get(lot_id)
+            return free.pop() if free else None
+
+    def push(self, lot_id, spot_id):
+        with self._lock:
+            free = self._lots.get(lot_id)
+            if free is not None:
+                free.append(spot_id)
+
+    def invalidate(self, lot_id):
+        with self._lock:
+            self._lots.pop(lot_id, None)
+
+
+class RedisFreeList:
+    """Per-lot sets of free spot ids shared by every worker through Redis."""
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(lot_id):
+        return f"parking:lot:{lot_id}:free"
+
+    @staticmethod
+    def _loaded_key(lot_id):
+        return f"parking:lot:{lot_id}:free:loaded"
+
+    def is_loaded(self, lot_id):
+        return bool(self._redis.exists(self._loaded_key(lot_id)))
+
+    def load(self, lot_id, spot_ids):
+        pipe = self._redis.pipeline()
+        pipe.delete(self._key(lot_id))
+        if spot_ids:
+            pipe.sadd(self._key(lot_id), *spot_ids)
+        pipe.set(self._loaded_key(lot_id), 1)
+        pipe.execute()
+
+    def pop(self, lot_id):
+        spot_id = self._redis.spop(self._key(lot_id))
+        return int(spot_id) if spot_id is not None else None
+
+    def push(self, lot_id, spot_id):
+        if self.is_loaded(lot_id):
+            self._redis.sadd(self._key(lot_id), spot_id)
+
+    def invalidate(self, lot_id):
+        self._redis.delete(self._key(lot_id), self._loaded_key(lot_id))
+
+
+class SpotAllocator:
+    """
+    Hands out free spots in a lot. Candidates come from a per-lot free list, so
+    a booking costs O(1) however large the lot is, and each candidate is claimed
+    with a conditional UPDATE (status 'Available' -> 'Occupied'). The database
+    therefore decides the single winner when several requests race for the same
+    spot, and a stale or missing free list only costs a retry, never a double
+    allocation. A local free list never hears of other workers' claims and
+    releases, so when it runs dry it is re-read from parking_spots once per
+    claim before the lot counts as full; if the free list is unreachable,
+    spots are looked up directly in parking_spots.
+
+    Spots with a reservation starting within the hold (RESERVATION_HOLD_MINUTES)
+    are passed over, so a walk-in does not take a spot somebody is about to
+    check in to; the claim itself re-checks that in SQL.
+    """
+
+    # How often the database fallback retries after losing a race.
+    MAX_FALLBACK_ATTEMPTS = 5
+
+    def __init__(self, app=None):
+        self.free_list = LocalFreeList()
+        self.hold = timedelta(minutes=15)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('SPOT_ALLOCATOR_BACKEND') == 'redis':
+            self.free_list = RedisFreeList(app.config['CACHE_REDIS_URL'])
+        else:
+            self.free_list = LocalFreeList()
+        self.hold = timedelta(minutes=app.config.get('RESERVATION_HOLD_MINUTES', 15))
+        app.extensions['spot_allocator'] = self
+
+    def claim(self, lot_id):
+        """
+        Marks one free spot of the lot as 'Occupied' in the current transaction.
+        Returns its id, or None when the lot has no available spot.
+        """
+        now = datetime.utcnow()
+        held_until = now + self.hold
+        held = []
+        try:
+            reloaded = not self.free_list.is_loaded(lot_id)
+            if reloaded:
+                self._load(lot_id)
+            while True:
+                spot_id = self.free_list.pop(lot_id)
+                if spot_id is None:
+                    if reloaded:
+                        # Just read from the database: every available spot is held or was taken
+                        return None
+                    # Ran dry: other workers' releases (and claims) only show up in the database
+                    self._load(lot_id)
+                    held.clear()  # the reload lists them again
+                    reloaded = True
+                    continue
+                if not reservation_index.is_free(lot_id, spot_id, now, held_until):
+                    # Free now but reserved soon; it goes back once the search is over
+                    held.append(spot_id)
+                    continue
+                if self._try_claim(spot_id, now, held_until):
+                    return spot_id
+        except SQLAlchemyError:
+            raise
+        except Exception as e:
+            # A broken free list backend must not stop bookings.
+            print(f"Spot free list unavailable, using the database: {e}")
+        finally:
+            for spot_id in held:
+                self.release(lot_id, spot_id)
+
+        for _ in range(self.MAX_FALLBACK_ATTEMPTS):
+            spot_id = db.session.query(ParkingSpot.id).filter(
+                ParkingSpot.lot_id == lot_id,
+                ParkingSpot.status == 'Available',
+                ~Reservation.holding(ParkingSpot.id, now, held_until)
+            ).order_by(ParkingSpot.spot_number).limit(1).scalar()
+            if spot_id is None:
+                return None
+            if self._try_claim(spot_id, now, held_until):
+                return spot_id
+        return None
+
+    def release(self, lot_id, spot_id):
+        """Returns a spot to the free list. Call only after the release has been committed."""
+        try:
+            self.free_list.push(lot_id, spot_id)
+        except Exception as e:
+            print(f"Could not return spot {spot_id} to the free list: {e}")
+
+    def invalidate(self, lot_id):
+        """Drops the lot's free list; it is rebuilt from the database on the next claim."""
+        try:
+            self.free_list.invalidate(lot_id)
+        except Exception as e:
+            print(f"Could not invalidate the free list of lot {lot_id}: {e}")
+
+    def _load(self, lot_id):
+        spot_ids = db.session.query(ParkingSpot.id).filter_by(
+            lot_id=lot_id, status='Available'
+        ).order_by(ParkingSpot.spot_number).all()
+        self.free_list.load(lot_id, [spot_id for (spot_id,) in spot_ids])
+
+    @staticmethod
+    def _try_claim(spot_id, now, held_until):
+        result = db.session.execute(
+            db.update(ParkingSpot)
+            .where(
+                ParkingSpot.id == spot_id,
+                ParkingSpot.status == 'Available',
+                ~Reservation.holding(spot_id, now, held_until)
+            )
+            .values(status='Occupied')
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+
+spot_allocator = SpotAllocator()
@@ -0,0 +1,104 @@
+# backend/services/analytics.py
+
+from datetime import datetime, timedelta
+from sqlalchemy import func
+
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+from backend.models.analytics import (
+    LotUsageHourly, LotUsageDaily, RollupWatermark, LOT_USAGE_ROLLUP, USAGE_COLUMNS
+)
+
+# granularity -> (rollup table, bucket length)
+GRANULARITIES = {
+    'hour': (LotUsageHourly, timedelta(hours=1)),
+    'day': (LotUsageDaily, timedelta(days=1)),
+}
+DEFAULT_RANGE_DAYS = 30
+# Longest series one request may ask for (a year of hours is 8784)
+MAX_POINTS = 10000
+
+
+class AnalyticsQueryError(ValueError):
+    """Raised for malformed start/end/granularity query parameters."""
+
+
+def get_series_args(args, now=None):
+    """
+    Reads ?start=, ?end= (ISO 8601 dates or datetimes, UTC), ?granularity=
+    (hour or day, default day) and ?lot_id=. The range defaults to the last
+    DEFAULT_RANGE_DAYS days and is widened to whole buckets.
+    Returns (start, end, granularity, lot_id).
+    """
+    granularity = args.get('granularity', 'day')
+    if granularity not in GRANULARITIES:
+        raise AnalyticsQueryError("granularity must be 'hour' or 'day'.")
+    step = GRANULARITIES[granularity][1]
+
+    try:
+        end = datetime.fromisoformat(args['end']) if args.get('end') else (now or datetime.utcnow())
+        start = datetime.fromisoformat(args['start']) if args.get('start') else end - timedelta(days=DEFAULT_RANGE_DAYS)
+    except ValueError:
+        raise AnalyticsQueryError("start and end must be ISO 8601 dates or datetimes.")
+    if start.tzinfo or end.tzinfo:
+        raise AnalyticsQueryError("start and end are UTC and must not carry a time zone offset.")
+    if start >= end:
+        raise AnalyticsQueryError("start must be before end.")
+
+    start = _floor(start, step)
+    last = _floor(end, step)
+    end = last if last == end else last + step
+    if (end - start) / step > MAX_POINTS:
+        raise AnalyticsQueryError(f"The range covers more than {MAX_POINTS} {granularity}s; use a coarser granularity.")
+    return start, end, granularity, args.get('lot_id', type=int)
+
+
+def usage_series(start, end, granularity, lot_id=None):
+    """
+    Reads the rollups (never bookings) for [start, end): returns (points,
+    up_to) where points are {"bucket", "bookings_started",
+    "bookings_completed", "occupied_minutes", "revenue"} for every bucket
+    up to the rollup watermark, zeros included, and up_to is that watermark
+    (None before the first rollup).
+    """
+    model, step = GRANULARITIES[granularity]
+    watermark = db.session.query(RollupWatermark.watermark).filter(
+        RollupWatermark.name == LOT_USAGE_ROLLUP
+    ).scalar()
+    if watermark is None:
+        return [], None
+
+    query = db.session.query(
+        model.bucket, *(func.sum(getattr(model, column)) for column in USAGE_COLUMNS)
+    ).filter(model.bucket >= start, model.bucket < min(end, watermark))
+    if lot_id:
+        query = query.filter(model.lot_id == lot_id)
+    figures = {row[0]: row[1:] for row in query.group_by(model.bucket)}
+
+    points = []
+    bucket = start
+    while bucket < min(end, watermark):
+        started, completed, minutes, revenue = figures.get(bucket, (0, 0, 0.0, 0.0))
+        points.append({
+            "bucket": bucket,
+            "bookings_started": started,
+            "bookings_completed": completed,
+            "occupied_minutes": round(minutes, 2),
+            "revenue": round(revenue, 2)
+        })
+        bucket += step
+    return points, watermark
+
+
+def total_capacity(lot_id=None):
+    """Current number of spots, of one lot or of all lots."""
+    query = db.session.query(func.coalesce(func.sum(ParkingLot.capacity), 0))
+    if lot_id:
+        query = query.filter(ParkingLot.id == lot_id)
+    return query.scalar()
+
+
+def _floor(moment, step):
+    if step >= timedelta(days=1):
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
@@ -0,0 +1,133 @@
+# backend/services/auth.py
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import NamedTuple, Optional
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt, verify_jwt_in_request
+
+
+class Principal(NamedTuple):
+    """Who a verified access token belongs to."""
+    user_id: int
+    role: str
+    username: Optional[str]
+    expires_at: Optional[float]
+
+
+class PrincipalCache:
+    """
+    A bounded LRU of token hash -> Principal. A token is only ever cached after
+    flask_jwt_extended has verified its signature and claims, and an entry is
+    dropped once the token's exp has passed, so a hit is exactly as valid as a
+    full decode would have been.
+    """
+
+    def __init__(self, app=None, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.maxsize = app.config.get('JWT_PRINCIPAL_CACHE_SIZE', self.maxsize)
+        self.clear()
+        app.extensions['principal_cache'] = self
+
+    def get(self, key, now=None):
+        with self._lock:
+            principal = self._entries.get(key)
+            if principal is None:
+                return None
+            if principal.expires_at is not None and principal.expires_at <= (now or time.time()):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return principal
+
+    def put(self, key, principal):
+        with self._lock:
+            self._entries[key] = principal
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def _raw_token(locations=None):
+    """The encoded token from the Authorization header or, where allowed, ?jwt=."""
+    config = current_app.config
+    header = request.headers.get(config.get('JWT_HEADER_NAME', 'Authorization'), '')
+    header_type = config.get('JWT_HEADER_TYPE', 'Bearer')
+    if header_type and header.startswith(header_type + ' '):
+        return header[len(header_type) + 1:].strip()
+    if not header_type and header:
+        return header.strip()
+    if 'query_string' in (locations or config.get('JWT_TOKEN_LOCATION', ())):
+        return request.args.get(config.get('JWT_QUERY_STRING_NAME', 'jwt'))
+    return None
+
+
+def authenticate(locations=None):
+    """
+    Returns the request's Principal and stores it on g. The token is fully
+    verified only the first time it is seen; after that principal_cache
+    answers. locations overrides JWT_TOKEN_LOCATION for this request. A
+    missing or invalid token raises the usual flask_jwt_extended errors
+    (401/422 responses).
+    """
+    token = _raw_token(locations)
+    key = hashlib.sha256(token.encode()).digest() if token else None
+    principal = principal_cache.get(key) if key else None
+    if principal is None:
+        verify_jwt_in_request(locations=locations)
+        claims = get_jwt()
+        principal = Principal(
+            user_id=int(claims['sub']),
+            role=claims.get('role'),
+            username=claims.get('username'),
+            expires_at=claims.get('exp')
+        )
+        if key:
+            principal_cache.put(key, principal)
+
+    g.principal = principal
+    return principal
+
+
+def auth_required(role=None, locations=None):
+    """
+    Like jwt_required(), but served from principal_cache on repeat tokens.
+    With role, other roles get a 403; locations (e.g. ['headers',
+    'query_string']) widens where this route alone looks for the token.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            principal = authenticate(locations)
+            if role is not None and principal.role != role:
+                return jsonify(msg=f"{role.capitalize()}s only! Access forbidden."), 403
+            return fn(*args, **kwargs)
+        return decorator
+    return wrapper
+
+
+def current_principal():
+    """The Principal of a request already checked by auth_required."""
+    return g.principal
+
+
+def current_user_id():
+    """The authenticated user's id as an int, ready for integer columns."""
+    return g.principal.user_id
@@ -0,0 +1,68 @@
+# backend/services/dashboard.py
+
+import uuid
+
+from backend.extensions import cache
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+
+VERSION_CACHE_KEY = 'admin_dashboard_version'
+SUMMARY_CACHE_KEY = 'admin_dashboard_summary:{}'
+
+
+def get_dashboard_summary():
+    """
+    Returns the admin dashboard summary from the cache, computing it on a miss.
+    The entry is keyed by a version token in the shared cache that every
+    booking, release or lot change moves on (see on_occupancy_event), so
+    every worker stops reading it then, and a summary computed from rows read
+    before the change lands under the old token where nobody looks.
+    """
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        # First use, or the cache was flushed: agree on a new token
+        cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+        version = cache.get(VERSION_CACHE_KEY)
+    summary = cache.get(SUMMARY_CACHE_KEY.format(version))
+    if summary is None:
+        summary = compute_dashboard_summary()
+        cache.set(SUMMARY_CACHE_KEY.format(version), summary)
+    return summary
+
+
+def compute_dashboard_summary():
+    """Builds the summary in one pass over parking_lots using the stored spot counters."""
+    lots = db.session.query(
+        ParkingLot.name,
+        ParkingLot.available_spots,
+        ParkingLot.occupied_spots
+    ).order_by(ParkingLot.name).all()
+
+    lot_occupancy = [
+        {
+            "lot_name": name,
+            "total_spots": available + occupied,
+            "occupied_spots": occupied,
+            "available_spots": available
+        } for name, available, occupied in lots if available + occupied > 0
+    ]
+    occupied_spots = sum(lot["occupied_spots"] for lot in lot_occupancy)
+    available_spots = sum(lot["available_spots"] for lot in lot_occupancy)
+
+    return {
+        "total_lots": len(lots),
+        "total_spots": occupied_spots + available_spots,
+        "occupied_spots": occupied_spots,
+        "available_spots": available_spots,
+        "lot_occupancy": lot_occupancy
+    }
+
+
+def invalidate_dashboard_summary():
+    """Retires the cached summary for every worker; call after committing any change to spots or lots."""
+    cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+
+
+def on_occupancy_event(event_type, data):
+    """OccupancyEvents listener: every published delta changes the summary."""
+    invalidate_dashboard_summary()
@@ -0,0 +1,43 @@
+# backend/services/engine.py
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database: pool sizing,
+    pre-ping and recycle from DB_POOL_* for server databases. Options set
+    explicitly in SQLALCHEMY_ENGINE_OPTIONS win.
+    """
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+    options = {}
+    if url.get_backend_name() != 'sqlite':
+        options = {
+            "pool_size": config.get('DB_POOL_SIZE', 5),
+            "max_overflow": config.get('DB_MAX_OVERFLOW', 10),
+            "pool_timeout": config.get('DB_POOL_TIMEOUT', 30),
+            "pool_recycle": config.get('DB_POOL_RECYCLE', 1800),
+            "pool_pre_ping": config.get('DB_POOL_PRE_PING', True),
+        }
+    options.update(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    return options
+
+
+def configure_sqlite(engine, pragmas):
+    """
+    Runs the SQLITE_PRAGMAS (e.g. journal_mode=WAL, busy_timeout,
+    synchronous=NORMAL) on every new SQLite connection, so readers no longer
+    block the writer and a locked database is waited on instead of failing.
+    """
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,155 @@
+# backend/services/events.py
+
+import json
+import queue
+import threading
+
+
+class LocalBroker:
+    """In-process pub/sub: every subscriber gets its own bounded queue."""
+
+    # Messages a slow subscriber may fall behind by before it is cut off.
+    MAX_PENDING = 1000
+
+    def __init__(self):
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                # The client will reconnect and reload a full snapshot.
+                self.unsubscribe(subscriber)
+                self._close(subscriber)
+
+    def subscribe(self):
+        subscriber = queue.Queue(maxsize=self.MAX_PENDING)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return LocalSubscription(self, subscriber)
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    @staticmethod
+    def _close(subscriber):
+        """
+        Ends a full subscriber's stream without blocking the publisher: the
+        oldest pending messages make room for the closing None.
+        """
+        while True:
+            try:
+                subscriber.put_nowait(None)
+                return
+            except queue.Full:
+                pass
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class LocalSubscription:
+    def __init__(self, broker, subscriber):
+        self._broker = broker
+        self._queue = subscriber
+
+    def get(self, timeout):
+        """Next message, None on timeout. Raises EOFError once the broker dropped us."""
+        try:
+            message = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if message is None:
+            raise EOFError("Subscription closed by the broker.")
+        return message
+
+    def close(self):
+        self._broker.unsubscribe(self._queue)
+
+
+class RedisBroker:
+    """Pub/sub through a Redis channel, so events reach subscribers in every worker."""
+
+    CHANNEL = 'parking:occupancy'
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url)
+
+    def publish(self, message):
+        self._redis.publish(self.CHANNEL, json.dumps(message))
+
+    def subscribe(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.CHANNEL)
+        return RedisSubscription(pubsub)
+
+
+class RedisSubscription:
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def get(self, timeout):
+        message = self._pubsub.get_message(timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    def close(self):
+        self._pubsub.close()
+
+
+# Fields of spot events that identify the occupant; the stream sends them to admins only
+OCCUPANT_FIELDS = ('booking_id', 'user_id', 'username', 'park_in_time')
+
+
+class OccupancyEvents:
+    """
+    Publishes occupancy deltas (spot booked/released, lot created/updated/deleted)
+    after the change has been committed. Deltas go to the pub/sub broker that
+    feeds the server-sent events stream, and to in-process listeners such as
+    cache invalidation. Set EVENTS_BACKEND=redis to share them across workers.
+    """
+
+    def __init__(self, app=None):
+        self.broker = LocalBroker()
+        self._listeners = []
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('EVENTS_BACKEND') == 'redis':
+            self.broker = RedisBroker(app.config['CACHE_REDIS_URL'])
+        else:
+            self.broker = LocalBroker()
+        app.extensions['occupancy_events'] = self
+
+    def add_listener(self, fn):
+        """Registers fn(event_type, data) to be called in-process for every event."""
+        if fn not in self._listeners:
+            self._listeners.append(fn)
+
+    def publish(self, event_type, **data):
+        for listener in self._listeners:
+            try:
+                listener(event_type, data)
+            except Exception as e:
+                # The change is already committed; one failing invalidation must not undo the response
+                print(f"Listener {getattr(listener, '__qualname__', listener)} failed on {event_type}: {e}")
+        try:
+            self.broker.publish({"type": event_type, "data": data})
+        except Exception as e:
+            # Live updates are best-effort; the request itself has already succeeded.
+            print(f"Could not publish {event_type} event: {e}")
+
+    def subscribe(self):
+        return self.broker.subscribe()
+
+
+occupancy_events = OccupancyEvents()
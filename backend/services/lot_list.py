@@ -0,0 +1,109 @@
+# backend/services/lot_list.py
+
+import hashlib
+import uuid
+
+from flask import Response, current_app, request
+
+from backend.extensions import cache
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+
+VERSION_CACHE_KEY = 'lot_list_version'
+CATALOG_VERSION_CACHE_KEY = 'lot_list_catalog_version'
+CATALOG_CACHE_KEY = 'lot_list_catalog:{}'
+BODY_CACHE_KEY = 'lot_list_body:{}'
+
+# Events that change a lot's name, address, price or capacity, or the set of lots
+CATALOG_EVENTS = ('lot_created', 'lots_imported', 'lot_updated', 'lot_deleted')
+
+
+def get_lot_list():
+    """
+    Returns (body, etag) for the lot list: the JSON array as bytes and a hash
+    of it. The body is cached until any occupancy event. Each lot's fields
+    other than its counters are also kept pre-encoded until a lot itself
+    changes, so after a booking or release the body is rebuilt from a query
+    of just the counters.
+
+    Both are keyed by version tokens in the shared cache that those events
+    move on, so every worker stops reading them at once, and an entry built
+    from rows read before a change lands under the old token where nobody
+    looks.
+    """
+    version, catalog_version = _versions()
+    entry = cache.get(BODY_CACHE_KEY.format(version))
+    if entry is None:
+        entry = _build_body(catalog_version)
+        cache.set(BODY_CACHE_KEY.format(version), entry)
+    return entry
+
+
+def _versions():
+    versions = cache.get_many(VERSION_CACHE_KEY, CATALOG_VERSION_CACHE_KEY)
+    if None in versions:
+        # First use, or the cache was flushed: agree on new tokens
+        for key in (VERSION_CACHE_KEY, CATALOG_VERSION_CACHE_KEY):
+            cache.add(key, uuid.uuid4().hex, timeout=0)
+        versions = cache.get_many(VERSION_CACHE_KEY, CATALOG_VERSION_CACHE_KEY)
+    return versions
+
+
+def lot_list_response():
+    """
+    The cached lot list as a response carrying its ETag. A request whose
+    If-None-Match still matches gets 304 with no body and, on a warm cache,
+    without touching the database.
+    """
+    body, etag = get_lot_list()
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients must revalidate, but an unchanged list then costs only the 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _build_body(catalog_version):
+    catalog = cache.get(CATALOG_CACHE_KEY.format(catalog_version))
+    if catalog is None:
+        rows = ParkingLot.list_query().all()
+        catalog = [(row[0], _encode_fixed_fields(row)) for row in rows]
+        cache.set(CATALOG_CACHE_KEY.format(catalog_version), catalog)
+        counters = {row[0]: (row[-2], row[-1]) for row in rows}
+    else:
+        counters = {
+            lot_id: (available, occupied) for lot_id, available, occupied in db.session.query(
+                ParkingLot.id, ParkingLot.available_spots, ParkingLot.occupied_spots
+            )
+        }
+
+    dumps = current_app.json.dumps_bytes
+    items = []
+    for lot_id, fixed in catalog:
+        if lot_id not in counters:
+            continue  # deleted since the catalog was built
+        available, occupied = counters[lot_id]
+        items.append(fixed + dumps({"available_spots": available, "occupied_spots": occupied})[1:])
+    body = b'[' + b','.join(items) + b']'
+    return body, hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _encode_fixed_fields(row):
+    """A lot as JSON without its counters and closing brace, e.g. b'{"id":1,...,'."""
+    lot = ParkingLot.row_to_dict(row)
+    del lot["available_spots"], lot["occupied_spots"]
+    return current_app.json.dumps_bytes(lot)[:-1] + b','
+
+
+def invalidate_lot_list(catalog=False):
+    """Retires the cached body for every worker, and with catalog=True the pre-encoded lot fields too."""
+    versions = {VERSION_CACHE_KEY: uuid.uuid4().hex}
+    if catalog:
+        versions[CATALOG_VERSION_CACHE_KEY] = uuid.uuid4().hex
+    cache.set_many(versions, timeout=0)
+
+
+def on_occupancy_event(event_type, data):
+    """OccupancyEvents listener: spot events change counters, lot events the catalog."""
+    invalidate_lot_list(catalog=event_type in CATALOG_EVENTS)
@@ -0,0 +1,129 @@
+# backend/services/lot_search.py
+
+import bisect
+import uuid
+
+from backend.extensions import cache
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+from backend.services.lot_list import CATALOG_EVENTS
+from backend.routes.pagination import keyset_filter
+
+VERSION_CACHE_KEY = 'lot_search_version'
+
+# Search results order: most free spots first, then cheapest, then oldest lot
+SEARCH_ORDER = (ParkingLot.available_spots, ParkingLot.price_per_hour, ParkingLot.id)
+SEARCH_DESCENDING = (True, False, False)
+# Text matches up to this many lots are filtered with id IN (...) in SQL
+LOT_SEARCH_MAX_IN_IDS = 256
+
+
+def normalize(text):
+    """Lower case with runs of whitespace collapsed, as names and addresses are indexed."""
+    return ' '.join(text.lower().split())
+
+
+class LotPrefixIndex:
+    """
+    In-memory prefix index over lot names and addresses: a sorted list of
+    (key, lot_id) with one key per word of each, running to the end of the
+    text, so "cent" and "center mall" both find "City Center Mall". A
+    lookup is a bisect plus a scan of the matching keys.
+
+    Lot changes bump a version token in the shared cache (see
+    on_occupancy_event); every worker compares it on lookup and rebuilds its
+    copy with one query when it moved.
+    """
+
+    def __init__(self):
+        self._state = (None, [])  # (version, keys), replaced as a whole
+
+    def match(self, prefix):
+        """Ids of the lots whose name or address has a word starting with the normalized prefix."""
+        version, keys = self._current()
+        prefix = normalize(prefix)
+        ids = set()
+        for i in range(bisect.bisect_left(keys, (prefix,)), len(keys)):
+            key, lot_id = keys[i]
+            if not key.startswith(prefix):
+                break
+            ids.add(lot_id)
+        return ids
+
+    def _current(self):
+        version = cache.get(VERSION_CACHE_KEY)
+        if version is None:
+            # First use, or the cache was flushed: agree on a new token
+            cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+            version = cache.get(VERSION_CACHE_KEY)
+        if version is None or version != self._state[0]:
+            self.rebuild(version)
+        return self._state
+
+    def rebuild(self, version=None):
+        """Reloads every lot's name and address; returns the number of lots indexed."""
+        rows = db.session.query(ParkingLot.id, ParkingLot.name, ParkingLot.address).all()
+        keys = []
+        for lot_id, name, address in rows:
+            for text in (name, address):
+                words = normalize(text).split(' ')
+                keys.extend((' '.join(words[i:]), lot_id) for i in range(len(words)))
+        keys.sort()
+        self._state = (version, keys)
+        return len(rows)
+
+    def invalidate(self):
+        """Marks every worker's copy stale; each rebuilds on its next lookup."""
+        cache.set(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=0)
+
+    def on_occupancy_event(self, event_type, data):
+        """OccupancyEvents listener: only lot events change names and addresses."""
+        if event_type in CATALOG_EVENTS:
+            self.invalidate()
+
+
+lot_prefix_index = LotPrefixIndex()
+
+
+def search_query(text=None, pin_code=None, min_available=0, after=None, limit=None):
+    """
+    A list_query over the lots matching every given filter, in SEARCH_ORDER
+    and after the `after` sort key: name or address words starting with text
+    (resolved to ids by the prefix index), the exact pin code, and at least
+    min_available free spots. Counters always come from the database.
+
+    A text that matches many lots is not sent as a long IN list: the lot ids
+    are read in SEARCH_ORDER from the covering index instead, and the first
+    limit + 1 that match become the query's ids.
+    """
+    query = ParkingLot.list_query().order_by(None)
+    if pin_code:
+        query = query.filter(ParkingLot.pin_code == pin_code)
+    if min_available:
+        query = query.filter(ParkingLot.available_spots >= min_available)
+    if after:
+        query = query.filter(keyset_filter(SEARCH_ORDER, after, descending=SEARCH_DESCENDING))
+    order = [column.desc() if descending else column for column, descending in zip(SEARCH_ORDER, SEARCH_DESCENDING)]
+
+    if text:
+        ids = lot_prefix_index.match(text)
+        if limit is not None and len(ids) > LOT_SEARCH_MAX_IN_IDS:
+            ordered_ids = db.session.scalars(
+                query.with_entities(ParkingLot.id).order_by(*order).statement,
+                execution_options={"yield_per": LOT_SEARCH_MAX_IN_IDS}
+            )
+            page_ids = []
+            for lot_id in ordered_ids:
+                if lot_id in ids:
+                    page_ids.append(lot_id)
+                    if len(page_ids) > limit:
+                        break
+            ordered_ids.close()
+            ids = page_ids
+        query = query.filter(ParkingLot.id.in_(ids))
+    return query.order_by(*order)
+
+
+def search_cursor(row):
+    """The (available_spots, price_per_hour, id) sort key of a list_query row."""
+    return row[6], row[4], row[0]
@@ -0,0 +1,257 @@
+# backend/services/metrics.py
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+from functools import wraps
+
+from flask import Response, current_app, g, has_request_context, jsonify, request
+from sqlalchemy import event
+
+from backend.models.users import db
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A route ran more SQL statements than its declared query_budget."""
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.total += 1
+        self.sum += value
+
+
+class RequestMetrics:
+    """
+    Per-endpoint request latency, SQL statement counts and SQL time, collected
+    with before/after_request hooks and SQLAlchemy cursor events, and served in
+    Prometheus text format at /metrics. Figures are per process; scrape every
+    worker, or run one worker per container.
+
+    With REQUEST_PROFILING on, a request may send 'X-Profile: queries' for a
+    trace of its SQL statements or 'X-Profile: cprofile' for a cProfile report
+    in place of the normal response body.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self.reset()
+        if app is not None:
+            self.init_app(app)
+
+    def reset(self):
+        with self._lock:
+            self._latency = {}      # (endpoint, method) -> Histogram
+            self._queries = {}      # (endpoint, method) -> Histogram
+            self._sql_seconds = {}  # (endpoint, method) -> float
+            self._responses = {}    # (endpoint, method, status) -> int
+            self._budget_exceeded = {}  # endpoint -> int
+
+    def init_app(self, app):
+        with app.app_context():
+            engine = db.engine
+        if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+            event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+            event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+        app.extensions['request_metrics'] = self
+
+    # --- Request hooks ---
+
+    def _start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_count = 0
+        g.sql_seconds = 0.0
+        g.sql_trace = None
+        g.profiler = None
+        mode = request.headers.get('X-Profile', '').lower()
+        if mode and current_app.config.get('REQUEST_PROFILING'):
+            if mode == 'queries':
+                g.sql_trace = []
+            elif mode == 'cprofile':
+                g.profiler = cProfile.Profile()
+                g.profiler.enable()
+
+    def _finish_request(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        profiling = g.sql_trace is not None or g.profiler is not None
+        if profiling and response.is_streamed and response.mimetype != 'text/event-stream':
+            # Run a streamed body now so its queries are part of the trace or profile
+            response.get_data()
+        elapsed = time.perf_counter() - started
+        if g.profiler is not None:
+            g.profiler.disable()
+
+        key = (request.endpoint or 'unmatched', request.method)
+        with self._lock:
+            self._latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(elapsed)
+            self._queries.setdefault(key, Histogram(QUERY_COUNT_BUCKETS)).observe(g.sql_count)
+            self._sql_seconds[key] = self._sql_seconds.get(key, 0.0) + g.sql_seconds
+            status_key = key + (response.status_code,)
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+
+        response.headers['Server-Timing'] = (
+            f'db;dur={g.sql_seconds * 1000:.1f};desc="{g.sql_count} queries", app;dur={elapsed * 1000:.1f}'
+        )
+        if g.sql_trace is not None and not response.is_streamed:
+            return jsonify(
+                status=response.status_code,
+                query_count=g.sql_count,
+                sql_ms=round(g.sql_seconds * 1000, 3),
+                total_ms=round(elapsed * 1000, 3),
+                queries=g.sql_trace
+            )
+        if g.profiler is not None and not response.is_streamed:
+            report = io.StringIO()
+            pstats.Stats(g.profiler, stream=report).sort_stats('cumulative').print_stats(40)
+            return Response(report.getvalue(), mimetype='text/plain')
+        return response
+
+    def record_budget_exceeded(self, endpoint):
+        with self._lock:
+            self._budget_exceeded[endpoint] = self._budget_exceeded.get(endpoint, 0) + 1
+
+    # --- Exposition ---
+
+    def metrics_view(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return jsonify(msg="Metrics token required."), 401
+        return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+    def render(self):
+        lines = []
+        with self._lock:
+            lines += _histogram_lines(
+                'http_request_duration_seconds', 'Request latency by endpoint.', self._latency)
+            lines += _histogram_lines(
+                'http_request_sql_queries', 'SQL statements executed per request.', self._queries)
+
+            lines.append('# HELP http_request_sql_seconds_total Time spent in SQL by endpoint.')
+            lines.append('# TYPE http_request_sql_seconds_total counter')
+            for (endpoint, method), seconds in sorted(self._sql_seconds.items()):
+                lines.append(f'http_request_sql_seconds_total{_labels(endpoint=endpoint, method=method)} {seconds:.6f}')
+
+            lines.append('# HELP http_responses_total Responses by endpoint and status.')
+            lines.append('# TYPE http_responses_total counter')
+            for (endpoint, method, status), count in sorted(self._responses.items()):
+                lines.append(f'http_responses_total{_labels(endpoint=endpoint, method=method, status=status)} {count}')
+
+            lines.append('# HELP http_query_budget_exceeded_total Requests that ran over their query budget.')
+            lines.append('# TYPE http_query_budget_exceeded_total counter')
+            for endpoint, count in sorted(self._budget_exceeded.items()):
+                lines.append(f'http_query_budget_exceeded_total{_labels(endpoint=endpoint)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    def escape(value):
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{name}="{escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _histogram_lines(name, help_text, histograms):
+    lines = [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+    for (endpoint, method), histogram in sorted(histograms.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le=bound)} {count}')
+        lines.append(f'{name}_bucket{_labels(endpoint=endpoint, method=method, le="+Inf")} {histogram.total}')
+        lines.append(f'{name}_sum{_labels(endpoint=endpoint, method=method)} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{_labels(endpoint=endpoint, method=method)} {histogram.total}')
+    return lines
+
+
+# --- SQLAlchemy cursor events ---
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if not has_request_context():
+        return
+    started = conn.info.get('query_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    g.sql_count = g.get('sql_count', 0) + 1
+    g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+    trace = g.get('sql_trace')
+    if trace is not None:
+        trace.append({"sql": statement, "ms": round(elapsed * 1000, 3)})
+
+
+# --- Query budgets ---
+
+def query_budget(max_queries):
+    """
+    Declares how many SQL statements a view may run. Going over raises
+    QueryBudgetExceeded when TESTING or QUERY_BUDGET_STRICT is set, so tests
+    and `flask check-query-budgets` fail; in production it is only counted
+    in http_query_budget_exceeded_total. A streamed body is checked once it
+    has been sent, so the queries it runs while streaming count as well.
+    """
+    def wrapper(fn):
+        @wraps(fn)
+        def decorator(*args, **kwargs):
+            before = g.get('sql_count', 0)
+            result = fn(*args, **kwargs)
+            response = result[0] if isinstance(result, tuple) else result
+            if isinstance(response, Response) and response.is_streamed:
+                response.response = _budgeted_body(
+                    response.response, g._get_current_object(), before, max_queries,
+                    request.endpoint, current_app.config
+                )
+            else:
+                _enforce_budget(g.get('sql_count', 0) - before, max_queries, request.endpoint, current_app.config)
+            return result
+        decorator.query_budget = max_queries
+        return decorator
+    return wrapper
+
+
+def _budgeted_body(body, counters, before, max_queries, endpoint, config):
+    """
+    Passes a streamed body through and checks the budget when it is done or
+    closed. stream_with_context pushes the request's app context while the
+    body runs, so its queries land in the same g, held here as counters.
+    """
+    try:
+        yield from body
+    finally:
+        if hasattr(body, 'close'):
+            body.close()
+        _enforce_budget(counters.get('sql_count', 0) - before, max_queries, endpoint, config)
+
+
+def _enforce_budget(used, max_queries, endpoint, config):
+    if used > max_queries:
+        if config.get('TESTING') or config.get('QUERY_BUDGET_STRICT'):
+            raise QueryBudgetExceeded(f"{endpoint} ran {used} queries; its budget is {max_queries}.")
+        request_metrics.record_budget_exceeded(endpoint)
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,75 @@
+# backend/services/passwords.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+
+class HasherBusy(Exception):
+    """Raised when too many hashes are already queued or one took too long."""
+
+
+class PasswordHasher:
+    """
+    Admission control for bcrypt work: hashes run on a small thread pool
+    sized to the CPU cores (bcrypt releases the GIL), and at most max_pending
+    may be queued or running. The calling request still waits for its own
+    hash, so it holds its web worker for the full bcrypt cost; what the pool
+    adds is the cap. During a login spike, requests beyond it fail fast with
+    HasherBusy (a 503) instead of queueing behind each other until every web
+    worker is stuck in bcrypt.
+    """
+
+    def __init__(self, app=None):
+        self.workers = os.cpu_count() or 2
+        self.max_pending = self.workers * 8
+        self.timeout = 10.0
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.workers = app.config.get('PASSWORD_HASH_WORKERS') or self.workers
+        self.max_pending = app.config.get('PASSWORD_HASH_MAX_PENDING') or self.workers * 8
+        self.timeout = app.config.get('PASSWORD_HASH_TIMEOUT', self.timeout)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+            self._slots = threading.BoundedSemaphore(self.max_pending)
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Threads do not survive a fork, so each (gunicorn) worker process builds its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='password-hash')
+                self._pid = os.getpid()
+            return self._executor
+
+    def run(self, fn, *args):
+        """
+        Runs fn(*args) (a hash or a check) on the pool and blocks until it
+        returns its result. Raises HasherBusy at once when the pool is full,
+        or after timeout seconds of waiting.
+        """
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise HasherBusy()
+
+
+password_hasher = PasswordHasher()
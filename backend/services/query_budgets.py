@@ -0,0 +1,88 @@
+# backend/services/query_budgets.py
+
+from datetime import datetime, timedelta
+from flask_jwt_extended import create_access_token
+
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking
+from backend.services.metrics import QueryBudgetExceeded
+
+
+def seed_sample_data(lots=3, spots_per_lot=5, users=3, bookings_per_user=4):
+    """
+    A small data set with several rows behind every relationship, so a
+    per-row (N+1) query in a route shows up as a count above its budget.
+    Returns (admin, [users]).
+    """
+    admin = User(username='admin', email='admin@parking.com', role='admin', password_hash='x')
+    people = [User(username=f'driver{i}', email=f'driver{i}@example.com', password_hash='x')
+              for i in range(users)]
+    db.session.add_all([admin] + people)
+
+    spot_ids = []
+    for i in range(lots):
+        lot = ParkingLot(name=f'Lot {i}', address=f'{i} Budget Street', pin_code='600001',
+                         price_per_hour=10.0, capacity=spots_per_lot, available_spots=spots_per_lot)
+        db.session.add(lot)
+        db.session.flush()
+        ParkingSpot.provision(lot.id, 1, spots_per_lot)
+        spot_ids += [spot_id for spot_id, in db.session.query(ParkingSpot.id).filter_by(lot_id=lot.id)]
+    db.session.flush()
+
+    start = datetime.utcnow() - timedelta(days=30)
+    for n, person in enumerate(people):
+        for b in range(bookings_per_user):
+            park_in = start + timedelta(days=b, hours=n)
+            db.session.add(Booking(user_id=person.id, spot_id=spot_ids[(n + b * users) % len(spot_ids)],
+                                   park_in_time=park_in, park_out_time=park_in + timedelta(hours=2), cost=20.0))
+
+    # One open booking, so the active-booking routes have something to return
+    spot = db.session.get(ParkingSpot, spot_ids[-1])
+    spot.status = 'Occupied'
+    ParkingLot.adjust_counters(spot.lot_id, available=-1, occupied=1)
+    db.session.add(Booking(user_id=people[0].id, spot_id=spot.id, park_in_time=datetime.utcnow()))
+    db.session.commit()
+    return admin, people
+
+
+def check_query_budgets(app):
+    """
+    Calls every GET route that declares a query_budget, against the app's
+    (throwaway) database with TESTING on, so a route over budget raises. The
+    count comes from a query trace, which also covers streamed bodies.
+    Returns a list of (rule, queries, budget, error) tuples.
+    """
+    app.config['TESTING'] = True
+    app.config['REQUEST_PROFILING'] = True
+    with app.app_context():
+        db.create_all()
+        admin, people = seed_sample_data()
+        tokens = {
+            'admin': create_access_token(identity=str(admin.id), additional_claims={"role": "admin"}),
+            'user': create_access_token(identity=str(people[0].id), additional_claims={"role": "user"}),
+        }
+
+    client = app.test_client()
+    results = []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        view = app.view_functions[rule.endpoint]
+        budget = getattr(view, 'query_budget', None)
+        if budget is None or 'GET' not in rule.methods or rule.arguments:
+            continue
+        role = 'admin' if rule.rule.startswith('/admin') else 'user'
+        error = None
+        queries = None
+        try:
+            trace = client.get(rule.rule, headers={
+                "Authorization": f"Bearer {tokens[role]}",
+                "X-Profile": "queries"
+            }).get_json()
+            queries = trace['query_count']
+            if trace['status'] >= 400:
+                error = f"HTTP {trace['status']}"
+            elif queries > budget:
+                error = f"{queries} queries; budget is {budget}"
+        except QueryBudgetExceeded as e:
+            error = str(e)
+        results.append((rule.rule, queries, budget, error))
+    return results
@@ -0,0 +1,118 @@
+# backend/services/query_plans.py
+#
+# Regression check that the main query of each hot route is answered from an
+# index. Run with 'flask check-query-plans' against SQLite or PostgreSQL.
+
+import json
+from datetime import datetime
+from sqlalchemy import select, and_
+
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, Reservation
+from backend.services.lot_search import search_query
+from backend.tasks.rollups import usage_source
+
+# Tables that must never be read with a full, index-less scan.
+WATCHED_TABLES = ('bookings', 'bookings_archive', 'parking_spots', 'parking_lots', 'reservations')
+
+
+def hot_queries():
+    """The statements behind book/active/release, spot status, the history pages, rollups, lot search and reservations."""
+    sample_time = datetime(2024, 1, 1)
+    active_booking = select(Booking.id).where(Booking.user_id == 1, Booking.park_out_time.is_(None))
+    month = Booking.history_source(Booking.park_out_time >= sample_time, Booking.park_out_time < datetime(2024, 2, 1))
+    usage = usage_source(sample_time, datetime(2024, 1, 2))
+
+    return {
+        "active booking (book/active/release)": active_booking,
+        "free spot in lot (book)": select(ParkingSpot.id).where(
+            ParkingSpot.lot_id == 1, ParkingSpot.status == 'Available',
+            ~Reservation.holding(ParkingSpot.id, sample_time, datetime(2024, 1, 1, 0, 15))
+        ).order_by(ParkingSpot.spot_number).limit(1),
+        "spot status page for a lot": select(
+            ParkingSpot.id, ParkingLot.name, Booking.id, User.username
+        ).join(
+            ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+        ).outerjoin(
+            Booking, and_(Booking.spot_id == ParkingSpot.id, Booking.park_out_time.is_(None))
+        ).outerjoin(
+            User, User.id == Booking.user_id
+        ).where(ParkingSpot.lot_id == 1).order_by(ParkingSpot.lot_id, ParkingSpot.spot_number).limit(50),
+        "admin booking history page": history_page(Booking.park_in_time < sample_time),
+        "user booking history page": history_page(Booking.user_id == 1, Booking.park_out_time.isnot(None)),
+        "bookings completed in a month (reports)": select(month.c.user_id),
+        "bookings overlapping a rollup window": select(ParkingSpot.lot_id, usage.c.park_in_time).select_from(
+            usage
+        ).join(ParkingSpot, ParkingSpot.id == usage.c.spot_id),
+        "lot search by pin code": search_query(pin_code='600001', limit=20).limit(21).statement,
+        "lot search by free spots": search_query(min_available=5, limit=20).limit(21).statement,
+        "reservation schedule of a lot": select(Reservation.id, Reservation.start_time).join(
+            ParkingSpot, ParkingSpot.id == Reservation.spot_id
+        ).where(ParkingSpot.lot_id == 1, Reservation.end_time > sample_time, Reservation.live()),
+        "user reservations": select(Reservation.id).where(
+            Reservation.user_id == 1, Reservation.end_time > sample_time, Reservation.live()
+        ).order_by(Reservation.start_time),
+    }
+
+
+def history_page(*criteria, limit=50):
+    """A history page as the routes build it, over live and archived bookings."""
+    history = Booking.history_source(*criteria, limit=limit)
+    return Booking.history_query(history).order_by(
+        history.c.park_in_time.desc(), history.c.id.desc()
+    ).limit(limit).statement
+
+
+def explain(statement):
+    """
+    Returns (plan lines, tables read by a full scan) for a statement, or
+    (None, []) on a dialect the check does not know how to read plans for,
+    which counts as skipped rather than failed. On PostgreSQL sequential scans are disabled for the check, so a reported
+    Seq Scan means no usable index exists rather than a cost-based preference.
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect
+    compiled = statement.compile(dialect=dialect)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    if dialect.name == 'sqlite':
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).all()
+        lines = [row[-1] for row in rows]
+        full_scans = [
+            table for table in WATCHED_TABLES
+            for line in lines
+            if line.split(' ')[:2] == ['SCAN', table] and 'INDEX' not in line
+        ]
+        return lines, full_scans
+
+    if dialect.name == 'postgresql':
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        lines, full_scans = [], []
+
+        def walk(node, depth=0):
+            relation = node.get('Relation Name')
+            lines.append('  ' * depth + node['Node Type'] + (f" on {relation}" if relation else '')
+                         + (f" using {node['Index Name']}" if 'Index Name' in node else ''))
+            if node['Node Type'] == 'Seq Scan' and relation in WATCHED_TABLES:
+                full_scans.append(relation)
+            for child in node.get('Plans', []):
+                walk(child, depth + 1)
+
+        walk(plan[0]['Plan'])
+        return lines, full_scans
+
+    return None, []
+
+
+def check_query_plans():
+    """Explains every hot query. Returns {name: (plan lines or None if skipped, full scans)}."""
+    try:
+        return {name: explain(statement) for name, statement in hot_queries().items()}
+    finally:
+        db.session.rollback()
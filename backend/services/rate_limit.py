@@ -0,0 +1,168 @@
+# backend/services/rate_limit.py
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, jsonify, request
+
+from backend.services.auth import current_user_id
+
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_budget(budget):
+    """'10/minute' -> (capacity 10, refill 10/60 tokens per second)."""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(second|minute|hour|day)\s*', budget or '')
+    if not match:
+        raise ValueError(f"Invalid rate limit {budget!r}; expected e.g. '10/minute'.")
+    count = int(match.group(1))
+    return count, count / PERIODS[match.group(2)]
+
+
+class LocalBuckets:
+    """Token buckets in this process's memory, capped to the most recent keys."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate):
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return retry_after == 0, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisBuckets:
+    """Token buckets shared by every worker, updated atomically by a Lua script."""
+
+    # KEYS[1] bucket; ARGV capacity, refill rate per second. Uses the Redis clock
+    # so workers on different hosts agree, and expires idle buckets once full.
+    TAKE = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or capacity
+    local last = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - last) * rate)
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+    else
+        retry_after = (1 - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url):
+        import redis
+        self._redis = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._take = self._redis.register_script(self.TAKE)
+
+    def take(self, key, capacity, rate):
+        retry_after = float(self._take(keys=[f"parking:ratelimit:{key}"], args=[capacity, rate]))
+        return retry_after == 0, retry_after
+
+    def clear(self):
+        for key in self._redis.scan_iter("parking:ratelimit:*"):
+            self._redis.delete(key)
+
+
+class RateLimiter:
+    """
+    Per-route token-bucket admission control. Budgets come from
+    RATE_LIMITS[name] (e.g. '10/minute'), keyed per client by a key function.
+    The check runs before the view, so a rejected request costs one bucket
+    update and no database work. If Redis is unreachable, requests are let
+    through rather than failing.
+    """
+
+    def __init__(self, app=None):
+        self.buckets = LocalBuckets()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if app.config.get('RATE_LIMIT_BACKEND') == 'redis':
+            self.buckets = RedisBuckets(app.config['CACHE_REDIS_URL'])
+        else:
+            self.buckets = LocalBuckets()
+        # Fail on a malformed budget at startup rather than on the first request
+        for budget in app.config.get('RATE_LIMITS', {}).values():
+            parse_budget(budget)
+        app.extensions['rate_limiter'] = self
+
+    def check(self, name, key):
+        """Takes one token from name's bucket for key. Returns (allowed, retry_after)."""
+        budget = current_app.config.get('RATE_LIMITS', {}).get(name)
+        if not budget or not current_app.config.get('RATE_LIMIT_ENABLED', True) or key is None:
+            return True, 0
+        capacity, rate = parse_budget(budget)
+        try:
+            return self.buckets.take(f"{name}:{key}", capacity, rate)
+        except Exception as e:
+            print(f"Rate limiter unavailable, allowing request: {e}")
+            return True, 0
+
+    def limit(self, name, key=None):
+        """Decorator: rejects with 429 once key() (default: client IP) exhausts budget name."""
+        key = key or by_ip
+
+        def wrapper(fn):
+            @wraps(fn)
+            def decorator(*args, **kwargs):
+                allowed, retry_after = self.check(name, key())
+                if not allowed:
+                    response = jsonify(msg="Too many requests. Please slow down and try again shortly.")
+                    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    return response, 429
+                return fn(*args, **kwargs)
+            return decorator
+        return wrapper
+
+
+rate_limiter = RateLimiter()
+
+
+# --- Key functions ---
+
+def by_ip():
+    """The client address (behind a proxy, wrap the app in ProxyFix so this is the real client)."""
+    return request.remote_addr
+
+
+def by_user():
+    """The authenticated user; use under auth_required."""
+    return f"user:{current_user_id()}"
+
+
+def by_json_field(field):
+    """A field of the JSON body, e.g. the email a login is attempted for."""
+    def key():
+        value = (request.get_json(silent=True) or {}).get(field)
+        return str(value).strip().lower() if value else None
+    return key
@@ -0,0 +1,225 @@
+# backend/services/reservations.py
+
+import threading
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from flask import current_app
+
+from backend.extensions import cache
+from backend.models.users import db
+from backend.models.parking import ParkingSpot, Reservation
+from backend.services.lot_list import CATALOG_EVENTS
+
+VERSION_CACHE_KEY = 'reservations_version:{}'
+# How often creating a reservation retries after the database rejected an overlap
+MAX_RESERVE_ATTEMPTS = 3
+
+
+class ReservationWindowError(ValueError):
+    """Raised for a malformed or out-of-range start_time/end_time."""
+
+
+def get_window(data, now=None):
+    """
+    Reads start_time and end_time (ISO 8601 datetimes, UTC) from a JSON body
+    and checks them against RESERVATION_MAX_HOURS and
+    RESERVATION_MAX_DAYS_AHEAD. Returns (start, end).
+    """
+    now = now or datetime.utcnow()
+    try:
+        start = datetime.fromisoformat(data['start_time'])
+        end = datetime.fromisoformat(data['end_time'])
+    except (KeyError, TypeError, ValueError):
+        raise ReservationWindowError("start_time and end_time must be ISO 8601 datetimes.")
+    if start.tzinfo or end.tzinfo:
+        raise ReservationWindowError("start_time and end_time are UTC and must not carry a time zone offset.")
+    if start >= end:
+        raise ReservationWindowError("start_time must be before end_time.")
+    if start < now - timedelta(minutes=1):
+        raise ReservationWindowError("start_time must not be in the past.")
+
+    config = current_app.config
+    if end - start > timedelta(hours=config['RESERVATION_MAX_HOURS']):
+        raise ReservationWindowError(f"A reservation may last at most {config['RESERVATION_MAX_HOURS']} hours.")
+    if start > now + timedelta(days=config['RESERVATION_MAX_DAYS_AHEAD']):
+        raise ReservationWindowError(f"Reservations open {config['RESERVATION_MAX_DAYS_AHEAD']} days ahead.")
+    return start, end
+
+
+class SpotWindows:
+    """
+    One spot's live reservation windows as parallel lists sorted by start.
+    The database keeps them from overlapping, so the ends are sorted too and
+    a free-window test is a single bisect.
+    """
+
+    __slots__ = ('starts', 'ends', 'ids')
+
+    def __init__(self):
+        self.starts, self.ends, self.ids = [], [], []
+
+    def is_free(self, start, end):
+        # The first window ending after start is the only one that can overlap
+        i = bisect_right(self.ends, start)
+        return i == len(self.ends) or self.starts[i] >= end
+
+    def add(self, reservation_id, start, end):
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, reservation_id)
+
+    def remove(self, reservation_id, start):
+        i = bisect_left(self.starts, start)
+        while i < len(self.ids) and self.starts[i] == start:
+            if self.ids[i] == reservation_id:
+                del self.starts[i], self.ends[i], self.ids[i]
+                return
+            i += 1
+
+
+class LotSchedule:
+    """The spots of one lot in spot number order, with the windows of those that have any."""
+
+    def __init__(self, spot_ids, windows):
+        self.spot_ids = spot_ids
+        self.windows = windows  # spot_id -> SpotWindows
+
+    def is_free(self, spot_id, start, end):
+        windows = self.windows.get(spot_id)
+        return windows is None or windows.is_free(start, end)
+
+    def first_free(self, start, end, skip=()):
+        """
+        Scans the spots in order, so it is O(spots * log w) for w windows per
+        spot when the window is nearly booked out; a free spot early on ends
+        the scan. Freedom depends on both ends of the window, so no single
+        per-spot key (such as the next busy time) can be kept in a tree for
+        arbitrary windows. backend/benchmarks/reservations.py times the
+        worst case, a window no spot is free for, and fails above 1 ms at
+        p99; with 40,000 reservations that is about 0.1 ms at 200 spots
+        and 0.5 ms at 1,000.
+        """
+        for spot_id in self.spot_ids:
+            if spot_id not in skip and self.is_free(spot_id, start, end):
+                return spot_id
+        return None
+
+
+class ReservationIndex:
+    """
+    Per-lot in-memory schedule of reservation windows, so finding the first
+    spot free for [start, end) costs a bisect per spot instead of an overlap
+    query, and the booking route can cheaply skip spots held for an upcoming
+    reservation.
+
+    Writers apply their own committed changes and bump the lot's version
+    token in the shared cache; other workers see the new token on their next
+    lookup and reload that lot with one query. The database stays the
+    authority: the overlap constraint decides every reservation, and a
+    schedule that turns out stale is reloaded and the choice retried.
+    """
+
+    def __init__(self):
+        self._lots = {}  # lot_id -> (version, LotSchedule)
+        self._lock = threading.Lock()
+
+    # --- Lookups ---
+
+    def first_free(self, lot_id, start, end, skip=()):
+        """Id of the lowest-numbered spot with no live reservation overlapping [start, end), or None."""
+        return self._current(lot_id).first_free(start, end, skip)
+
+    def is_free(self, lot_id, spot_id, start, end):
+        return self._current(lot_id).is_free(spot_id, start, end)
+
+    def _current(self, lot_id):
+        key = VERSION_CACHE_KEY.format(lot_id)
+        version = cache.get(key)
+        if version is None:
+            # First use, or the cache was flushed: agree on a new token
+            cache.add(key, uuid.uuid4().hex, timeout=0)
+            version = cache.get(key)
+        state = self._lots.get(lot_id)
+        if version is None or state is None or state[0] != version:
+            return self.rebuild(lot_id, version)
+        return state[1]
+
+    def rebuild(self, lot_id, version=None):
+        """Reloads one lot's spots and live, unfinished windows; returns its schedule."""
+        spot_ids = [spot_id for spot_id, in db.session.query(ParkingSpot.id).filter(
+            ParkingSpot.lot_id == lot_id
+        ).order_by(ParkingSpot.spot_number)]
+        rows = db.session.query(
+            Reservation.id, Reservation.spot_id, Reservation.start_time, Reservation.end_time
+        ).join(ParkingSpot, ParkingSpot.id == Reservation.spot_id).filter(
+            ParkingSpot.lot_id == lot_id,
+            Reservation.end_time > datetime.utcnow(),
+            Reservation.live()
+        ).order_by(Reservation.spot_id, Reservation.start_time)
+
+        windows = {}
+        for reservation_id, spot_id, start, end in rows:
+            spot = windows.get(spot_id)
+            if spot is None:
+                spot = windows[spot_id] = SpotWindows()
+            # Rows arrive sorted by start, so appending keeps the lists sorted
+            spot.starts.append(start)
+            spot.ends.append(end)
+            spot.ids.append(reservation_id)
+
+        schedule = LotSchedule(spot_ids, windows)
+        with self._lock:
+            self._lots[lot_id] = (version, schedule)
+        return schedule
+
+    # --- Writes; call only after the change has been committed ---
+
+    def reserved(self, lot_id, spot_id, reservation_id, start, end):
+        self._write(lot_id, lambda schedule: schedule.windows.setdefault(
+            spot_id, SpotWindows()
+        ).add(reservation_id, start, end))
+
+    def cancelled(self, lot_id, spot_id, reservation_id, start):
+        def remove(schedule):
+            windows = schedule.windows.get(spot_id)
+            if windows is not None:
+                windows.remove(reservation_id, start)
+        self._write(lot_id, remove)
+
+    def _write(self, lot_id, change):
+        key = VERSION_CACHE_KEY.format(lot_id)
+        try:
+            with self._lock:
+                state = self._lots.get(lot_id)
+                if state is not None and state[0] is not None and state[0] == cache.get(key):
+                    # Up to date before this write, so it is up to date after it
+                    change(state[1])
+                    version = uuid.uuid4().hex
+                    self._lots[lot_id] = (version, state[1])
+                else:
+                    version = None
+                    self._lots.pop(lot_id, None)
+            cache.set(key, version or uuid.uuid4().hex, timeout=0)
+        except Exception as e:
+            print(f"Could not update the reservation index of lot {lot_id}: {e}")
+            self.invalidate(lot_id)
+
+    def invalidate(self, lot_id):
+        """Marks every worker's copy of the lot stale; each reloads it on its next lookup."""
+        with self._lock:
+            self._lots.pop(lot_id, None)
+        try:
+            cache.set(VERSION_CACHE_KEY.format(lot_id), uuid.uuid4().hex, timeout=0)
+        except Exception as e:
+            print(f"Could not invalidate the reservation index of lot {lot_id}: {e}")
+
+    def on_occupancy_event(self, event_type, data):
+        """OccupancyEvents listener: lot events change the spot lists (ids may be reused)."""
+        if event_type in CATALOG_EVENTS:
+            for lot_id in data.get('lot_ids') or [data['lot_id']]:
+                self.invalidate(lot_id)
+
+
+reservation_index = ReservationIndex()
@@ -0,0 +1,54 @@
+# backend/services/serialization.py
+
+import json
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    The app's JSON provider (jsonify, request.get_json, streamed lists).
+    Encodes with orjson when it is installed and with the standard library
+    otherwise. Either way datetimes come out as ISO 8601, so row serializers
+    can hand over datetime values as they are instead of calling isoformat().
+    """
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+    def _orjson_options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self.compact is False or (self.compact is None and self._app.debug):
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps_bytes(self, obj):
+        """Encodes obj straight to UTF-8 bytes, e.g. for pre-encoded cache entries."""
+        if orjson is None:
+            return self.dumps(obj).encode('utf-8')
+        return orjson.dumps(obj, default=self.default, option=self._orjson_options())
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b"\n", mimetype=self.mimetype)
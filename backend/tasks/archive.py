@@ -0,0 +1,63 @@
+# backend/tasks/archive.py
+
+import os
+import time
+from datetime import datetime, timedelta
+from backend.celery_app import celery
+from backend.models.users import db
+from backend.models.parking import Booking, ArchivedBooking, BOOKING_COLUMNS
+
+# Completed bookings older than this (by park_out_time) leave the live table
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Bookings moved per transaction
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+
+
+def archive_bookings(older_than_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, dry_run=False):
+    """
+    Moves bookings completed more than older_than_days ago from 'bookings'
+    to 'bookings_archive', batch_size rows per transaction (INSERT ... SELECT
+    then DELETE of the same ids), so the live table keeps only open and
+    recent bookings. With dry_run=True only counts what would move.
+    """
+    started = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    candidates = db.session.query(Booking.id).filter(Booking.park_out_time < cutoff)
+
+    archived = batches = 0
+    if dry_run:
+        archived = candidates.count()
+    else:
+        while True:
+            ids = [booking_id for booking_id, in candidates.limit(batch_size)]
+            if not ids:
+                break
+            db.session.execute(db.insert(ArchivedBooking).from_select(
+                BOOKING_COLUMNS,
+                db.select(*(getattr(Booking, name) for name in BOOKING_COLUMNS)).where(Booking.id.in_(ids))
+            ))
+            db.session.execute(
+                db.delete(Booking).where(Booking.id.in_(ids)),
+                execution_options={"synchronize_session": False}
+            )
+            db.session.commit()
+            archived += len(ids)
+            batches += 1
+    db.session.rollback()
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "archived": archived,
+        "batches": batches,
+        "dry_run": dry_run,
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
+
+
+@celery.task(name="tasks.archive.archive_completed_bookings")
+def archive_completed_bookings(dry_run=False):
+    """Nightly job: moves completed bookings older than ARCHIVE_AFTER_DAYS to the archive."""
+    print(f"[ARCHIVE] Archiving bookings completed more than {ARCHIVE_AFTER_DAYS} days ago")
+    result = archive_bookings(dry_run=dry_run)
+    print(f"[ARCHIVE] Moved {result['archived']} bookings in {result['batches']} batches")
+    return result
@@ -1,6 +1,8 @@
 # tasks/email_utils.py
 import os
+import queue
 import smtplib
+import threading
 from email.message import EmailMessage
 from typing import List, Tuple
 
@@ -9,8 +11,11 @@ SMTP_PORT = int(os.getenv("SMTP_PORT", 587))
 SMTP_USER = os.getenv("SMTP_USER")
 SMTP_PASSWORD = os.getenv("SMTP_PASSWORD")
 SMTP_FROM = os.getenv("SMTP_FROM", SMTP_USER)
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "true").lower() in ("1", "true", "yes")
+# Persistent connections kept open per worker process
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", "4"))
 
-def send_email(to: str, subject: str, html_body: str, attachments: List[Tuple[str, bytes, str]] = None):
+def build_message(to: str, subject: str, html_body: str, attachments: List[Tuple[str, bytes, str]] = None):
     """
     attachments: list of (filename, bytes_data, mime_type)
     mime_type example: 'text/csv' or 'application/pdf'
@@ -26,9 +31,118 @@ def send_email(to: str, subject: str, html_body: str, attachments: List[Tuple[st
         for filename, data, mime_type in attachments:
             maintype, subtype = mime_type.split("/", 1)
             msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=filename)
+    return msg
+
+
+class SMTPConnectionPool:
+    """
+    Keeps up to `size` logged-in SMTP connections open, so STARTTLS and login
+    are paid once per connection instead of once per message. A connection the
+    server has dropped is replaced and the message is sent again once.
+    """
+
+    def __init__(self, host, port, user=None, password=None, use_tls=True, size=4, timeout=30):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password)
+        return smtp
+
+    def _acquire(self):
+        self._slots.acquire()
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._connect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+    def _release(self, smtp, broken=False):
+        if broken:
+            _quietly_close(smtp)
+        else:
+            self._idle.put(smtp)
+        self._slots.release()
 
-    # send
-    with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as smtp:
-        smtp.starttls()
-        smtp.login(SMTP_USER, SMTP_PASSWORD)
-        smtp.send_message(msg)
+    def send_messages(self, messages):
+        """
+        Sends messages over one pooled connection and returns how many were
+        accepted. A message the server rejects is logged and skipped.
+        """
+        sent = 0
+        smtp = self._acquire()
+        try:
+            for msg in messages:
+                try:
+                    try:
+                        smtp.send_message(msg)
+                    except smtplib.SMTPServerDisconnected:
+                        # Idle connections get closed by the server; reconnect once
+                        _quietly_close(smtp)
+                        smtp = self._connect()
+                        smtp.send_message(msg)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException) as e:
+                    print(f"Could not send email to {msg['To']}: {e}")
+                    continue
+                sent += 1
+        except BaseException:
+            self._release(smtp, broken=True)
+            raise
+        self._release(smtp)
+        return sent
+
+    def close(self):
+        while True:
+            try:
+                _quietly_close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+def _quietly_close(smtp):
+    try:
+        smtp.quit()
+    except (smtplib.SMTPException, OSError):
+        smtp.close()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_smtp_pool():
+    """The process-wide pool, created on first use (after the worker has forked)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SMTPConnectionPool(
+                SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD,
+                use_tls=SMTP_USE_TLS, size=SMTP_POOL_SIZE
+            )
+        return _pool
+
+def send_messages(messages):
+    """Delivers a batch of built messages, or prints them when SMTP_HOST is unset."""
+    if not SMTP_HOST:
+        for msg in messages:
+            print("--- SIMULATING EMAIL ---")
+            print(f"To: {msg['To']}")
+            print(f"Subject: {msg['Subject']}")
+            print("------------------------")
+        return len(messages)
+    return get_smtp_pool().send_messages(messages)
+
+def send_email(to: str, subject: str, html_body: str, attachments: List[Tuple[str, bytes, str]] = None):
+    send_messages([build_message(to, subject, html_body, attachments)])
@@ -1,34 +1,121 @@
+# backend/tasks/exports.py
+
 import csv
-import io
-from celery import shared_task
-from backend.models.parking import Booking
+import gzip
+import os
+import re
+import secrets
+import time
 from datetime import datetime
+from flask import current_app
+from backend.celery_app import celery
+from backend.models.users import db, User
+from backend.models.parking import ParkingLot, ParkingSpot, Booking
+
+# Rows fetched per round trip; the export never holds more than this in memory
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+# Finished exports older than this are removed when a new one is written
+EXPORT_RETENTION_HOURS = float(os.getenv("EXPORT_RETENTION_HOURS", "24"))
+
+# parking_history_<user id or "all">_<timestamp>_<random token>.csv[.gz]
+ARTIFACT_NAME = re.compile(r'^parking_history_(\d+|all)_\d{8}_\d{6}_[0-9a-f]{16}\.csv(\.gz)?$')
+
+
+def export_dir():
+    """The artifact store: EXPORT_DIR, or instance/exports next to the database."""
+    path = current_app.config.get('EXPORT_DIR') or os.path.join(current_app.instance_path, 'exports')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def artifact_owner(filename):
+    """
+    The user id an artifact belongs to ('all' for admin exports), or None if
+    the name is not one this module writes.
+    """
+    match = ARTIFACT_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def export_rows(user_id=None):
+    """
+    Booking rows, live and archived, with lot and spot columns joined in,
+    newest first. Fetched EXPORT_FETCH_SIZE at a time (a server-side cursor
+    on PostgreSQL).
+    """
+    bookings = Booking.history_source(*([] if user_id is None else [Booking.user_id == user_id]))
+    b = bookings.c
+    columns = [b.id]
+    if user_id is None:
+        columns += [b.user_id, User.username]
+    columns += [ParkingLot.name, ParkingSpot.spot_number,
+                b.park_in_time, b.park_out_time, b.cost]
+
+    query = db.session.query(*columns).select_from(bookings).outerjoin(
+        ParkingSpot, ParkingSpot.id == b.spot_id
+    ).outerjoin(
+        ParkingLot, ParkingLot.id == ParkingSpot.lot_id
+    )
+    if user_id is None:
+        query = query.outerjoin(User, User.id == b.user_id)
+
+    return query.order_by(b.park_in_time.desc(), b.id.desc()).yield_per(EXPORT_FETCH_SIZE)
+
+
+def write_csv(fileobj, rows, admin=False):
+    """Writes rows one at a time; returns how many were written."""
+    writer = csv.writer(fileobj)
+    header = ["Booking ID"]
+    if admin:
+        header += ["User ID", "Username"]
+    writer.writerow(header + ["Parking Lot", "Spot Number", "Park In Time", "Park Out Time", "Cost"])
+
+    count = 0
+    for row in rows:
+        *head, park_in, park_out, cost = row
+        writer.writerow(head + [
+            park_in.strftime("%Y-%m-%d %H:%M") if park_in else "",
+            park_out.strftime("%Y-%m-%d %H:%M") if park_out else "",
+            f"{cost:.2f}" if cost is not None else ""
+        ])
+        count += 1
+    return count
+
+
+def prune_exports(directory):
+    cutoff = time.time() - EXPORT_RETENTION_HOURS * 3600
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if artifact_owner(name) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+
+@celery.task(name="tasks.exports.export_parking_history_csv")
+def export_parking_history_csv(user_id=None, compress=False):
+    """
+    Streams a user's parking history (or, with user_id=None, every booking)
+    to a CSV file in the artifact store. Only the file name goes into the task
+    result, so the result backend never carries the CSV itself.
+    """
+    scope = user_id if user_id is not None else 'all'
+    print(f"[EXPORT] Starting CSV export for {scope}")
+
+    directory = export_dir()
+    prune_exports(directory)
+    filename = (f"parking_history_{scope}_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_"
+                f"{secrets.token_hex(8)}.csv{'.gz' if compress else ''}")
+    path = os.path.join(directory, filename)
+    partial = path + '.part'
+
+    opener = gzip.open if compress else open
+    try:
+        with opener(partial, 'wt', newline='', encoding='utf-8') as f:
+            rows = write_csv(f, export_rows(user_id), admin=user_id is None)
+        os.replace(partial, path)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
 
-@shared_task
-def export_parking_history_csv(user_id):
-    print(f"[EXPORT] Starting CSV export for user {user_id}")
-
-    bookings = Booking.query.filter_by(user_id=user_id).all()
-
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Booking ID", "Parking Lot", "Spot Number", "Park In Time", "Park Out Time"])
-
-    if bookings:
-        for b in bookings:
-            writer.writerow([
-                b.id,
-                b.parking_spot.parking_lot.name if b.parking_spot and b.parking_spot.parking_lot else "",
-                b.parking_spot.spot_number if b.parking_spot else "",
-                b.park_in_time.strftime("%Y-%m-%d %H:%M") if b.park_in_time else "",
-                b.park_out_time.strftime("%Y-%m-%d %H:%M") if b.park_out_time else ""
-            ])
-    else:
-        print(f"[EXPORT] No bookings found for user {user_id}")
-
-    filename = f"parking_history_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-    csv_data = output.getvalue()
-    mime_type = "text/csv"
-
-    print(f"[EXPORT] Returning CSV with {len(bookings)} records for user {user_id}")
-    return filename, csv_data, mime_type
+    print(f"[EXPORT] Wrote {rows} records to {filename}")
+    return {"filename": filename, "owner": str(scope), "rows": rows}
@@ -0,0 +1,129 @@
+# backend/tasks/lots.py
+
+import os
+from datetime import datetime
+from backend.celery_app import celery
+from backend.models.users import db
+from backend.models.parking import ParkingLot, ParkingSpot, Booking, ArchivedBooking, Reservation
+from backend.models.analytics import LotUsageHourly, LotUsageDaily
+from backend.services.allocator import spot_allocator
+from backend.services.events import occupancy_events
+
+# Bookings removed per statement (and transaction) when a lot's history is purged
+LOT_DELETE_CHUNK_SIZE = int(os.getenv("LOT_DELETE_CHUNK_SIZE", "5000"))
+# Background purges that fail are retried this often, the first after this many seconds, then doubling
+LOT_DELETE_MAX_RETRIES = int(os.getenv("LOT_DELETE_MAX_RETRIES", "5"))
+LOT_DELETE_RETRY_DELAY = int(os.getenv("LOT_DELETE_RETRY_DELAY", "30"))
+
+# Status of the spots of a lot that is being deleted; the allocator only
+# claims 'Available' spots, so nobody can book into it any more
+CLOSING = 'Closing'
+
+
+def close_lot(lot_id):
+    """
+    First step of deleting a lot: in one transaction, take its free spots out
+    of service and check that none is occupied or reserved ahead. Returns
+    None once the lot is closed, otherwise why it cannot be, with nothing
+    changed. A lot left closed by a failed purge passes again, so deleting
+    it once more resumes the purge.
+    """
+    db.session.execute(
+        db.update(ParkingSpot)
+        .where(ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'Available')
+        .values(status=CLOSING)
+    )
+    lot_spots = db.select(ParkingSpot.id).where(ParkingSpot.lot_id == lot_id)
+    occupied = db.session.query(db.func.count(ParkingSpot.id)).filter(
+        ParkingSpot.lot_id == lot_id, ParkingSpot.status == 'Occupied'
+    ).scalar()
+    if occupied:
+        db.session.rollback()
+        return f"{occupied} spot(s) are currently occupied."
+    # Purging would silently drop them; the users must cancel them first
+    upcoming = db.session.query(db.func.count(Reservation.id)).filter(
+        Reservation.spot_id.in_(lot_spots),
+        Reservation.end_time > datetime.utcnow(),
+        Reservation.status == Reservation.RESERVED
+    ).scalar()
+    if upcoming:
+        db.session.rollback()
+        return f"{upcoming} upcoming reservation(s) must be cancelled first."
+
+    db.session.execute(
+        db.update(ParkingLot).where(ParkingLot.id == lot_id).values(available_spots=0, occupied_spots=0)
+    )
+    db.session.commit()
+    return None
+
+
+def purge_lot(lot_id, chunk_size=LOT_DELETE_CHUNK_SIZE, progress=None):
+    """
+    Deletes a closed lot with set-based statements and no ORM cascade: its
+    live and archived bookings in chunks of chunk_size rows, each chunk its
+    own short transaction, then its usage rollups, its reservations, its
+    spots and the lot itself.
+    progress(deleted, total) is called after every chunk. Safe to run again
+    after an interruption. Returns {"bookings": n, "spots": n}.
+    """
+    lot_spots = db.select(ParkingSpot.id).where(ParkingSpot.lot_id == lot_id)
+    total = sum(
+        db.session.query(db.func.count(model.id)).filter(model.spot_id.in_(lot_spots)).scalar()
+        for model in (Booking, ArchivedBooking)
+    )
+
+    deleted = 0
+    for model in (Booking, ArchivedBooking):
+        while True:
+            chunk = db.select(model.id).where(model.spot_id.in_(lot_spots)).limit(chunk_size)
+            removed = db.session.execute(
+                db.delete(model).where(model.id.in_(chunk)),
+                execution_options={"synchronize_session": False}
+            ).rowcount
+            db.session.commit()
+            deleted += removed
+            if progress:
+                progress(deleted, total)
+            if removed < chunk_size:
+                break
+
+    for model in (LotUsageHourly, LotUsageDaily):
+        db.session.execute(db.delete(model).where(model.lot_id == lot_id))
+    db.session.execute(
+        db.delete(Reservation).where(Reservation.spot_id.in_(lot_spots)),
+        execution_options={"synchronize_session": False}
+    )
+    spots = db.session.execute(
+        db.delete(ParkingSpot).where(ParkingSpot.lot_id == lot_id),
+        execution_options={"synchronize_session": False}
+    ).rowcount
+    db.session.execute(
+        db.delete(ParkingLot).where(ParkingLot.id == lot_id),
+        execution_options={"synchronize_session": False}
+    )
+    db.session.commit()
+    return {"bookings": deleted, "spots": spots}
+
+
+@celery.task(bind=True, name="tasks.lots.delete_parking_lot", max_retries=LOT_DELETE_MAX_RETRIES)
+def delete_parking_lot(self, lot_id):
+    """
+    Purges an already closed lot in the background. While it runs the task
+    state is PROGRESS with {"deleted_bookings", "total_bookings"}. A failed
+    purge is retried where it stopped; once the retries run out the lot
+    stays closed until it is deleted again.
+    """
+    def progress(deleted, total):
+        self.update_state(state='PROGRESS', meta={"deleted_bookings": deleted, "total_bookings": total})
+
+    print(f"[LOTS] Deleting lot {lot_id}")
+    try:
+        result = purge_lot(lot_id, progress=progress)
+    except Exception as e:
+        db.session.rollback()
+        print(f"[LOTS] Deleting lot {lot_id} failed, retrying: {e}")
+        raise self.retry(exc=e, countdown=LOT_DELETE_RETRY_DELAY * 2 ** self.request.retries)
+    spot_allocator.invalidate(lot_id)
+    occupancy_events.publish('lot_deleted', lot_id=lot_id)
+    print(f"[LOTS] Deleted lot {lot_id}: {result['bookings']} bookings, {result['spots']} spots")
+    return {"lot_id": lot_id, **result}
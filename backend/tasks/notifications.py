@@ -0,0 +1,57 @@
+# backend/tasks/notifications.py
+
+import time
+
+
+class BatchDispatcher:
+    """
+    Collects outgoing notifications and hands them to `send_batch` in batches,
+    never faster than `rate_per_second` messages on average. Used as a context
+    manager so the last partial batch is flushed on exit.
+    """
+
+    def __init__(self, send_batch, batch_size=100, rate_per_second=50.0, dry_run=False,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.rate_per_second = rate_per_second
+        self.dry_run = dry_run
+        self._clock = clock
+        self._sleep = sleep
+        self._pending = []
+        self._started_at = None
+        self.sent = 0
+        self.batches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    def submit(self, message):
+        self._pending.append(message)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        if not self.dry_run:
+            self._throttle(len(batch))
+            self.send_batch(batch)
+        self.sent += len(batch)
+        self.batches += 1
+
+    def _throttle(self, upcoming):
+        # Wait until sending `upcoming` more messages keeps us within the rate.
+        if self._started_at is None:
+            self._started_at = self._clock()
+        if not self.rate_per_second:
+            return
+        earliest = self._started_at + (self.sent + upcoming) / self.rate_per_second
+        delay = earliest - self._clock()
+        if delay > 0 and self.sent:
+            self._sleep(delay)
@@ -1,42 +1,85 @@
 # backend/tasks/reminders.py
 
 import os
+import time
 from datetime import datetime, timedelta
-from celery_app import celery
-from backend.models.users import User
-from backend.models.parking import Booking
+from sqlalchemy import and_, or_, exists
+from backend.celery_app import celery
+from backend.models.users import db, User
+from backend.models.parking import Booking, ArchivedBooking
+from backend.tasks.notifications import BatchDispatcher
 
 # Configurable days from .env
 REMINDER_INACTIVITY_DAYS = int(os.getenv("REMINDER_INACTIVITY_DAYS", "7"))
+# Users read per query, notifications per batch and the delivery rate limit
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", "5000"))
+REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "100"))
+REMINDER_RATE_PER_SECOND = float(os.getenv("REMINDER_RATE_PER_SECOND", "50"))
 
 # Mock Google Chat notification
 def send_gchat_notification(message):
     """Simulate sending a Google Chat notification."""
     print(f"--- SIMULATING GCHAT NOTIFICATION ---\n{message}\n---------------------------------")
 
+def send_gchat_batch(messages):
+    """Deliver one batch of notifications."""
+    for message in messages:
+        send_gchat_notification(message)
+
+def iter_inactive_users(cutoff_date, chunk_size=REMINDER_CHUNK_SIZE):
+    """
+    Yields lists of (id, username) for users with no booking since cutoff_date.
+    Each chunk is one anti-join query (NOT EXISTS a booking with park_in_time
+    >= cutoff, i.e. MAX(park_in_time) < cutoff or no bookings at all) answered
+    from the (user_id, park_in_time) indexes of the live and archived
+    bookings, paged by user id so no single query or cursor spans the whole
+    users table.
+    """
+    recent_booking = or_(*(
+        exists().where(and_(model.user_id == User.id, model.park_in_time >= cutoff_date))
+        for model in (Booking, ArchivedBooking)
+    ))
+    last_id = 0
+    while True:
+        chunk = db.session.query(User.id, User.username).filter(
+            User.role == 'user',
+            User.id > last_id,
+            ~recent_booking
+        ).order_by(User.id).limit(chunk_size).all()
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1][0]
+
 @celery.task(name="tasks.reminders.send_daily_reminders")
-def send_daily_reminders():
+def send_daily_reminders(dry_run=False):
     """
     Sends a reminder to users who haven't booked in the last REMINDER_INACTIVITY_DAYS days.
-    This task is scheduled to run daily via Celery Beat.
+    This task is scheduled to run daily via Celery Beat. With dry_run=True nothing
+    is sent; the returned counts and timing show what the run would do.
     """
     print("Checking for inactive users to send reminders...")
+    started = time.perf_counter()
     cutoff_date = datetime.utcnow() - timedelta(days=REMINDER_INACTIVITY_DAYS)
 
-    users = User.query.filter_by(role='user').all()
-
-    for user in users:
-        last_booking = (
-            Booking.query.filter_by(user_id=user.id)
-            .order_by(Booking.parking_timestamp.desc())
-            .first()
-        )
-
-        if not last_booking or last_booking.parking_timestamp < cutoff_date:
-            message = (
-                f"Hi {user.username}! It's been a while. "
-                f"Don't forget to book a parking spot if you need one!"
-            )
-            send_gchat_notification(message)
+    dispatcher = BatchDispatcher(
+        send_gchat_batch,
+        batch_size=REMINDER_BATCH_SIZE,
+        rate_per_second=REMINDER_RATE_PER_SECOND,
+        dry_run=dry_run
+    )
+    with dispatcher:
+        for chunk in iter_inactive_users(cutoff_date):
+            for _, username in chunk:
+                dispatcher.submit(
+                    f"Hi {username}! It's been a while. "
+                    f"Don't forget to book a parking spot if you need one!"
+                )
 
-    return f"Daily reminders completed for inactivity > {REMINDER_INACTIVITY_DAYS} days."
+    return {
+        "inactivity_days": REMINDER_INACTIVITY_DAYS,
+        "inactive_users": dispatcher.sent,
+        "batches": dispatcher.batches,
+        "dry_run": dry_run,
+        "elapsed_seconds": round(time.perf_counter() - started, 3)
+    }
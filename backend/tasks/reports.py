@@ -1,86 +1,111 @@
 # backend/tasks/reports.py
 
 import os
-import csv
-from io import StringIO
+from collections import defaultdict
 from datetime import datetime, timedelta
+from celery import group
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import func
 from backend.celery_app import celery
-from backend.models.users import User
+from backend.models.users import db, User
 from backend.models.parking import Booking
-
-# Mock email function (replace with SMTP later)
-def send_email(to_email, subject, body):
-    print("--- SIMULATING EMAIL ---")
-    print(f"To: {to_email}")
-    print(f"Subject: {subject}")
-    print(f"Body:\n{body}")
-    print("------------------------")
+from backend.tasks.email_utils import build_message, send_messages
+
+# Users per report subtask; each subtask loads its users' bookings in one query
+REPORT_CHUNK_SIZE = int(os.getenv("REPORT_CHUNK_SIZE", "500"))
+
+_templates = Environment(
+    loader=FileSystemLoader(os.path.join(os.path.dirname(__file__), 'templates')),
+    autoescape=select_autoescape(['html'])
+)
+
+def previous_month(today=None):
+    """[start, end) of the calendar month before `today`."""
+    today = today or datetime.utcnow()
+    end = today.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start = (end - timedelta(days=1)).replace(day=1)
+    return start, end
+
+def monthly_totals(start, end):
+    """
+    One grouped query over the park_out_time indexes of the live and archived
+    bookings: (user_id, username, email, total_bookings, total_spent) for
+    every user with a booking closed in [start, end).
+    """
+    bookings = Booking.history_source(Booking.park_out_time >= start, Booking.park_out_time < end)
+    return db.session.query(
+        User.id,
+        User.username,
+        User.email,
+        func.count(bookings.c.id),
+        func.coalesce(func.sum(bookings.c.cost), 0.0)
+    ).join(
+        bookings, bookings.c.user_id == User.id
+    ).filter(
+        User.role == 'user'
+    ).group_by(User.id, User.username, User.email).order_by(User.id).all()
 
 @celery.task(name="tasks.reports.send_monthly_reports")
 def send_monthly_reports():
-    """Generate and send monthly HTML reports to all users."""
+    """
+    Generate and send monthly HTML reports to all users.
+    Computes every user's totals in one query and fans the users out to
+    send_monthly_report_chunk subtasks of REPORT_CHUNK_SIZE users each.
+    """
     print("Starting monthly report generation...")
-    users = User.query.filter_by(role='user').all()
-
-    today = datetime.utcnow()
-    first_day_current_month = today.replace(day=1)
-    last_day_prev_month = first_day_current_month - timedelta(days=1)
-    first_day_prev_month = last_day_prev_month.replace(day=1)
-
-    for user in users:
-        bookings = Booking.query.filter(
-            Booking.user_id == user.id,
-            Booking.leaving_timestamp.between(first_day_prev_month, last_day_prev_month)
-        ).all()
-
-        if not bookings:
-            continue
-
-        total_spent = sum(b.parking_cost or 0 for b in bookings)
-
-        html_body = f"""
-        <h1>Your Monthly Parking Summary</h1>
-        <p>Hi {user.username},</p>
-        <p>Here's your activity report for last month:</p>
-        <ul>
-            <li>Total Bookings: {len(bookings)}</li>
-            <li>Total Spent: ₹{total_spent:.2f}</li>
-        </ul>
-        <p>Thanks for using our service!</p>
-        """
-
-        send_email(user.email, "Your Monthly Parking Report", html_body)
-
-    print("Monthly reports sent.")
-    return "Monthly reports generated successfully."
-
-@celery.task(name="tasks.exports.export_parking_history_csv")
-def export_parking_history_csv(user_id):
-    """Generate CSV of user's entire parking history and send via email."""
-    user = User.query.get(user_id)
-    if not user:
-        return "User not found."
-
-    bookings = Booking.query.filter_by(user_id=user_id).order_by(Booking.parking_timestamp.desc()).all()
-
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(['Booking ID', 'Lot ID', 'Spot ID', 'Parked In', 'Parked Out', 'Cost'])
-
-    for booking in bookings:
-        writer.writerow([
-            booking.id,
-            booking.lot_id,
-            booking.spot_id,
-            booking.parking_timestamp.strftime('%Y-%m-%d %H:%M:%S') if booking.parking_timestamp else 'N/A',
-            booking.leaving_timestamp.strftime('%Y-%m-%d %H:%M:%S') if booking.leaving_timestamp else 'N/A',
-            f"₹{booking.parking_cost:.2f}" if booking.parking_cost is not None else 'N/A'
-        ])
-
-    csv_data = output.getvalue()
-
-    subject = "Your Parking History CSV Export"
-    body = f"Hi {user.username},\n\nAttached is your parking history CSV:\n\n{csv_data}"
-    send_email(user.email, subject, body)
-
-    return f"CSV export for user {user.username} completed."
+    start, end = previous_month()
+    totals = [list(row) for row in monthly_totals(start, end)]
+
+    chunks = [totals[i:i + REPORT_CHUNK_SIZE] for i in range(0, len(totals), REPORT_CHUNK_SIZE)]
+    if chunks:
+        group(
+            send_monthly_report_chunk.s(start.isoformat(), end.isoformat(), chunk)
+            for chunk in chunks
+        ).apply_async()
+
+    print(f"Monthly reports queued for {len(totals)} users in {len(chunks)} chunks.")
+    return {"users": len(totals), "chunks": len(chunks)}
+
+@celery.task(name="tasks.reports.send_monthly_report_chunk")
+def send_monthly_report_chunk(start, end, totals):
+    """
+    Renders monthly_report.html for a chunk of (user_id, username, email,
+    total_bookings, total_spent) rows and delivers them over one pooled SMTP connection.
+    """
+    start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+    user_ids = [row[0] for row in totals]
+
+    bookings_by_user = defaultdict(list)
+    bookings = Booking.history_source(
+        Booking.user_id.in_(user_ids),
+        Booking.park_out_time >= start,
+        Booking.park_out_time < end
+    )
+    rows = Booking.history_query(bookings).order_by(bookings.c.user_id, bookings.c.park_in_time)
+    for booking_id, user_id, _, lot_name, spot_number, _, park_in, park_out, cost in rows:
+        bookings_by_user[user_id].append({
+            "id": booking_id,
+            "lot_name": lot_name or "N/A",
+            "spot_number": spot_number if spot_number is not None else "N/A",
+            "park_in_time": park_in,
+            "park_out_time": park_out,
+            "cost": cost
+        })
+
+    template = _templates.get_template('monthly_report.html')
+    month = start.strftime('%B %Y')
+    messages = [
+        build_message(
+            email,
+            f"Your Monthly Parking Report - {month}",
+            template.render(
+                month=month,
+                user={"username": username, "email": email},
+                bookings=bookings_by_user[user_id],
+                total_bookings=total_bookings,
+                total_spent=total_spent
+            )
+        )
+        for user_id, username, email, total_bookings, total_spent in totals
+    ]
+    return send_messages(messages)
@@ -0,0 +1,180 @@
+# backend/tasks/rollups.py
+
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from backend.celery_app import celery
+from backend.models.users import db
+from backend.models.parking import ParkingSpot, Booking, BOOKING_COLUMNS
+from backend.models.analytics import (
+    LotUsageHourly, LotUsageDaily, RollupWatermark, LOT_USAGE_ROLLUP, USAGE_COLUMNS
+)
+
+# Only hours that ended this long ago are rolled up, so bookings and releases
+# still committing with a timestamp inside the hour are not missed
+ROLLUP_LAG_MINUTES = int(os.getenv("ROLLUP_LAG_MINUTES", "5"))
+# Hours of bookings consumed per transaction
+ROLLUP_WINDOW_HOURS = int(os.getenv("ROLLUP_WINDOW_HOURS", "24"))
+
+HOUR = timedelta(hours=1)
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def update_usage_rollups(until=None, window_hours=ROLLUP_WINDOW_HOURS, progress=None):
+    """
+    Advances the lot usage rollups from their watermark to the last whole
+    hour before until (default: now minus ROLLUP_LAG_MINUTES), one window of
+    window_hours per transaction. Each window reads only the bookings, live
+    or archived, that overlap it; its hours are appended to lot_usage_hourly
+    and added to lot_usage_daily. The first run starts at the first booking,
+    which backfills the existing history. progress(watermark, until) is
+    called after every window. Returns {"from", "to", "windows", "hours"}.
+    """
+    until = floor_hour(until or datetime.utcnow() - timedelta(minutes=ROLLUP_LAG_MINUTES))
+    watermark = _watermark()
+    if watermark is None:
+        return {"from": None, "to": None, "windows": 0, "hours": 0}
+
+    started_at, windows, hours = watermark, 0, 0
+    while watermark < until:
+        end = min(watermark + timedelta(hours=window_hours), until)
+        if not _roll_window(watermark, end):
+            print(f"[ROLLUPS] Watermark moved by another run at {watermark.isoformat()}; stopping")
+            break
+        windows += 1
+        hours += int((end - watermark) / HOUR)
+        watermark = end
+        if progress:
+            progress(watermark, until)
+
+    return {"from": started_at.isoformat(), "to": watermark.isoformat(), "windows": windows, "hours": hours}
+
+
+def reset_usage_rollups():
+    """Deletes every rollup row and the watermark, so the next update rebuilds from the first booking."""
+    db.session.execute(db.delete(LotUsageHourly))
+    db.session.execute(db.delete(LotUsageDaily))
+    db.session.execute(db.delete(RollupWatermark).where(RollupWatermark.name == LOT_USAGE_ROLLUP))
+    db.session.commit()
+
+
+def _watermark():
+    """The current watermark, created at the first booking's hour if missing; None without bookings."""
+    state = db.session.get(RollupWatermark, LOT_USAGE_ROLLUP)
+    if state is not None:
+        return state.watermark
+
+    bookings = Booking.history_source()
+    first = db.session.query(db.func.min(bookings.c.park_in_time)).scalar()
+    if first is None:
+        return None
+    try:
+        db.session.add(RollupWatermark(name=LOT_USAGE_ROLLUP, watermark=floor_hour(first)))
+        db.session.commit()
+    except IntegrityError:
+        # Another run created it first
+        db.session.rollback()
+    return db.session.get(RollupWatermark, LOT_USAGE_ROLLUP).watermark
+
+
+def _roll_window(start, end):
+    """Rolls [start, end) up in one transaction; False if the watermark is no longer start."""
+    # Moving the watermark first also locks it, so two runs never add the same hours
+    moved = db.session.execute(
+        db.update(RollupWatermark)
+        .where(RollupWatermark.name == LOT_USAGE_ROLLUP, RollupWatermark.watermark == start)
+        .values(watermark=end)
+    ).rowcount
+    if not moved:
+        db.session.rollback()
+        return False
+
+    hourly = _usage(start, end)
+    if hourly:
+        db.session.execute(db.insert(LotUsageHourly), [
+            {"lot_id": lot_id, "bucket": bucket, **dict(zip(USAGE_COLUMNS, figures))}
+            for (lot_id, bucket), figures in hourly.items()
+        ])
+
+        daily = defaultdict(lambda: [0, 0, 0.0, 0.0])
+        for (lot_id, bucket), figures in hourly.items():
+            totals = daily[(lot_id, bucket.replace(hour=0))]
+            for i, value in enumerate(figures):
+                totals[i] += value
+        existing = {
+            (row.lot_id, row.bucket): row for row in LotUsageDaily.query.filter(
+                LotUsageDaily.bucket.in_({bucket for _, bucket in daily})
+            )
+        }
+        for key, figures in daily.items():
+            row = existing.get(key)
+            if row is None:
+                db.session.add(LotUsageDaily(lot_id=key[0], bucket=key[1], **dict(zip(USAGE_COLUMNS, figures))))
+            else:
+                for column, value in zip(USAGE_COLUMNS, figures):
+                    setattr(row, column, getattr(row, column) + value)
+
+    db.session.commit()
+    return True
+
+
+def _usage(start, end):
+    """
+    {(lot_id, hour): [started, completed, occupied minutes, revenue]} for the
+    hours in [start, end). A booking counts as started in the hour of its
+    park_in_time, as completed (with its cost) in the hour of its
+    park_out_time, and occupies its spot in every hour it overlaps; an open
+    booking occupies it up to end.
+    """
+    bookings = usage_source(start, end)
+    rows = db.session.query(
+        ParkingSpot.lot_id, bookings.c.park_in_time, bookings.c.park_out_time, bookings.c.cost
+    ).select_from(bookings).join(ParkingSpot, ParkingSpot.id == bookings.c.spot_id)
+
+    usage = defaultdict(lambda: [0, 0, 0.0, 0.0])
+    for lot_id, park_in, park_out, cost in rows:
+        if park_in >= start:
+            usage[(lot_id, floor_hour(park_in))][0] += 1
+        if park_out is not None and park_out < end:
+            figures = usage[(lot_id, floor_hour(park_out))]
+            figures[1] += 1
+            figures[3] += cost or 0.0
+
+        moment, stop = max(park_in, start), min(park_out or end, end)
+        while moment < stop:
+            hour = floor_hour(moment)
+            step_end = min(hour + HOUR, stop)
+            usage[(lot_id, hour)][2] += (step_end - moment).total_seconds() / 60
+            moment = step_end
+    return usage
+
+
+def usage_source(start, end):
+    """
+    Bookings, live or archived, that overlap [start, end), as one subquery
+    with the bookings columns. Completed bookings are found by park_out_time
+    >= start and open ones by park_out_time IS NULL, so every branch is a
+    range scan on a park_out_time index that starts at the window instead of
+    a scan of all the history before end. A periodic run, whose window is
+    the last hours, therefore reads only the bookings released since then.
+    """
+    completed = Booking.history_source(Booking.park_out_time >= start, Booking.park_in_time < end)
+    still_open = db.select(*(getattr(Booking, name) for name in BOOKING_COLUMNS)).where(
+        Booking.park_out_time.is_(None), Booking.park_in_time < end
+    )
+    return db.union_all(db.select(completed), still_open).subquery('usage_bookings')
+
+
+@celery.task(name="tasks.rollups.update_usage_rollups")
+def update_usage_rollups_task():
+    """Periodic job: rolls the hours completed since the last run into the usage tables."""
+    started = time.perf_counter()
+    result = update_usage_rollups()
+    print(f"[ROLLUPS] Rolled up {result['hours']} hours to {result['to']} "
+          f"in {time.perf_counter() - started:.2f}s")
+    return result
@@ -0,0 +1,24 @@
+# backend/tests/conftest.py
+#
+# Shared fixtures: an app on its own SQLite file with empty tables. Run with
+#   python -m pytest backend/tests
+
+import pytest
+
+from backend.app import create_app
+from backend.models.users import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'test.db'}",
+        "TESTING": True,
+        "RATE_LIMIT_ENABLED": False,
+    })
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,81 @@
+# backend/tests/test_allocator.py
+
+import threading
+from collections import Counter
+
+from backend.models.users import db
+from backend.models.parking import ParkingLot, ParkingSpot
+from backend.services.allocator import SpotAllocator
+
+
+def add_lot(spots):
+    lot = ParkingLot(name='Contended', address='1 Race Street', pin_code='600001',
+                     price_per_hour=10.0, capacity=spots, available_spots=spots)
+    db.session.add(lot)
+    db.session.flush()
+    ParkingSpot.provision(lot.id, 1, spots)
+    db.session.commit()
+    return lot.id
+
+
+def hammer(app, allocators, lot_id, threads):
+    """Every thread claims once through one of the allocators (one per simulated worker) and commits."""
+    claimed = []
+    guard = threading.Lock()
+    barrier = threading.Barrier(threads)
+
+    def claimer(allocator):
+        with app.app_context():
+            barrier.wait()
+            spot_id = allocator.claim(lot_id)
+            db.session.commit()
+            with guard:
+                claimed.append(spot_id)
+
+    workers = [threading.Thread(target=claimer, args=(allocators[i % len(allocators)],)) for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return claimed
+
+
+def test_concurrent_claims_never_share_a_spot(app):
+    with app.app_context():
+        lot_id = add_lot(8)
+    allocators = [SpotAllocator(app), SpotAllocator(app)]
+
+    claimed = hammer(app, allocators, lot_id, threads=24)
+
+    spots = [spot_id for spot_id in claimed if spot_id is not None]
+    assert not [spot_id for spot_id, n in Counter(spots).items() if n > 1]
+    assert len(spots) == 8
+    with app.app_context():
+        occupied = db.session.query(db.func.count(ParkingSpot.id)).filter_by(status='Occupied').scalar()
+    assert occupied == 8
+
+
+def test_free_list_sees_spots_released_by_another_worker(app):
+    with app.app_context():
+        lot_id = add_lot(4)
+    first, second = SpotAllocator(app), SpotAllocator(app)
+    # Only the free list may answer, not the per-claim query fallback
+    first.MAX_FALLBACK_ATTEMPTS = 0
+
+    with app.app_context():
+        mine = first.claim(lot_id)
+        db.session.commit()
+        # The other worker takes every remaining spot; this worker's list still lists them
+        theirs = [second.claim(lot_id) for _ in range(3)]
+        db.session.commit()
+        assert None not in theirs and first.claim(lot_id) is None
+        db.session.rollback()
+
+        # ...and frees one, which only the other worker's list hears about
+        db.session.execute(db.update(ParkingSpot).where(ParkingSpot.id == theirs[1]).values(status='Available'))
+        db.session.commit()
+        second.release(lot_id, theirs[1])
+
+        assert first.claim(lot_id) == theirs[1]
+        db.session.commit()
+        assert mine not in theirs
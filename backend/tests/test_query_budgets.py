@@ -0,0 +1,31 @@
+# backend/tests/test_query_budgets.py
+
+import pytest
+
+from backend.models.users import db
+from backend.models.parking import ParkingLot
+from backend.routes.pagination import stream_json_array
+from backend.services.metrics import QueryBudgetExceeded, query_budget
+from backend.services.query_budgets import check_query_budgets
+
+
+def test_routes_stay_within_their_query_budgets(app):
+    results = check_query_budgets(app)
+
+    assert results, "no route declares a query_budget"
+    over = [(rule, error) for rule, queries, budget, error in results if error]
+    assert not over
+
+
+def test_queries_run_while_streaming_count_against_the_budget(app):
+    @app.route('/streamed-lots')
+    @query_budget(1)
+    def streamed_lots():
+        def rows():
+            for _ in range(3):
+                yield {"lots": db.session.query(ParkingLot.id).count()}
+        return stream_json_array(rows())
+
+    response = app.test_client().get('/streamed-lots')
+    with pytest.raises(QueryBudgetExceeded, match="ran 3 queries"):
+        response.get_data()
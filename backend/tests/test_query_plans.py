@@ -0,0 +1,13 @@
+# backend/tests/test_query_plans.py
+
+from backend.services.query_plans import check_query_plans, hot_queries
+
+
+def test_hot_queries_use_indexes_on_sqlite(app):
+    with app.app_context():
+        plans = check_query_plans()
+        assert set(plans) == set(hot_queries())
+
+    for name, (plan, full_scans) in plans.items():
+        assert plan, f"{name} was not explained"
+        assert not full_scans, f"{name} scans {', '.join(full_scans)}: {plan}"
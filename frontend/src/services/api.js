@@ -34,4 +34,11 @@ api.interceptors.response.use(
   }
 )
 
+// Live occupancy deltas (server-sent events). EventSource cannot set headers,
+// so the token travels in the query string.
+export const openEventStream = () => {
+  const token = localStorage.getItem('access_token')
+  return new EventSource(`${api.defaults.baseURL}/api/events?jwt=${encodeURIComponent(token)}`)
+}
+
 export default api
\ No newline at end of file